@@ -0,0 +1,225 @@
+# app/audio.py
+# 음성 변환: 임시 파일 없이 ffmpeg stdin/stdout 파이프로 m4a → FLAC 바이트 변환
+# + STT 전처리(무음 제거, 모노, 16kHz, OGG_OPUS/FLAC)
+
+import os
+import re
+import subprocess
+import tempfile
+from dataclasses import dataclass, field
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+FFMPEG_TIMEOUT = float(os.getenv("FFMPEG_TIMEOUT_SECONDS", "30"))
+
+
+class TranscodeError(RuntimeError):
+    pass
+
+
+def _ffmpeg(input_arg: str, output_args, stdin_bytes=None) -> bytes:
+    cmd = [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-nostdin", "-i", input_arg, *output_args, "pipe:1"]
+    try:
+        proc = subprocess.run(cmd, input=stdin_bytes, capture_output=True, timeout=FFMPEG_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise TranscodeError(f"ffmpeg 실행 실패: {e}") from e
+    if proc.returncode != 0 or not proc.stdout:
+        raise TranscodeError(proc.stderr.decode("utf-8", "replace").strip() or f"ffmpeg 종료 코드 {proc.returncode}")
+    return proc.stdout
+
+
+def transcode_to_flac(audio_bytes: bytes, input_format: str = "m4a", channels: int = 2) -> bytes:
+    """오디오 바이트 → FLAC 바이트 (메모리에서 처리)"""
+    output_args = ["-ac", str(channels), "-f", "flac"]
+    try:
+        return _ffmpeg("pipe:0", output_args, stdin_bytes=audio_bytes)
+    except TranscodeError as pipe_err:
+        # moov atom이 파일 끝에 있는 m4a는 파이프(탐색 불가)로 못 읽는 경우가 있어 임시 파일로 재시도
+        fd, path = tempfile.mkstemp(suffix=f".{input_format}")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio_bytes)
+            return _ffmpeg(path, output_args)
+        except TranscodeError as file_err:
+            raise TranscodeError(f"{file_err} (파이프 변환 오류: {pipe_err})") from file_err
+        finally:
+            os.remove(path)
+
+
+# ----------------------------------------------------------------------
+# STT 전처리: 앞뒤 무음 제거 + 모노 + 16kHz + STT가 지원하는 가장 작은 인코딩
+# ----------------------------------------------------------------------
+STT_PREPROCESS = os.getenv("STT_PREPROCESS", "1") == "1"
+STT_SAMPLE_RATE = int(os.getenv("STT_SAMPLE_RATE", "16000"))
+STT_CHANNELS = int(os.getenv("STT_CHANNELS", "1"))
+STT_TRIM_SILENCE = os.getenv("STT_TRIM_SILENCE", "1") == "1"
+STT_SILENCE_THRESHOLD_DB = float(os.getenv("STT_SILENCE_THRESHOLD_DB", "-40"))
+STT_SILENCE_PAD_SECONDS = float(os.getenv("STT_SILENCE_PAD_SECONDS", "0.2"))
+# auto: OGG_OPUS가 가능하면 OGG_OPUS, 아니면 FLAC
+STT_ENCODING = os.getenv("STT_ENCODING", "auto").upper()
+STT_OPUS_BITRATE = os.getenv("STT_OPUS_BITRATE", "24k")
+
+# Google STT의 OGG_OPUS 지원 샘플레이트
+OPUS_SAMPLE_RATES = {8000, 12000, 16000, 24000, 48000}
+
+_duration_re = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_stream_re = re.compile(r"Stream #0:\d+.*?Audio: .*?(\d+) Hz, (mono|stereo|[\d.]+ channels|[\w.()]+)")
+
+
+@dataclass
+class PreparedAudio:
+    content: bytes
+    encoding: str            # speech.RecognitionConfig.AudioEncoding 이름
+    sample_rate: int = None  # None이면 STT가 헤더에서 판단
+    channels: int = 1
+    stats: dict = field(default_factory=dict)
+
+
+def _channel_count(layout: str) -> int:
+    if layout == "mono":
+        return 1
+    if layout == "stereo":
+        return 2
+    match = re.match(r"([\d.]+)", layout)
+    return int(float(match.group(1))) if match else 2
+
+
+_encoders = {}
+
+
+def _has_encoder(name: str) -> bool:
+    """ffmpeg 빌드에 해당 인코더가 있는지 (프로세스당 한 번만 확인)"""
+    if name not in _encoders:
+        try:
+            proc = subprocess.run([FFMPEG_BIN, "-hide_banner", "-encoders"], capture_output=True, timeout=FFMPEG_TIMEOUT)
+            listing = proc.stdout.decode("utf-8", "replace")
+            _encoders[name] = re.search(rf"^\s*\S+\s+{re.escape(name)}\s", listing, re.M) is not None
+        except (OSError, subprocess.TimeoutExpired):
+            _encoders[name] = False
+        if not _encoders[name]:
+            print(f"⚠️ ffmpeg에 {name} 인코더 없음")
+    return _encoders[name]
+
+
+def _choose_encoding(sample_rate: int) -> str:
+    if STT_ENCODING != "AUTO":
+        return STT_ENCODING
+    if sample_rate in OPUS_SAMPLE_RATES and _has_encoder("libopus"):
+        return "OGG_OPUS"
+    return "FLAC"
+
+
+# 파이프 입력에서 moov atom이 뒤에 있는 긴 m4a는 종료 코드 0으로 빈 출력만 내므로 로그로 판별
+_demux_errors = ("Error during demuxing", "partial file", "moov atom not found")
+
+
+def _decode_to_pcm(audio_bytes: bytes, input_format: str = "m4a"):
+    """m4a → (다운믹스/리샘플/무음 제거된 s16le PCM, 원본 길이(초), 원본 샘플레이트, 원본 채널 수)"""
+    try:
+        return _run_decode("pipe:0", audio_bytes)
+    except TranscodeError as pipe_err:
+        # 파이프로 못 읽는 파일만 임시 파일로 재시도
+        fd, path = tempfile.mkstemp(suffix=f".{input_format}")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio_bytes)
+            return _run_decode(path)
+        except TranscodeError as file_err:
+            raise TranscodeError(f"{file_err} (파이프 변환 오류: {pipe_err})") from file_err
+        finally:
+            os.remove(path)
+
+
+def _run_decode(input_arg: str, stdin_bytes: bytes = None):
+    filters = []
+    if STT_TRIM_SILENCE:
+        # 앞쪽 무음 제거 → 뒤집어서 다시 앞쪽 무음 제거 → 원래 방향으로
+        trim = (f"silenceremove=start_periods=1:start_threshold={STT_SILENCE_THRESHOLD_DB}dB"
+                f":start_silence={STT_SILENCE_PAD_SECONDS}")
+        filters = [trim, "areverse", trim, "areverse"]
+
+    cmd = [FFMPEG_BIN, "-hide_banner", "-loglevel", "info", "-nostdin", "-i", input_arg,
+           "-ac", str(STT_CHANNELS), "-ar", str(STT_SAMPLE_RATE)]
+    if filters:
+        cmd += ["-af", ",".join(filters)]
+    cmd += ["-f", "s16le", "pipe:1"]
+
+    try:
+        proc = subprocess.run(cmd, input=stdin_bytes, capture_output=True, timeout=FFMPEG_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise TranscodeError(f"ffmpeg 실행 실패: {e}") from e
+    log = proc.stderr.decode("utf-8", "replace")
+    if proc.returncode != 0:
+        raise TranscodeError(log.strip().splitlines()[-1] if log.strip() else f"ffmpeg 종료 코드 {proc.returncode}")
+    for marker in _demux_errors:
+        if marker in log:
+            raise TranscodeError(f"입력 해석 실패: {marker}")
+
+    duration = None
+    match = _duration_re.search(log)
+    if match:
+        h, m, sec = match.groups()
+        duration = int(h) * 3600 + int(m) * 60 + float(sec)
+    rate, channels = None, None
+    match = _stream_re.search(log)
+    if match:
+        rate, channels = int(match.group(1)), _channel_count(match.group(2))
+    return proc.stdout, duration, rate, channels
+
+
+def _encode_pcm(pcm: bytes, encoding: str) -> bytes:
+    raw_args = ["-f", "s16le", "-ar", str(STT_SAMPLE_RATE), "-ac", str(STT_CHANNELS)]
+    if encoding == "LINEAR16":
+        return pcm
+    if encoding == "OGG_OPUS":
+        output_args = ["-c:a", "libopus", "-b:a", STT_OPUS_BITRATE, "-application", "voip", "-f", "ogg"]
+    else:
+        output_args = ["-f", "flac"]
+    cmd = [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-nostdin", *raw_args, "-i", "pipe:0",
+           *output_args, "pipe:1"]
+    try:
+        proc = subprocess.run(cmd, input=pcm, capture_output=True, timeout=FFMPEG_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise TranscodeError(f"ffmpeg 실행 실패: {e}") from e
+    if proc.returncode != 0 or not proc.stdout:
+        raise TranscodeError(proc.stderr.decode("utf-8", "replace").strip() or f"ffmpeg 종료 코드 {proc.returncode}")
+    return proc.stdout
+
+
+def prepare_for_stt(audio_bytes: bytes, input_format: str = "m4a") -> PreparedAudio:
+    """STT 전송용 오디오 준비. STT_PREPROCESS=0이면 이전처럼 스테레오 FLAC"""
+    if not STT_PREPROCESS:
+        return PreparedAudio(transcode_to_flac(audio_bytes, input_format), "FLAC", None, 2)
+
+    pcm, duration, orig_rate, orig_channels = _decode_to_pcm(audio_bytes, input_format)
+    encoding = _choose_encoding(STT_SAMPLE_RATE)
+    # 전부 무음이면 빈 content → STT 호출 없이 "결과 없음" 처리
+    content = b""
+    if pcm:
+        try:
+            content = _encode_pcm(pcm, encoding)
+        except TranscodeError as e:
+            # auto 모드의 opus 인코딩 실패는 FLAC으로 재시도 (직접 지정한 인코딩은 그대로 오류)
+            if STT_ENCODING != "AUTO" or encoding != "OGG_OPUS":
+                raise
+            print(f"⚠️ OGG_OPUS 인코딩 실패 → FLAC: {e}")
+            encoding = "FLAC"
+            content = _encode_pcm(pcm, encoding)
+
+    kept = len(pcm) / (2 * STT_CHANNELS * STT_SAMPLE_RATE)
+    stats = {
+        "input_bytes": len(audio_bytes),
+        "output_bytes": len(content),
+        "encoding": encoding,
+        "duration_in": round(duration, 2) if duration is not None else None,
+        "duration_out": round(kept, 2),
+    }
+    if duration is not None:
+        stats["seconds_trimmed"] = round(max(0.0, duration - kept), 2)
+    if duration is not None and orig_rate:
+        # 이전 방식(원본 샘플레이트, 스테레오 16bit) 대비 줄어든 비압축 오디오 양
+        legacy_pcm = duration * orig_rate * 2 * 2
+        stats["input_rate"], stats["input_channels"] = orig_rate, orig_channels
+        stats["pcm_bytes_saved"] = int(legacy_pcm - len(pcm))
+    print(f"🎙️ STT 전처리: {stats}")
+
+    return PreparedAudio(content, encoding, STT_SAMPLE_RATE, STT_CHANNELS, stats)
@@ -0,0 +1,256 @@
+# app/audio_store.py
+# 합성된 응답 음성 저장소: 내용 해시(sha256)를 파일 이름으로 저장 → 같은 음성은 한 번만 저장, 내용이 바뀌지 않으므로 영구 캐시 가능
+# 파일 목록(크기, 마지막 사용 시각, TTS 캐시 키)은 DB audio_files 테이블에 두어 모든 워커가 같은 색인을 봄
+# 보관 한도: 전체 크기(AUDIO_STORE_MAX_MB)를 넘거나 마지막 사용 후 AUDIO_STORE_MAX_AGE_DAYS가 지난 파일을 삭제하되,
+# 대화 기록 / 미리 만든 첫 질문의 audio_url이 가리키는 파일은 그 행이 남아 있는 동안 삭제하지 않음
+
+import hashlib
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import delete, exists, func, literal, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from app.database import engine
+from app.model import AudioFile, ConversationLog, PrecomputedQuestion
+
+try:
+    import fcntl
+except ImportError:  # Windows: 한 프로세스 안에서만 잠금
+    fcntl = None
+
+AUDIO_STORE_DIR = os.getenv("AUDIO_STORE_DIR", os.path.join("app", "audio_store"))
+AUDIO_URL_PREFIX = os.getenv("AUDIO_URL_PREFIX", "/audio")
+# 0이면 해당 한도 없음
+MAX_BYTES = int(float(os.getenv("AUDIO_STORE_MAX_MB", "1024")) * 1024 * 1024)
+MAX_AGE_SECONDS = float(os.getenv("AUDIO_STORE_MAX_AGE_DAYS", "30")) * 86400
+# 워커마다 저장 후 한도를 적용하는 최소 간격 (초, 0이면 저장할 때마다)
+SWEEP_SECONDS = float(os.getenv("AUDIO_STORE_SWEEP_SECONDS", "60"))
+# 캐시 적중 시 마지막 사용 시각을 갱신하는 최소 간격 (적중마다 DB에 쓰지 않도록)
+TOUCH_SECONDS = 3600
+_EVICT_BATCH = 500
+
+MEDIA_TYPES = {
+    "mp3": "audio/mpeg",
+    "m4a": "audio/mp4",
+    "ogg": "audio/ogg",
+    "flac": "audio/flac",
+    "wav": "audio/wav",
+}
+
+_name_re = re.compile(r"^([0-9a-f]{64})\.(%s)$" % "|".join(MEDIA_TYPES))
+_files = AudioFile.__table__
+_thread_lock = threading.Lock()
+_swept_at = None
+_evictions = 0
+
+
+def _path(digest: str, ext: str) -> str:
+    # 한 디렉터리에 파일이 너무 많아지지 않도록 해시 앞 2글자로 나눔
+    return os.path.join(AUDIO_STORE_DIR, digest[:2], f"{digest}.{ext}")
+
+
+def _path_for(name: str) -> str:
+    digest, ext = name.rsplit(".", 1)
+    return _path(digest, ext)
+
+
+def url_for(name: str) -> str:
+    return f"{AUDIO_URL_PREFIX}/{name}"
+
+
+@contextmanager
+def _store_lock():
+    """저장 / 삭제를 워커 간 직렬화 (한 워커가 방금 다시 저장한 파일을 다른 워커가 지우지 않도록)"""
+    with _thread_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(AUDIO_STORE_DIR, exist_ok=True)
+        with open(os.path.join(AUDIO_STORE_DIR, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _referenced():
+    """audio_files 행의 파일을 대화 기록 / 미리 만든 첫 질문이 아직 가리키는지"""
+    url = literal(f"{AUDIO_URL_PREFIX}/") + _files.c.name
+    return (
+        exists().where(ConversationLog.__table__.c.audio_url == url)
+        | exists().where(PrecomputedQuestion.__table__.c.audio_url == url)
+    )
+
+
+def put(data: bytes, ext: str = "mp3", tts_key: str = None) -> str:
+    """저장 후 파일 이름(<sha256>.<ext>) 반환. 이미 있으면 다시 쓰지 않고 마지막 사용 시각만 갱신"""
+    digest = hashlib.sha256(data).hexdigest()
+    path = _path(digest, ext)
+    name = f"{digest}.{ext}"
+    now = time.time()
+    row = {"name": name, "size": len(data), "tts_key": tts_key, "last_used_at": now}
+    stmt = insert(_files).values(**row)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[_files.c.name],
+        set_={
+            "size": stmt.excluded.size,
+            "last_used_at": stmt.excluded.last_used_at,
+            "tts_key": func.coalesce(stmt.excluded.tts_key, _files.c.tts_key),
+        },
+    )
+    with _store_lock():
+        with engine.begin() as conn:
+            conn.execute(stmt)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+    _maybe_enforce()
+    return name
+
+
+def get_by_tts_key(tts_key: str):
+    """TTS 캐시 키로 저장된 음성 바이트 (없거나 파일이 지워졌으면 None)"""
+    with engine.connect() as conn:
+        row = conn.execute(
+            select(_files.c.name, _files.c.last_used_at)
+            .where(_files.c.tts_key == tts_key)
+            .order_by(_files.c.last_used_at.desc())
+            .limit(1)
+        ).first()
+    if row is None:
+        return None
+    try:
+        with open(_path_for(row.name), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    now = time.time()
+    if now - row.last_used_at >= TOUCH_SECONDS:
+        with engine.begin() as conn:
+            conn.execute(update(_files).where(_files.c.name == row.name).values(last_used_at=now))
+    return data
+
+
+def _import_existing(conn):
+    """audio_files 테이블이 생기기 전에 저장된 파일을 색인에 등록 (수정 시각 = 마지막 사용 시각)"""
+    rows = []
+    try:
+        shards = list(os.scandir(AUDIO_STORE_DIR))
+    except FileNotFoundError:
+        return
+    for shard in shards:
+        if not shard.is_dir():
+            continue
+        with os.scandir(shard.path) as it:
+            for entry in it:
+                if not _name_re.match(entry.name):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                rows.append({"name": entry.name, "size": st.st_size, "tts_key": None, "last_used_at": st.st_mtime})
+    if rows:
+        conn.execute(insert(_files).on_conflict_do_nothing(index_elements=[_files.c.name]), rows)
+
+
+def enforce():
+    """한도를 넘는 참조되지 않는 파일을 오래 안 쓴 것부터 삭제, 삭제한 파일 수 반환"""
+    global _evictions
+    if MAX_BYTES <= 0 and MAX_AGE_SECONDS <= 0:
+        return 0
+    removed = 0
+    with _store_lock():
+        with engine.begin() as conn:
+            if conn.execute(select(func.count()).select_from(_files)).scalar() == 0:
+                _import_existing(conn)
+            total = conn.execute(select(func.coalesce(func.sum(_files.c.size), 0))).scalar()
+        cutoff = time.time() - MAX_AGE_SECONDS if MAX_AGE_SECONDS > 0 else None
+        after = None
+        while True:
+            query = select(_files.c.name, _files.c.size, _files.c.last_used_at).where(~_referenced())
+            if after is not None:
+                query = query.where(_files.c.last_used_at >= after)
+            query = query.order_by(_files.c.last_used_at).limit(_EVICT_BATCH)
+            victims = []
+            done = False
+            with engine.begin() as conn:
+                rows = conn.execute(query).all()
+                for row in rows:
+                    over = MAX_BYTES > 0 and total > MAX_BYTES
+                    expired = cutoff is not None and row.last_used_at < cutoff
+                    if not over and not expired:
+                        done = True
+                        break
+                    # 조회 후 캐시 적중으로 사용 시각이 바뀐 행은 지우지 않음
+                    deleted = conn.execute(
+                        delete(_files).where(_files.c.name == row.name, _files.c.last_used_at == row.last_used_at)
+                    ).rowcount
+                    if deleted:
+                        total -= row.size
+                        victims.append(row.name)
+                    after = row.last_used_at
+            for name in victims:
+                try:
+                    os.remove(_path_for(name))
+                except FileNotFoundError:
+                    pass
+            removed += len(victims)
+            if done or len(rows) < _EVICT_BATCH or not victims:
+                break
+    _evictions += removed
+    return removed
+
+
+def _maybe_enforce():
+    global _swept_at
+    now = time.monotonic()
+    if _swept_at is not None and now - _swept_at < SWEEP_SECONDS:
+        return
+    _swept_at = now
+    try:
+        enforce()
+    except Exception as e:
+        print("음성 저장소 정리 오류:", e)
+
+
+def resolve(name: str):
+    """파일 이름 → (경로, 해시, media_type). 형식이 틀리거나 파일이 없으면 None"""
+    match = _name_re.match(name)
+    if not match:
+        return None
+    digest, ext = match.groups()
+    path = _path(digest, ext)
+    if not os.path.exists(path):
+        return None
+    return path, digest, MEDIA_TYPES[ext]
+
+
+def resolve_url(url: str):
+    """audio_url → resolve 결과 (이 저장소의 URL이 아니면 None)"""
+    prefix = f"{AUDIO_URL_PREFIX}/"
+    if not url or not url.startswith(prefix):
+        return None
+    return resolve(url[len(prefix):])
+
+
+def stats():
+    with engine.connect() as conn:
+        files, total = conn.execute(select(func.count(), func.coalesce(func.sum(_files.c.size), 0))).one()
+        referenced = conn.execute(select(func.count()).select_from(_files).where(_referenced())).scalar()
+    return {
+        "files": files,
+        "bytes": total,
+        "referenced_files": referenced,
+        "max_bytes": MAX_BYTES,
+        "max_age_seconds": MAX_AGE_SECONDS,
+        "evictions": _evictions,  # 이 워커에서 삭제한 수
+    }
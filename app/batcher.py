@@ -0,0 +1,150 @@
+# app/batcher.py
+# 동시에 들어온 predict_emotion 호출을 몇 ms 동안 모아 한 번의 배치 추론으로 처리
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+from app.emotion import predict_probs_batch, probs_to_results
+from app.inference_pool import inference_pool
+
+# 배치 설정 (환경변수로 조정)
+MAX_BATCH_SIZE = int(os.getenv("EMOTION_BATCH_MAX_SIZE", "16"))
+MAX_WAIT_MS = float(os.getenv("EMOTION_BATCH_MAX_WAIT_MS", "5"))
+
+
+class _Request:
+    __slots__ = ("text", "future")
+
+    def __init__(self, text):
+        self.text = text
+        self.future = Future()
+
+
+class EmotionBatcher:
+    """요청을 큐에 모았다가 max_batch_size 또는 max_wait_ms 도달 시 한 번에 추론"""
+
+    def __init__(self, runner=predict_probs_batch, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.runner = runner
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batch_sizes = Counter()
+
+    # 워커 스레드는 첫 요청 때 시작
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="emotion-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        """텍스트 하나를 큐에 넣고 확률 벡터를 돌려줄 Future 반환"""
+        self._ensure_started()
+        req = _Request(text)
+        self._queue.put(req)
+        return req.future
+
+    def predict(self, text: str, threshold: float = 0.3):
+        probs = self.submit(text).result()
+        return probs_to_results(probs, threshold)
+
+    def predict_many(self, texts, threshold: float = 0.3):
+        futures = [self.submit(text) for text in texts]
+        return [probs_to_results(f.result(), threshold) for f in futures]
+
+    # 이벤트 루프를 막지 않고 결과 대기
+    async def predict_async(self, text: str, threshold: float = 0.3):
+        probs = await asyncio.wrap_future(self.submit(text))
+        return probs_to_results(probs, threshold)
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                req = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if req is None:
+                # 종료 신호는 현재 배치 처리 후 다시 넣어둠
+                self._queue.put(None)
+                break
+            batch.append(req)
+        return batch
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._collect(first)
+
+            try:
+                probs = self.runner([req.text for req in batch])
+            except Exception as e:
+                self._fail(batch, e)
+            else:
+                # 프로세스 풀 runner는 Future를 돌려주므로 기다리지 않고 다음 배치를 모음
+                if isinstance(probs, Future):
+                    probs.add_done_callback(lambda f, batch=batch: self._resolve(batch, f))
+                else:
+                    self._fulfill(batch, probs)
+
+            with self._stats_lock:
+                self.batch_sizes[len(batch)] += 1
+
+    @staticmethod
+    def _fulfill(batch, probs):
+        for req, p in zip(batch, probs):
+            req.future.set_result(p)
+
+    @staticmethod
+    def _fail(batch, error):
+        for req in batch:
+            req.future.set_exception(error)
+
+    def _resolve(self, batch, future):
+        error = future.exception()
+        if error is not None:
+            self._fail(batch, error)
+        else:
+            self._fulfill(batch, future.result())
+
+    def shutdown(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def stats(self):
+        """실제 사용된 배치 크기 분포"""
+        with self._stats_lock:
+            sizes = dict(sorted(self.batch_sizes.items()))
+        batches = sum(sizes.values())
+        requests = sum(size * count for size, count in sizes.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": batches,
+            "requests": requests,
+            "avg_batch_size": round(requests / batches, 2) if batches else 0.0,
+            "batch_sizes": sizes,
+        }
+
+
+# 프로세스 전역 배처 (EMOTION_POOL_WORKERS > 0 이면 워커 프로세스 풀에서 추론)
+emotion_batcher = EmotionBatcher(
+    runner=inference_pool.submit if inference_pool.enabled else predict_probs_batch
+)
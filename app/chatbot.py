@@ -1,35 +1,81 @@
-from fastapi import APIRouter, UploadFile, File, Form, Request, Depends
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, UploadFile, File, Form, Request, Depends, Query
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from datetime import datetime
-import openai
+from typing import Optional
 import os
-import tempfile
+import asyncio
 import json
+import time
 import uuid
 from dotenv import load_dotenv
-from google.cloud import speech, texttospeech
-from pydub import AudioSegment
 from app.model import Diary, ConversationLog
+from app.database import SessionLocal
 from app.deps import get_db
+from app.startup import LazyResource
+from app.concurrency import run_blocking
+from app import audio_store
+from app.audio import prepare_for_stt
+from app.metrics import set_pipeline, span
+from app.conversation_memory import RECENT_TURNS, load_context, messages_tokens, refresh_summary
+from app.question_prefetch import QuestionPrefetcher
+from app.mode_classifier import MODE_CLASSIFIER, classify_mode, shadow_stats, stats as mode_stats
+from app.tts_cache import make_key as make_tts_key, tts_cache
+from app.voice_stream import sse_event, stream_sentences_with_audio
 import base64
-from google.oauth2 import service_account
 
 router = APIRouter()
 
 # 환경 변수
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
-# STT 처리를 위해 m4a → flac 파일 변환
-def convert_m4a_to_flac(input_path):
-    sound = AudioSegment.from_file(input_path, format="m4a")
-    sound = sound.set_channels(2)
-    flac_path = input_path.replace(".m4a", ".flac")
-    sound.export(flac_path, format="flac")
-    return flac_path
 
-def detect_mode(user_input: str) -> str:
+# 외부 SDK는 import 비용이 커서 첫 사용 때 로딩
+def _import_openai():
+    import openai
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    return openai
+
+
+def _import_google_cloud():
+    from google.cloud import speech, texttospeech
+    from google.oauth2 import service_account
+    return speech, texttospeech, service_account
+
+
+_openai = LazyResource("openai_sdk", _import_openai)
+_google_cloud = LazyResource("google_cloud_sdk", _import_google_cloud)
+
+
+# Google 인증 정보와 클라이언트는 프로세스당 한 번만 만들어 재사용 (gRPC 클라이언트는 스레드 안전)
+def _load_google_credentials():
+    _, _, service_account = _google_cloud.get()
+    key_dict = json.loads(os.getenv("GOOGLE_STT_KEY"))
+    return service_account.Credentials.from_service_account_info(key_dict)
+
+
+def _create_speech_client():
+    speech, _, _ = _google_cloud.get()
+    return speech.SpeechClient(credentials=_google_credentials.get())
+
+
+def _create_tts_client():
+    _, texttospeech, _ = _google_cloud.get()
+    return texttospeech.TextToSpeechClient(credentials=_google_credentials.get())
+
+
+_google_credentials = LazyResource("google_credentials", _load_google_credentials)
+_speech_client = LazyResource("google_speech_client", _create_speech_client)
+_tts_client = LazyResource("google_tts_client", _create_tts_client)
+
+
+def openai_client():
+    return _openai.get().OpenAI()
+
+
+# GPT로 T/F 모드 분류 (로컬 분류기가 애매할 때만 사용)
+def detect_mode_gpt(user_input: str) -> str:
     messages = [
         {
             "role": "system",
@@ -43,7 +89,7 @@ def detect_mode(user_input: str) -> str:
         },
         {"role": "user", "content": f"사용자 발화: {user_input}"}
     ]
-    client = openai.OpenAI()
+    client = openai_client()
     response = client.chat.completions.create(
         model="gpt-4o-mini",
         messages=messages,
@@ -52,8 +98,11 @@ def detect_mode(user_input: str) -> str:
     result = response.choices[0].message.content.strip()
     return result if result in ["T", "F"] else "F"
 
-# GPT 메시지 생성
-def build_messages(history, user_input, mode):
+def detect_mode(user_input: str) -> str:
+    return classify_mode(user_input, detect_mode_gpt)
+
+# GPT 메시지 생성 (summary: 최근 턴 이전 대화의 요약)
+def build_messages(history, user_input, mode, summary=None):
     if mode == "T":
         system_prompt = (
             "당신은 논리적으로 조언하는 이성적 상담 챗봇입니다.\n"
@@ -68,56 +117,121 @@ def build_messages(history, user_input, mode):
         )
 
     messages = [{"role": "system", "content": system_prompt}]
+    if summary:
+        messages.append({"role": "system", "content": f"지금까지의 대화 요약:\n{summary}"})
     for turn in history:
         messages.append({"role": "user", "content": turn["user_input"]})
         messages.append({"role": "assistant", "content": turn["response"]})
     messages.append({"role": "user", "content": user_input})
     return messages
 
+# 서버에 저장된 대화 기록(요약 + 최근 턴)으로 메시지 생성, 턴마다 프롬프트 토큰 수 기록
+def build_prompt(context, user_input, mode):
+    messages = build_messages(context.turns, user_input, mode, context.summary)
+    print(
+        f"🧮 프롬프트: source={context.source} turns={len(context.turns)} "
+        f"summary={'Y' if context.summary else 'N'} tokens≈{messages_tokens(messages)}"
+    )
+    return messages
+
 # 챗봇 응답 생성
 def get_gpt_response(messages):
-    client = openai.OpenAI()
+    client = openai_client()
     response = client.chat.completions.create(
         model="gpt-4o-mini",
         messages=messages,
         temperature=0.7,
         max_tokens=300,
     )
+    if getattr(response, "usage", None):
+        print(f"🧮 GPT 사용 토큰: prompt={response.usage.prompt_tokens} completion={response.usage.completion_tokens}")
     return response.choices[0].message.content.strip()
 
-# Google TTS API를 활용해 GPT 응답 텍스트를 mp3 음성으로 변환
-def synthesize_speech_base64(text: str, mode: str = "F") -> str:
-    try:
-        google_key_json = os.getenv("GOOGLE_STT_KEY")
-        key_dict = json.loads(google_key_json)
-        credentials = service_account.Credentials.from_service_account_info(key_dict)
-        client = texttospeech.TextToSpeechClient(credentials=credentials)
-
-        # SSML 변환
-        escaped_text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        if mode == "F":
-            ssml = f"<speak><prosody rate='medium' pitch='+2st'>{escaped_text}</prosody></speak>"
-        else:
-            ssml = f"<speak><prosody rate='medium' pitch='-2st'>{escaped_text}</prosody></speak>"
+# 대화 요약용 GPT 호출
+def complete_summary(messages, max_tokens):
+    client = openai_client()
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=messages,
+        temperature=0.3,
+        max_tokens=max_tokens,
+    )
+    return response.choices[0].message.content.strip()
 
-        synthesis_input = texttospeech.SynthesisInput(ssml=ssml)
+# 턴 저장 후 오래된 턴을 요약에 합침 (응답 지연에 포함되지 않도록 백그라운드)
+_summary_tasks = set()
 
-        voice = texttospeech.VoiceSelectionParams(
-            language_code="ko-KR",
-            ssml_gender=texttospeech.SsmlVoiceGender.FEMALE
-        )
-        audio_config = texttospeech.AudioConfig(
-            speaking_rate=1.0,
-            pitch=0.0,
-            audio_encoding=texttospeech.AudioEncoding.MP3
-        )
+def schedule_summary_refresh(diary_id: int, context):
+    if context.source != "server" or (len(context.turns) + 1 <= RECENT_TURNS and not context.pending_summary):
+        return
+    task = asyncio.ensure_future(run_blocking("gpt", refresh_summary, SessionLocal, diary_id, complete_summary))
+    _summary_tasks.add(task)
+
+    def _done(t):
+        _summary_tasks.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            print("대화 요약 갱신 실패:", t.exception())
+
+    task.add_done_callback(_done)
+
+# 챗봇 응답을 토큰 단위로 스트리밍
+def stream_gpt_response(messages):
+    client = openai_client()
+    stream = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=messages,
+        temperature=0.7,
+        max_tokens=300,
+        stream=True,
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+# TTS 목소리 설정 (캐시 키에도 포함)
+TTS_VOICE = {"language_code": "ko-KR", "ssml_gender": "FEMALE", "speaking_rate": 1.0, "pitch": 0.0, "encoding": "MP3"}
+
+
+def build_ssml(text: str, mode: str = "F") -> str:
+    escaped_text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    if mode == "F":
+        return f"<speak><prosody rate='medium' pitch='+2st'>{escaped_text}</prosody></speak>"
+    return f"<speak><prosody rate='medium' pitch='-2st'>{escaped_text}</prosody></speak>"
 
-        response = client.synthesize_speech(
-            input=synthesis_input,
-            voice=voice,
-            audio_config=audio_config
-        )
-        return base64.b64encode(response.audio_content).decode("utf-8")
+
+def _synthesize_ssml(ssml: str) -> bytes:
+    _, texttospeech, _ = _google_cloud.get()
+    synthesis_input = texttospeech.SynthesisInput(ssml=ssml)
+
+    voice = texttospeech.VoiceSelectionParams(
+        language_code=TTS_VOICE["language_code"],
+        ssml_gender=getattr(texttospeech.SsmlVoiceGender, TTS_VOICE["ssml_gender"])
+    )
+    audio_config = texttospeech.AudioConfig(
+        speaking_rate=TTS_VOICE["speaking_rate"],
+        pitch=TTS_VOICE["pitch"],
+        audio_encoding=getattr(texttospeech.AudioEncoding, TTS_VOICE["encoding"])
+    )
+
+    response = _tts_client.get().synthesize_speech(
+        input=synthesis_input,
+        voice=voice,
+        audio_config=audio_config
+    )
+    return response.audio_content
+
+
+# Google TTS API를 활용해 텍스트를 mp3 바이트로 변환 (같은 문장은 캐시에서)
+def synthesize_speech(text: str, mode: str = "F") -> bytes:
+    ssml = build_ssml(text, mode)
+    key = make_tts_key(ssml, TTS_VOICE, mode)
+    return tts_cache.get_or_create(key, lambda: _synthesize_ssml(ssml))
+
+
+# GPT 응답 텍스트를 base64 mp3 음성으로 변환
+def synthesize_speech_base64(text: str, mode: str = "F") -> str:
+    try:
+        return base64.b64encode(synthesize_speech(text, mode)).decode("utf-8")
 
     except Exception as e:
         print("TTS 변환 오류:", e)
@@ -125,21 +239,93 @@ def synthesize_speech_base64(text: str, mode: str = "F") -> str:
 
 
 
+# 응답 음성을 합성해 내용 주소 저장소에 저장 → (mp3 바이트, audio_url)
+# TTS 캐시의 2차 계층이 같은 저장소이므로 캐시에서 나온 음성은 다시 쓰지 않고 마지막 사용 시각만 갱신
+def synthesize_and_store(text: str, mode: str = "F"):
+    audio = synthesize_speech(text, mode)
+    return audio, audio_store.url_for(audio_store.put(audio, "mp3"))
+
+
+
 # 대화 내역을 ConversationLog 테이블에 저장
-def save_chat_log_db(db: Session, diary_id: int, user_input: str, response: str, mode: str, audio_url: str = None):
+def save_chat_log_db(db: Session, diary_id: int, user_input: str, response: str, mode: str, audio_url: str = None,
+                     kind: str = "turn"):
     log = ConversationLog(
         diary_id=diary_id,
         user_input=user_input,
         response=response,
         mode=mode,
-        audio_url=audio_url
+        audio_url=audio_url,
+        kind=kind
     )
     db.add(log)
     db.commit()
 
+# 일기 내용을 바탕으로 첫 질문 생성
+def generate_first_question(diary_content: str) -> str:
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "당신은 감정 상담 챗봇입니다. 사용자가 작성한 일기 내용을 바탕으로 감정을 더 잘 파악할 수 있는 첫 질문을 생성하세요. "
+                "질문은 너무 길지 않게 하고, 감정을 유도하는 부드러운 문장으로 시작하세요."
+            )
+        },
+        {"role": "user", "content": f"일기 내용: {diary_content}"}
+    ]
+    client = openai_client()
+    completion = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=messages,
+        temperature=0.7,
+        max_tokens=300,
+    )
+    return completion.choices[0].message.content.strip()
+
+# 첫 질문 + 음성 생성 (일기 저장 시 백그라운드 / 미리 만든 결과가 없을 때 요청 안에서)
+async def build_first_question(diary_content: str):
+    with span("gpt"):
+        question = await run_blocking("gpt", generate_first_question, diary_content)
+    with span("tts"):
+        _, audio_url = await run_blocking("tts", synthesize_and_store, question)
+    return question, audio_url
+
+question_prefetcher = QuestionPrefetcher(build_first_question)
+
+def get_diary_content(db: Session, diary_id: int):
+    diary = db.query(Diary).filter(Diary.id == diary_id).first()
+    return diary.content if diary else None
+
+# Google STT로 전처리된 오디오 인식 (결과가 없으면 빈 문자열)
+def transcribe_audio(prepared) -> str:
+    if not prepared.content:
+        return ""
+    speech, _, _ = _google_cloud.get()
+    client = _speech_client.get()
+    audio = speech.RecognitionAudio(content=prepared.content)
+    config = speech.RecognitionConfig(
+        encoding=getattr(speech.RecognitionConfig.AudioEncoding, prepared.encoding),
+        language_code="ko-KR",
+        audio_channel_count=prepared.channels
+    )
+    if prepared.sample_rate:
+        config.sample_rate_hertz = prepared.sample_rate
+    stt_result = client.recognize(config=config, audio=audio)
+
+    return " ".join([r.alternatives[0].transcript for r in stt_result.results])
+
+# 모드 판단 + GPT 응답
+def get_mode_and_response(context, user_input: str):
+    with span("detect_mode"):
+        mode = detect_mode(user_input)
+    messages = build_prompt(context, user_input, mode)
+    with span("gpt"):
+        return mode, get_gpt_response(messages)
+
 # 프론트에서 diary_id를 전달하면 해당 일기 내용을 기반으로 첫 질문 생성 후 질문 TTS 변환 후 오디오 저장
 @router.post("/generate-question")
 async def generate_question(request: Request, db: Session = Depends(get_db)):
+    set_pipeline("generate_question")
     try:
         body = await request.json()
         diary_id = body.get("diary_id")
@@ -147,157 +333,237 @@ async def generate_question(request: Request, db: Session = Depends(get_db)):
         if not diary_id:
             return JSONResponse(status_code=400, content={"error": "diary_id is required"})
 
-        diary = db.query(Diary).filter(Diary.id == int(diary_id)).first()
-        if not diary:
+        with span("db_read"):
+            diary_content = await run_blocking("db", get_diary_content, db, int(diary_id))
+        if diary_content is None:
             return JSONResponse(status_code=404, content={"error": "일기 내용을 찾을 수 없습니다."})
 
-        diary_content = diary.content
-
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "당신은 감정 상담 챗봇입니다. 사용자가 작성한 일기 내용을 바탕으로 감정을 더 잘 파악할 수 있는 첫 질문을 생성하세요. "
-                    "질문은 너무 길지 않게 하고, 감정을 유도하는 부드러운 문장으로 시작하세요."
-                )
-            },
-            {"role": "user", "content": f"일기 내용: {diary_content}"}
-        ]
-
-        try:
-            client = openai.OpenAI()
-            completion = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=300,
-            )
-            question = completion.choices[0].message.content.strip()
-        except Exception as gpt_error:
-            return JSONResponse(status_code=500, content={"error": "GPT 응답 실패"})
-
-        # TTS로 변환
-        try:
-            # TTS → base64
-            audio_base64 = synthesize_speech_base64(question)
+        # 일기 저장 때 미리 만든 질문 (진행 중이면 그 작업을 기다림)
+        with span("prefetch"):
+            precomputed = await question_prefetcher.get(int(diary_id), diary_content)
+        audio = None
 
-            save_chat_log_db(
+        if precomputed is not None:
+            question, audio_url = precomputed
+        else:
+            try:
+                with span("gpt"):
+                    question = await run_blocking("gpt", generate_first_question, diary_content)
+            except Exception as gpt_error:
+                return JSONResponse(status_code=500, content={"error": "GPT 응답 실패"})
+
+            # TTS로 변환
+            try:
+                # TTS → 음성 저장소 (audio_url)
+                with span("tts"):
+                    audio, audio_url = await run_blocking("tts", synthesize_and_store, question)
+            except Exception as tts_error:
+                return JSONResponse(status_code=500, content={"error": "TTS 변환 실패"})
+
+        with span("db_commit"):
+            await run_blocking(
+                "db",
+                save_chat_log_db,
                 db=db,
                 diary_id=int(diary_id),
                 user_input=diary_content,
                 response=question,
-                mode="F" 
+                mode="F",
+                audio_url=audio_url,
+                kind="question"
             )
 
-        except Exception as tts_error:
-            return JSONResponse(status_code=500, content={"error": "TTS 변환 실패"})
-
-        return {
+        result = {
             "question": question,
-            "audio_base64": audio_base64
+            "audio_url": audio_url
         }
+        # 이전 클라이언트 호환: response_format이 "url"이 아니면 base64도 함께
+        if body.get("response_format", "base64") == "base64":
+            if audio is None:
+                # 미리 만든 음성은 TTS 캐시(메모리 / 디스크)에서 가져옴
+                with span("tts"):
+                    audio = await run_blocking("tts", synthesize_speech, question)
+            with span("base64_encode"):
+                result["audio_base64"] = await run_blocking("io", _b64encode, audio)
+        return result
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": "질문 생성 실패"})
 
 
 
-# 음성 업로드 및 대화 처리
-@router.post("/upload-base64")
-async def upload_audio_base64(request: Request, db: Session = Depends(get_db)):
+class VoiceTurnError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+    def response(self):
+        return JSONResponse(status_code=self.status_code, content={"error": self.message})
+
+
+# 음성 한 턴 공통 처리 (JSON + base64): 요청 검증 → base64 디코딩 → STT
+async def read_voice_turn(request: Request, db: Session):
+    # 1. 요청 데이터 수신 및 검증
     try:
-        # 1. 요청 데이터 수신 및 검증
-        try:
-            data = await request.json()
-            audio_base64 = data.get("audio_base64")
-            history = data.get("history")
-            diary_id = data.get("diary_id")
-            
-            if not audio_base64 or not diary_id or not history:
-                return JSONResponse(status_code=400, content={"error": "audio_base64, diary_id, history는 필수입니다."})
-        except Exception as parse_err:
-            return JSONResponse(status_code=400, content={"error": f"요청 JSON 파싱 실패: {str(parse_err)}"})
-
-        # 2. history JSON 변환
-        try:
-            history_data = history if isinstance(history, list) else json.loads(history)
-        except Exception as hist_err:
-            return JSONResponse(status_code=400, content={"error": f"history 파싱 실패: {str(hist_err)}"})
+        data = await request.json()
+        audio_base64 = data.get("audio_base64")
+        history = data.get("history")
+        diary_id = data.get("diary_id")
+
+        if not audio_base64 or not diary_id:
+            raise VoiceTurnError(400, "audio_base64, diary_id는 필수입니다.")
+        diary_id = int(diary_id)
+    except VoiceTurnError:
+        raise
+    except Exception as parse_err:
+        raise VoiceTurnError(400, f"요청 JSON 파싱 실패: {str(parse_err)}")
+
+    # 2. base64 디코딩
+    try:
+        with span("base64_decode"):
+            audio_bytes = await run_blocking("io", base64.b64decode, audio_base64)
+    except Exception as b64_err:
+        raise VoiceTurnError(400, f"base64 디코딩 실패: {str(b64_err)}")
 
-        # 3. base64 → 파일 저장
-        try:
-            audio_bytes = base64.b64decode(audio_base64)
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".m4a") as tmp:
-                tmp.write(audio_bytes)
-                m4a_path = tmp.name
-        except Exception as b64_err:
-            return JSONResponse(status_code=400, content={"error": f"base64 디코딩 또는 파일 저장 실패: {str(b64_err)}"})
-
-        # 4. flac 변환
-        try:
-            flac_path = convert_m4a_to_flac(m4a_path)
-        except Exception as convert_err:
-            return JSONResponse(status_code=500, content={"error": f"m4a → flac 변환 실패: {str(convert_err)}"})
+    return await voice_turn_from_bytes(db, diary_id, audio_bytes, history)
 
-        # 5. STT
-        try:
-            google_key_json = os.getenv("GOOGLE_STT_KEY")
-            key_dict = json.loads(google_key_json)
-            credentials = service_account.Credentials.from_service_account_info(key_dict)
-
-            client = speech.SpeechClient(credentials=credentials)
-            with open(flac_path, "rb") as audio_file:
-                content = audio_file.read()
-
-            audio = speech.RecognitionAudio(content=content)
-            config = speech.RecognitionConfig(
-                encoding=speech.RecognitionConfig.AudioEncoding.FLAC,
-                language_code="ko-KR",
-                audio_channel_count=2
-            )
-            stt_result = client.recognize(config=config, audio=audio)
 
-            if not stt_result.results:
-                return JSONResponse(status_code=400, content={"error": "STT 결과가 없습니다."})
+# 음성 한 턴 공통 처리 (바이너리): multipart(file, diary_id, history) 또는 원본 바이트 본문(?diary_id=)
+async def read_audio_upload(request: Request, db: Session):
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise VoiceTurnError(400, "file, diary_id는 필수입니다.")
+            audio_bytes = await upload.read()
+            diary_id, history = form.get("diary_id"), form.get("history")
+        else:
+            audio_bytes = await request.body()
+            diary_id, history = request.query_params.get("diary_id"), request.query_params.get("history")
 
-            user_input = " ".join([r.alternatives[0].transcript for r in stt_result.results])
-        except Exception as stt_err:
-            return JSONResponse(status_code=500, content={"error": f"STT 실패: {str(stt_err)}"})
+        if not audio_bytes or not diary_id:
+            raise VoiceTurnError(400, "오디오 본문과 diary_id는 필수입니다.")
+        diary_id = int(diary_id)
+    except VoiceTurnError:
+        raise
+    except Exception as parse_err:
+        raise VoiceTurnError(400, f"요청 파싱 실패: {str(parse_err)}")
 
-        # 6. 감정 모드 판단 및 GPT 호출
-        try:
-            prev_mode = history_data[-1].get("mode", "F") if history_data else "F"
-            mode = detect_mode(user_input)
+    return await voice_turn_from_bytes(db, diary_id, audio_bytes, history)
 
-            messages = build_messages(history_data, user_input, mode)
-            response_text = get_gpt_response(messages)
-        except Exception as gpt_err:
-            return JSONResponse(status_code=500, content={"error": f"GPT 응답 실패: {str(gpt_err)}"})
 
-        # 7. TTS
-        try:
-            audio_base64_response = synthesize_speech_base64(response_text)
-        except Exception as tts_err:
-            return JSONResponse(status_code=500, content={"error": f"TTS 변환 실패: {str(tts_err)}"})
+# STT 전처리 → STT (대화 기록은 STT와 동시에 DB에서 로딩)
+async def voice_turn_from_bytes(db: Session, diary_id: int, audio_bytes: bytes, history=None):
+    # history는 선택: 서버에 기록이 없을 때만 사용
+    try:
+        history_data = history if isinstance(history, list) or history is None else json.loads(history)
+    except Exception as hist_err:
+        raise VoiceTurnError(400, f"history 파싱 실패: {str(hist_err)}")
 
-        # 8. DB 저장
+    context_task = asyncio.ensure_future(run_blocking("db", _load_context_timed, db, diary_id, history_data))
+    try:
+        user_input = await _transcribe_bytes(audio_bytes)
+    finally:
         try:
-            save_chat_log_db(
+            context = await context_task
+        except Exception as ctx_err:
+            context = None
+            print("대화 기록 로딩 실패:", ctx_err)
+    if context is None:
+        raise VoiceTurnError(500, "대화 기록 로딩 실패")
+
+    return diary_id, context, user_input
+
+
+def _load_context_timed(db: Session, diary_id: int, history_data):
+    # STT와 동시에 실행되므로 스레드 안에서 계측
+    with span("context_load"):
+        return load_context(db, diary_id, history_data)
+
+
+async def _transcribe_bytes(audio_bytes: bytes) -> str:
+    # STT 전처리 (무음 제거, 모노 16kHz, OGG_OPUS/FLAC 인코딩 — 메모리에서)
+    try:
+        with span("ffmpeg"):
+            prepared = await run_blocking("ffmpeg", prepare_for_stt, audio_bytes)
+    except Exception as convert_err:
+        raise VoiceTurnError(500, f"오디오 변환 실패: {str(convert_err)}")
+
+    # STT
+    try:
+        with span("stt"):
+            user_input = await run_blocking("stt", transcribe_audio, prepared)
+    except Exception as stt_err:
+        raise VoiceTurnError(500, f"STT 실패: {str(stt_err)}")
+    if not user_input:
+        raise VoiceTurnError(400, "STT 결과가 없습니다.")
+    return user_input
+
+
+def _b64encode(audio: bytes) -> str:
+    return base64.b64encode(audio).decode("utf-8")
+
+
+# 모드 판단 → GPT → TTS(음성 저장소) → DB 저장. include_base64면 음성도 응답에 포함
+async def respond_to_turn(db: Session, diary_id: int, context, user_input: str, include_base64: bool):
+    # 감정 모드 판단 및 GPT 호출
+    try:
+        mode, response_text = await run_blocking("gpt", get_mode_and_response, context, user_input)
+    except Exception as gpt_err:
+        return JSONResponse(status_code=500, content={"error": f"GPT 응답 실패: {str(gpt_err)}"})
+
+    # TTS
+    try:
+        with span("tts"):
+            audio, audio_url = await run_blocking("tts", synthesize_and_store, response_text)
+    except Exception as tts_err:
+        return JSONResponse(status_code=500, content={"error": f"TTS 변환 실패: {str(tts_err)}"})
+
+    # DB 저장
+    try:
+        with span("db_commit"):
+            await run_blocking(
+                "db",
+                save_chat_log_db,
                 db=db,
-                diary_id=int(diary_id),
+                diary_id=diary_id,
                 user_input=user_input,
                 response=response_text,
                 mode=mode,
+                audio_url=audio_url,
             )
-        except Exception as db_err:
-            return JSONResponse(status_code=500, content={"error": f"대화 저장 실패: {str(db_err)}"})
-
-        # 성공 응답
-        return {
-            "input": user_input,
-            "response": response_text,
-            "audio_base64": audio_base64_response,
-        }
+    except Exception as db_err:
+        return JSONResponse(status_code=500, content={"error": f"대화 저장 실패: {str(db_err)}"})
+    schedule_summary_refresh(diary_id, context)
+
+    # 성공 응답
+    result = {
+        "input": user_input,
+        "response": response_text,
+        "audio_url": audio_url,
+    }
+    if include_base64:
+        with span("base64_encode"):
+            result["audio_base64"] = await run_blocking("io", _b64encode, audio)
+    return result
+
+
+# 음성 업로드 및 대화 처리 (JSON + base64, 이전 클라이언트 호환: 기본으로 audio_base64도 응답)
+@router.post("/upload-base64")
+async def upload_audio_base64(request: Request, db: Session = Depends(get_db)):
+    set_pipeline("upload_audio_base64")
+    try:
+        # 요청 검증, 디코딩, STT
+        try:
+            diary_id, context, user_input = await read_voice_turn(request, db)
+        except VoiceTurnError as turn_err:
+            return turn_err.response()
+
+        include_base64 = request.query_params.get("response_format", "base64") == "base64"
+        return await respond_to_turn(db, diary_id, context, user_input, include_base64)
 
     except Exception as e:
         import traceback
@@ -305,23 +571,253 @@ async def upload_audio_base64(request: Request, db: Session = Depends(get_db)):
         return JSONResponse(status_code=500, content={"error": f"알 수 없는 서버 오류: {str(e)}"})
 
 
-# 대화 기록 조회
-@router.get("/chat-history")
-async def get_chat_history(diary_id: int, db: Session = Depends(get_db)):
-    logs = (
-        db.query(ConversationLog)
-        .filter(ConversationLog.diary_id == diary_id)
-        .order_by(ConversationLog.created_at)
-        .all()
+# 음성 업로드 및 대화 처리 (바이너리): 응답 음성은 audio_url로, ?response_format=base64면 base64도 포함
+@router.post("/upload-audio")
+async def upload_audio(request: Request, db: Session = Depends(get_db)):
+    set_pipeline("upload_audio")
+    try:
+        try:
+            diary_id, context, user_input = await read_audio_upload(request, db)
+        except VoiceTurnError as turn_err:
+            return turn_err.response()
+
+        include_base64 = request.query_params.get("response_format", "url") == "base64"
+        return await respond_to_turn(db, diary_id, context, user_input, include_base64)
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(status_code=500, content={"error": f"알 수 없는 서버 오류: {str(e)}"})
+
+
+# 저장된 응답 음성 제공 (Range 요청 지원, 내용 해시 이름이라 영구 캐시, 보관 한도로 삭제된 이름은 404)
+@router.get("/audio/{name}")
+def get_audio(name: str, request: Request):
+    found = audio_store.resolve(name)
+    if found is None:
+        return JSONResponse(status_code=404, content={"error": "음성 파일을 찾을 수 없습니다."})
+    path, digest, media_type = found
+    etag = f'"{digest}"'
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": etag}
+    if request.headers.get("if-none-match") in (etag, f"W/{etag}"):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+# 음성 업로드 스트리밍 버전 (SSE): 문장이 완성되는 대로 텍스트와 음성을 바로 전송
+# 이벤트 순서: input → (text, audio)* → done | error
+@router.post("/upload-base64/stream")
+async def upload_audio_base64_stream(request: Request):
+    set_pipeline("upload_audio_base64_stream")
+    started_at = time.perf_counter()
+    db = SessionLocal()
+    try:
+        diary_id, context, user_input = await read_voice_turn(request, db)
+    except VoiceTurnError as turn_err:
+        return turn_err.response()
+    finally:
+        db.close()
+
+    async def events():
+        try:
+            with span("detect_mode"):
+                mode = await run_blocking("gpt", detect_mode, user_input)
+            yield sse_event("input", {"input": user_input, "mode": mode})
+
+            messages = build_prompt(context, user_input, mode)
+            sentences = []
+            async for event, data in stream_sentences_with_audio(
+                stream_gpt_response(messages), synthesize_speech_base64, run_blocking, started_at
+            ):
+                if event == "text":
+                    sentences.append(data["text"])
+                yield sse_event(event, data)
+
+            # 스트리밍이 끝난 뒤 전체 응답을 한 번에 저장 (응답 후 DB 세션은 이미 닫혀 있어 새로 열기)
+            response_text = " ".join(sentences)
+            db = SessionLocal()
+            try:
+                await run_blocking(
+                    "db",
+                    save_chat_log_db,
+                    db=db,
+                    diary_id=diary_id,
+                    user_input=user_input,
+                    response=response_text,
+                    mode=mode,
+                )
+            finally:
+                db.close()
+            schedule_summary_refresh(diary_id, context)
+            yield sse_event("done", {
+                "response": response_text,
+                "mode": mode,
+                "t_ms": round((time.perf_counter() - started_at) * 1000, 1),
+            })
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield sse_event("error", {"error": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    result = [
-        {
-            "user_input": log.user_input,
-            "response": log.response,
-            "mode": log.mode,
-            "created_at": log.created_at.isoformat()
+
+# 로컬 모드 분류기 / GPT fallback 사용 횟수 (shadow 모드면 GPT와의 일치율)
+@router.get("/mode-classifier/stats")
+def mode_classifier_stats():
+    total = mode_stats["local"] + mode_stats["fallback"]
+    result = {"mode": MODE_CLASSIFIER, **mode_stats, "local_ratio": round(mode_stats["local"] / total, 4) if total else 0.0}
+    if MODE_CLASSIFIER == "shadow":
+        compared, confident = shadow_stats["compared"], shadow_stats["confident"]
+        result["shadow"] = {
+            **shadow_stats,
+            "agreement": round(shadow_stats["agreed"] / compared, 4) if compared else None,
+            "confident_agreement": round(shadow_stats["confident_agreed"] / confident, 4) if confident else None,
         }
-        for log in logs
-    ]
-    return {"logs": result}
+    return result
+
+
+@router.get("/tts/cache/stats")
+def tts_cache_stats():
+    return tts_cache.stats()
+
+
+@router.get("/audio-store/stats")
+def audio_store_stats():
+    return audio_store.stats()
+
+
+@router.get("/generate-question/prefetch/stats")
+def question_prefetch_stats():
+    return question_prefetcher.stats()
+
+
+# 대화 기록 페이지 크기
+CHAT_HISTORY_DEFAULT_LIMIT = int(os.getenv("CHAT_HISTORY_DEFAULT_LIMIT", "50"))
+CHAT_HISTORY_MAX_LIMIT = int(os.getenv("CHAT_HISTORY_MAX_LIMIT", "200"))
+CHAT_HISTORY_EXPORT_BATCH = 500
+
+# 필요한 컬럼만 조회 (ORM 객체 생성 없음)
+_history_columns = (
+    ConversationLog.id,
+    ConversationLog.user_input,
+    ConversationLog.response,
+    ConversationLog.mode,
+    ConversationLog.audio_url,
+    ConversationLog.created_at,
+)
+
+
+def encode_cursor(created_at: datetime, log_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{log_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    created_at, log_id = raw.rsplit("|", 1)
+    return datetime.fromisoformat(created_at), int(log_id)
+
+
+def _keyset(created_at: datetime, log_id: int, older: bool):
+    # (created_at, id) 보다 이전/이후 → 행 값 비교라 (diary_id, created_at, id) 인덱스 범위 스캔
+    key = tuple_(ConversationLog.created_at, ConversationLog.id)
+    return key < (created_at, log_id) if older else key > (created_at, log_id)
+
+
+def _row_to_log(row):
+    return {
+        "id": row.id,
+        "user_input": row.user_input,
+        "response": row.response,
+        "mode": row.mode,
+        "audio_url": row.audio_url,
+        "created_at": row.created_at.isoformat()
+    }
+
+
+def fetch_chat_page(db: Session, diary_id: int, limit: int = None, before: str = None, after: str = None):
+    """before: 더 이전 기록, after: 더 새로운 기록, 둘 다 없으면 최신 limit개 (limit이 None이면 전체). 결과는 항상 시간순"""
+    query = db.query(*_history_columns).filter(ConversationLog.diary_id == diary_id)
+    older = after is None
+    if before is not None:
+        query = query.filter(_keyset(*decode_cursor(before), older=True))
+    elif after is not None:
+        query = query.filter(_keyset(*decode_cursor(after), older=False))
+
+    if older:
+        query = query.order_by(ConversationLog.created_at.desc(), ConversationLog.id.desc())
+    else:
+        query = query.order_by(ConversationLog.created_at, ConversationLog.id)
+
+    if limit is None:
+        rows, has_more = query.all(), False
+    else:
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+    if older:
+        rows.reverse()
+
+    return {
+        "logs": [_row_to_log(row) for row in rows],
+        "has_more": has_more,
+        # 이 페이지의 가장 오래된 / 가장 새로운 기록 커서
+        "before": encode_cursor(rows[0].created_at, rows[0].id) if rows else before,
+        "after": encode_cursor(rows[-1].created_at, rows[-1].id) if rows else after,
+    }
+
+
+def export_chat_history(diary_id: int):
+    """전체 기록을 시간순 NDJSON 줄로 (키셋으로 배치 조회, 응답 중에는 별도 DB 세션 사용)"""
+    db = SessionLocal()
+    try:
+        cursor = None
+        while True:
+            query = db.query(*_history_columns).filter(ConversationLog.diary_id == diary_id)
+            if cursor is not None:
+                query = query.filter(_keyset(*cursor, older=False))
+            rows = (
+                query.order_by(ConversationLog.created_at, ConversationLog.id)
+                .limit(CHAT_HISTORY_EXPORT_BATCH)
+                .all()
+            )
+            for row in rows:
+                yield json.dumps(_row_to_log(row), ensure_ascii=False) + "\n"
+            if len(rows) < CHAT_HISTORY_EXPORT_BATCH:
+                break
+            cursor = (rows[-1].created_at, rows[-1].id)
+    finally:
+        db.close()
+
+
+# 대화 기록 조회 (키셋 페이지네이션: limit + before/after 커서, format=ndjson이면 전체 내보내기 스트리밍)
+# limit / before / after가 모두 없으면 이전 클라이언트를 위해 전체 기록을 한 번에 반환
+@router.get("/chat-history")
+def get_chat_history(
+    diary_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=CHAT_HISTORY_MAX_LIMIT),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: Session = Depends(get_db)
+):
+    if format == "ndjson":
+        return StreamingResponse(
+            export_chat_history(diary_id),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="chat-history-{diary_id}.ndjson"'},
+        )
+
+    if before is not None and after is not None:
+        return JSONResponse(status_code=400, content={"error": "before와 after는 함께 쓸 수 없습니다."})
+    if limit is None and (before is not None or after is not None):
+        limit = CHAT_HISTORY_DEFAULT_LIMIT
+    try:
+        return fetch_chat_page(db, diary_id, limit, before, after)
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "잘못된 커서입니다."})
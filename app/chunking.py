@@ -0,0 +1,95 @@
+# app/chunking.py
+# 긴 일기를 문장 단위로 겹치게 나누고, 조각별 확률을 하나의 분포로 합침
+#
+# 조각 경계는 (1) 토큰 수 상한, (2) 문장 해시 기반 경계 중 먼저 오는 쪽에서 정해짐.
+# (2) 덕분에 일기 중간을 고쳐도 뒤쪽 조각 경계가 다시 맞춰져서 바뀐 조각만 다시 추론하면 됨.
+
+import hashlib
+import os
+import re
+
+CHUNK_MAX_TOKENS = int(os.getenv("EMOTION_CHUNK_MAX_TOKENS", "256"))
+CHUNK_MIN_TOKENS = int(os.getenv("EMOTION_CHUNK_MIN_TOKENS", "64"))
+CHUNK_OVERLAP_SENTENCES = int(os.getenv("EMOTION_CHUNK_OVERLAP_SENTENCES", "1"))
+CHUNK_BOUNDARY_MOD = int(os.getenv("EMOTION_CHUNK_BOUNDARY_MOD", "4"))
+
+# 문장 끝: 마침표/물음표/느낌표/말줄임표(연속 포함) 뒤 공백, 또는 줄바꿈
+_sentence_end = re.compile(r"(?<=[.!?…。])\s+|\n+")
+
+
+def split_sentences(text: str):
+    return [s.strip() for s in _sentence_end.split(text) if s and s.strip()]
+
+
+def _is_boundary(sentence: str) -> bool:
+    digest = hashlib.md5(sentence.encode("utf-8")).digest()
+    return digest[0] % CHUNK_BOUNDARY_MOD == 0
+
+
+# 한 문장이 상한보다 길면 어절 단위로 자름
+def _split_long(sentence: str, count_tokens, max_tokens: int):
+    pieces, words, size = [], [], 0
+    for word in sentence.split():
+        n = count_tokens(word)
+        if words and size + n > max_tokens:
+            pieces.append(" ".join(words))
+            words, size = [], 0
+        words.append(word)
+        size += n
+    if words:
+        pieces.append(" ".join(words))
+    return pieces
+
+
+def make_chunks(text: str, count_tokens, max_tokens: int = CHUNK_MAX_TOKENS,
+                min_tokens: int = CHUNK_MIN_TOKENS, overlap: int = CHUNK_OVERLAP_SENTENCES):
+    """문장 경계에 맞춘 조각 목록 [(조각 텍스트, 토큰 수)]"""
+    sentences = []
+    for sentence in split_sentences(text):
+        n = count_tokens(sentence)
+        if n > max_tokens:
+            sentences.extend((p, count_tokens(p)) for p in _split_long(sentence, count_tokens, max_tokens))
+        else:
+            sentences.append((sentence, n))
+
+    if not sentences:
+        return [(text, count_tokens(text))]
+
+    chunks = []
+    current = []
+    size = 0
+    for i, (sentence, n) in enumerate(sentences):
+        if current and size + n > max_tokens:
+            chunks.append(current)
+            # 앞 조각 마지막 문장을 겹쳐서 문맥 유지 (겹친 부분만으로 상한을 넘지 않게)
+            current = [s for s in current[-overlap:] if overlap > 0]
+            size = sum(c for _, c in current)
+            if size + n > max_tokens:
+                current, size = [], 0
+        current.append((sentence, n))
+        size += n
+
+        last = i == len(sentences) - 1
+        if not last and size >= min_tokens and _is_boundary(sentence):
+            chunks.append(current)
+            current = [s for s in current[-overlap:] if overlap > 0]
+            size = sum(c for _, c in current)
+
+    # 마지막 문장에서는 경계를 끊지 않으므로 current에는 항상 새 문장이 남아 있음
+    chunks.append(current)
+
+    return [(" ".join(s for s, _ in chunk), sum(c for _, c in chunk)) for chunk in chunks]
+
+
+def aggregate_probs(chunk_probs, weights):
+    """조각 확률을 토큰 수 가중 평균으로 합침 (가중치가 모두 0이면, 예: 빈 일기, 단순 평균)"""
+    total = float(sum(weights))
+    if total <= 0:
+        weights = [1.0] * len(chunk_probs)
+        total = float(len(chunk_probs))
+    size = len(chunk_probs[0])
+    merged = [0.0] * size
+    for probs, w in zip(chunk_probs, weights):
+        for i in range(size):
+            merged[i] += probs[i] * w
+    return [p / total for p in merged]
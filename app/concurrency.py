@@ -0,0 +1,52 @@
+# app/concurrency.py
+# 음성 파이프라인의 블로킹 호출(ffmpeg, STT, GPT, TTS, DB)을 전용 스레드풀로 넘겨서
+# 이벤트 루프를 막지 않게 하고, 단계별로 동시 실행 수를 제한
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+EXECUTOR_THREADS = int(os.getenv("VOICE_EXECUTOR_THREADS", "64"))
+
+# 단계별 최대 동시 실행 수
+STAGE_LIMITS = {
+    "io": int(os.getenv("VOICE_IO_CONCURRENCY", "16")),
+    "ffmpeg": int(os.getenv("VOICE_FFMPEG_CONCURRENCY", str(os.cpu_count() or 2))),
+    "stt": int(os.getenv("VOICE_STT_CONCURRENCY", "16")),
+    "gpt": int(os.getenv("VOICE_GPT_CONCURRENCY", "32")),
+    "tts": int(os.getenv("VOICE_TTS_CONCURRENCY", "16")),
+    "db": int(os.getenv("VOICE_DB_CONCURRENCY", "8")),
+}
+
+_executor = ThreadPoolExecutor(max_workers=EXECUTOR_THREADS, thread_name_prefix="voice")
+_semaphores = {}
+
+
+def _semaphore(stage: str) -> asyncio.Semaphore:
+    sem = _semaphores.get(stage)
+    if sem is None:
+        sem = _semaphores[stage] = asyncio.Semaphore(STAGE_LIMITS[stage])
+    return sem
+
+
+async def run_blocking(stage: str, fn, *args, **kwargs):
+    """stage 동시 실행 제한 안에서 fn을 스레드풀에서 실행하고 결과를 await"""
+    async with _semaphore(stage):
+        loop = asyncio.get_running_loop()
+        # contextvars(요청별 계측 span 등)를 스레드로 넘김
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(_executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+def stage_usage():
+    """단계별 현재 사용 중인 슬롯 수"""
+    return {
+        stage: STAGE_LIMITS[stage] - sem._value
+        for stage, sem in _semaphores.items()
+    }
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,138 @@
+# app/content_db.py
+# 추천 콘텐츠 DB(emotion.db) 읽기 전용 연결: 스레드마다 연결 하나를 재사용 (PRAGMA query_only + mmap)
+# 콘텐츠 4종 추천을 UNION ALL 한 문장으로 조회 (메모리 카탈로그를 쓰지 않을 때 / 카탈로그 로딩 시)
+
+import os
+import random
+import sqlite3
+import threading
+
+from utils.content_sampler import content_sampler
+from utils.db_utils import has_content_emotions
+
+CONTENT_TYPES = {
+    "books": "thumbnail_url",
+    "movies": "poster_url",
+    "music": "thumbnail_url",
+    "quotes": None,
+}
+RESULT_LIMIT = 5
+MMAP_SIZE = int(os.getenv("RECOMMEND_DB_MMAP_MB", "64")) * 1024 * 1024
+CACHE_KB = int(os.getenv("RECOMMEND_DB_CACHE_KB", "8192"))
+
+_local = threading.local()
+
+
+class _Connection:
+    __slots__ = ("conn", "inode", "mtime", "normalized")
+
+    def __init__(self, db_path: str, inode: int):
+        # 읽기 전용으로 열어 파일이 없을 때 빈 DB를 만들지 않음
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        self.conn.execute("PRAGMA query_only = 1")
+        self.conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        self.conn.execute(f"PRAGMA cache_size = -{CACHE_KB}")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        self.inode = inode
+        self.mtime = None
+        self.normalized = False
+
+
+def _entry(db_path: str) -> _Connection:
+    conns = getattr(_local, "conns", None)
+    # fork로 물려받은 연결(다른 pid에서 연 것)은 쓰지 않고 새로 연결
+    if conns is None or _local.pid != os.getpid():
+        conns = _local.conns = {}
+        _local.pid = os.getpid()
+    st = os.stat(db_path)
+    entry = conns.get(db_path)
+    # 파일이 교체되면 다시 연결
+    if entry is None or entry.inode != st.st_ino:
+        if entry is not None:
+            entry.conn.close()
+        entry = conns[db_path] = _Connection(db_path, st.st_ino)
+    # 파일이 바뀌면 (마이그레이션 등) content_emotions 유무 다시 확인
+    if entry.mtime != st.st_mtime_ns:
+        entry.normalized = has_content_emotions(entry.conn)
+        entry.mtime = st.st_mtime_ns
+    return entry
+
+
+def connection(db_path: str) -> sqlite3.Connection:
+    """현재 스레드의 연결"""
+    return _entry(db_path).conn
+
+
+def close():
+    """현재 스레드의 연결을 모두 닫음 (gunicorn 마스터가 워커 fork 전에 호출)"""
+    conns = getattr(_local, "conns", None)
+    if conns and _local.pid == os.getpid():
+        for entry in conns.values():
+            entry.conn.close()
+    _local.conns = None
+
+
+def _select_fields(alias: str, content_type: str) -> str:
+    image_field = CONTENT_TYPES[content_type]
+    image = f"{alias}.{image_field}" if image_field else "NULL"
+    return f"'{content_type}', {alias}.title, {alias}.url, {alias}.emotion_tags, {image}"
+
+
+def _recommend_sql(by_emotion: bool, normalized: bool) -> str:
+    parts = []
+    for content_type in CONTENT_TYPES:
+        fields = _select_fields("c", content_type)
+        if not by_emotion:
+            # 무작위 id는 content_sampler에서 미리 뽑음 (모자라면 NULL로 채워 문장 모양을 고정)
+            placeholders = ", ".join(f":{content_type}_{i}" for i in range(RESULT_LIMIT))
+            inner = f"SELECT {fields} FROM {content_type} c WHERE c.id IN ({placeholders})"
+        elif normalized:
+            # (content_type, emotion, content_id) 인덱스 순서 그대로 최신 항목부터
+            inner = (
+                f"SELECT {fields} FROM content_emotions ce JOIN {content_type} c ON c.id = ce.content_id "
+                f"WHERE ce.content_type = '{content_type}' AND ce.emotion = :emotion "
+                f"ORDER BY ce.content_id DESC LIMIT {RESULT_LIMIT}"
+            )
+        else:
+            inner = (
+                f"SELECT {fields} FROM {content_type} c WHERE c.emotion_tags LIKE '%' || :emotion || '%' "
+                f"ORDER BY c.id DESC LIMIT {RESULT_LIMIT}"
+            )
+        parts.append(f"SELECT * FROM ({inner})")
+    return "\nUNION ALL\n".join(parts)
+
+
+# (감정 여부, 정규화 여부) → SQL (sqlite3 문장 캐시가 준비된 문장을 재사용)
+_RECOMMEND_SQL = {
+    (by_emotion, normalized): _recommend_sql(by_emotion, normalized)
+    for by_emotion in (True, False)
+    for normalized in (True, False)
+}
+
+
+def _sample_params(db_path: str, seed=None):
+    sampler = content_sampler(db_path)
+    rng = random.Random(seed) if seed is not None else None
+    params = {}
+    for content_type in CONTENT_TYPES:
+        ids = sampler.sample(content_type, RESULT_LIMIT, rng=rng)
+        for i in range(RESULT_LIMIT):
+            params[f"{content_type}_{i}"] = ids[i] if i < len(ids) else None
+    return params
+
+
+def fetch_recommendations(db_path: str, emotion: str = None, seed=None):
+    """{"books": [...], "movies": [...], "music": [...], "quotes": [...]} (get_recommendations와 같은 항목 형식)
+    감정이 없으면 무작위 (seed를 주면 같은 결과)"""
+    entry = _entry(db_path)
+    sql = _RECOMMEND_SQL[(bool(emotion), entry.normalized)]
+    params = {"emotion": emotion} if emotion else _sample_params(db_path, seed)
+    rows = entry.conn.execute(sql, params).fetchall()
+    result = {content_type: [] for content_type in CONTENT_TYPES}
+    for content_type, title, url, tags, image in rows:
+        item = {"title": title, "url": url, "emotion_tags": tags}
+        if CONTENT_TYPES[content_type]:
+            item["image"] = image
+        result[content_type].append(item)
+    return result
+
@@ -0,0 +1,200 @@
+# app/conversation_memory.py
+# 서버 측 대화 기억: ConversationLog에서 기록을 읽어 토큰 예산 안의 최근 턴 + 이전 대화 요약만 프롬프트에 넣음
+# 요약은 일기별로 conversation_summaries 테이블에 저장하고, 턴 저장 후 백그라운드에서 갱신
+
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import text as sql_text
+from sqlalchemy.orm import Session
+
+from app.model import ConversationLog, ConversationSummary
+from app.startup import LazyResource
+
+RECENT_TURNS = int(os.getenv("CONVERSATION_RECENT_TURNS", "6"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("CONVERSATION_HISTORY_TOKENS", "1200"))
+SUMMARY_MAX_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", "300"))
+
+
+def _load_encoder():
+    try:
+        import tiktoken
+    except ImportError:
+        print("tiktoken 없음: 토큰 수를 글자 수로 추정")
+        return None
+    return tiktoken.get_encoding("o200k_base")
+
+
+_encoder = LazyResource("tiktoken_encoder", _load_encoder)
+
+
+def count_tokens(text: str) -> int:
+    encoder = _encoder.get()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    # 추정: 한글 등 비 ASCII 문자는 글자당 1토큰, ASCII는 4글자당 1토큰
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return (len(text) - ascii_chars) + (ascii_chars + 3) // 4
+
+
+def clip_to_tokens(text: str, limit: int) -> str:
+    encoder = _encoder.get()
+    if encoder is not None:
+        tokens = encoder.encode(text)
+        return text if len(tokens) <= limit else encoder.decode(tokens[:limit]) + "…"
+    return text if count_tokens(text) <= limit else text[:limit] + "…"
+
+
+def messages_tokens(messages) -> int:
+    # 메시지당 역할/구분자 몇 토큰 포함
+    return sum(count_tokens(m["content"]) + 4 for m in messages)
+
+
+def _turn_tokens(turn) -> int:
+    return count_tokens(turn["user_input"] or "") + count_tokens(turn["response"] or "") + 8
+
+
+@dataclass
+class ConversationContext:
+    summary: str = None
+    turns: list = field(default_factory=list)   # [{"user_input", "response", "mode"}] 오래된 순
+    source: str = "server"                      # server | client
+    pending_summary: int = 0                    # 최근 턴 밖인데 아직 요약에 반영 안 된 턴 수
+
+    @property
+    def last_mode(self):
+        return self.turns[-1].get("mode", "F") if self.turns else "F"
+
+
+def select_recent(turns, budget: int = HISTORY_TOKEN_BUDGET, max_turns: int = RECENT_TURNS):
+    """최신 턴부터 max_turns개, 토큰 예산 안에서만 선택 (가장 최근 턴은 잘라서라도 포함)"""
+    selected = []
+    used = 0
+    for turn in reversed(turns[-max_turns:] if max_turns > 0 else []):
+        tokens = _turn_tokens(turn)
+        if used + tokens > budget:
+            if not selected:
+                half = max(budget // 2, 1)
+                selected.append({
+                    **turn,
+                    "user_input": clip_to_tokens(turn["user_input"] or "", half),
+                    "response": clip_to_tokens(turn["response"] or "", half),
+                })
+            break
+        selected.append(turn)
+        used += tokens
+    selected.reverse()
+    return selected
+
+
+def _log_to_turn(log: ConversationLog):
+    return {"id": log.id, "user_input": log.user_input, "response": log.response, "mode": log.mode}
+
+
+def _turn_logs(db: Session, diary_id: int, after_id: int):
+    """after_id 이후의 대화 턴 (첫 질문 기록은 user_input이 일기 전문이므로 제외)"""
+    return (
+        db.query(ConversationLog)
+        .filter(
+            ConversationLog.diary_id == diary_id,
+            ConversationLog.id > after_id,
+            ConversationLog.kind.is_distinct_from("question"),
+        )
+        .order_by(ConversationLog.id)
+        .all()
+    )
+
+
+def backfill_log_kinds(engine):
+    """kind 컬럼이 생기기 전 기록: user_input이 일기 내용과 같으면 첫 질문, 나머지는 턴"""
+    with engine.begin() as conn:
+        conn.execute(sql_text(
+            "UPDATE conversation_logs SET kind = CASE WHEN user_input = "
+            "(SELECT content FROM diaries WHERE diaries.id = conversation_logs.diary_id) "
+            "THEN 'question' ELSE 'turn' END WHERE kind IS NULL"
+        ))
+
+
+def load_context(db: Session, diary_id: int, client_history=None) -> ConversationContext:
+    """요약 이후의 서버 기록으로 문맥 구성. 서버 기록이 없을 때만 클라이언트가 보낸 history 사용"""
+    summary = db.query(ConversationSummary).filter(ConversationSummary.diary_id == diary_id).first()
+    after_id = summary.last_log_id if summary else 0
+    logs = _turn_logs(db, diary_id, after_id)
+    if logs or summary:
+        turns, source = [_log_to_turn(log) for log in logs], "server"
+    else:
+        turns, source = [t for t in (client_history or []) if t.get("user_input") or t.get("response")], "client"
+
+    recent = select_recent(turns)
+    return ConversationContext(
+        summary=summary.summary if summary else None,
+        turns=recent,
+        source=source,
+        pending_summary=len(turns) - len(recent),
+    )
+
+
+def summarize_turns(previous_summary, turns, complete) -> str:
+    """이전 요약 + 새 턴들 → 새 요약. complete(messages, max_tokens) -> str 은 GPT 호출"""
+    lines = []
+    for turn in turns:
+        lines.append(f"사용자: {clip_to_tokens(turn['user_input'] or '', 400)}")
+        lines.append(f"챗봇: {turn['response'] or ''}")
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "당신은 상담 대화를 요약하는 도우미입니다.\n"
+                "이전 요약과 새 대화를 합쳐, 이후 상담에 필요한 사용자의 상황, 감정, 고민, 이미 나눈 조언을 "
+                "5문장 이내의 한국어로 요약하세요."
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"이전 요약:\n{previous_summary or '(없음)'}\n\n새 대화:\n" + "\n".join(lines),
+        },
+    ]
+    return complete(messages, SUMMARY_MAX_TOKENS)
+
+
+_refresh_locks = {}
+_refresh_locks_guard = threading.Lock()
+
+
+def _diary_lock(diary_id: int):
+    with _refresh_locks_guard:
+        return _refresh_locks.setdefault(diary_id, threading.Lock())
+
+
+def refresh_summary(session_factory, diary_id: int, complete) -> bool:
+    """프롬프트에서 빠지는 오래된 턴 중 아직 요약에 없는 턴을 요약에 합침. 갱신했으면 True"""
+    lock = _diary_lock(diary_id)
+    if not lock.acquire(blocking=False):
+        return False  # 같은 일기 요약이 이미 진행 중
+    db = session_factory()
+    try:
+        summary = db.query(ConversationSummary).filter(ConversationSummary.diary_id == diary_id).first()
+        after_id = summary.last_log_id if summary else 0
+        logs = _turn_logs(db, diary_id, after_id)
+        turns = [_log_to_turn(log) for log in logs]
+        # 프롬프트에 들어가는 최근 턴(select_recent)을 뺀 앞부분만 요약 대상
+        old = logs[:len(logs) - len(select_recent(turns))]
+        if not old:
+            return False
+
+        text = summarize_turns(summary.summary if summary else None, turns[:len(old)], complete)
+        if summary is None:
+            summary = ConversationSummary(diary_id=diary_id)
+            db.add(summary)
+        summary.summary = text
+        summary.last_log_id = old[-1].id
+        summary.turn_count = (summary.turn_count or 0) + len(old)
+        summary.updated_at = datetime.utcnow()
+        db.commit()
+        print(f"📝 대화 요약 갱신: diary={diary_id} 요약된 턴 +{len(old)} ({count_tokens(text)} tokens)")
+        return True
+    finally:
+        db.close()
+        lock.release()
@@ -1,11 +1,13 @@
 # app/database.py
 
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-# SQLite DB 연결 설정
-DATABASE_URL = "sqlite:///./app/diary.db"
+# SQLite DB 연결 설정 (벤치마크 등은 DATABASE_URL로 임시 DB 사용)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app/diary.db")
 
 engine = create_engine(
     DATABASE_URL, connect_args={"check_same_thread": False}
@@ -13,3 +15,18 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
+
+
+# create_all은 기존 테이블에 컬럼을 추가하지 않으므로 빠진 컬럼만 ALTER TABLE
+def add_missing_columns(table: str, columns: dict):
+    existing = {c["name"] for c in inspect(engine).get_columns(table)}
+    with engine.begin() as conn:
+        for name, ddl in columns.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+# create_all은 이미 있는 테이블에 새 인덱스를 만들지 않으므로 빠진 인덱스만 생성
+def add_missing_indexes(table):
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
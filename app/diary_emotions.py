@@ -0,0 +1,34 @@
+# app/diary_emotions.py
+# 일기별 전체 감정 확률 저장 / 재임계값 적용 (모델 재실행 없이)
+
+import os
+import struct
+
+from app.emotion import label_map, probs_to_results
+from app.model import DiaryEmotion
+
+# diary_emotions 테이블에 남길 최소 확률 (이 값 이상 조건 검색은 인덱스로 처리)
+INDEX_MIN_SCORE = float(os.getenv("DIARY_EMOTION_INDEX_MIN", "0.05"))
+
+
+# 확률 벡터 ↔ float16 바이트 (44개 × 2바이트 = 88바이트)
+def pack_probs(probs) -> bytes:
+    return struct.pack(f"<{len(probs)}e", *probs)
+
+
+def unpack_probs(blob: bytes):
+    return list(struct.unpack(f"<{len(blob) // 2}e", blob))
+
+
+def set_diary_emotions(diary, probs):
+    """확률 벡터와 라벨 행을 함께 갱신 (호출한 쪽에서 commit)"""
+    diary.probs = pack_probs(probs)
+    diary.emotions = [
+        DiaryEmotion(label=label_map[i], score=round(p, 4))
+        for i, p in enumerate(probs)
+        if p >= INDEX_MIN_SCORE
+    ]
+
+
+def rethreshold(blob: bytes, threshold: float = 0.3):
+    return probs_to_results(unpack_probs(blob), threshold)
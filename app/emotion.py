@@ -1,12 +1,76 @@
 # app/emotion.py
 
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
-import torch.nn.functional as F
+import os
+
+from app.startup import LazyResource
+from app.emotion_backends import MODEL_NAME as model_name, BACKEND, load_backend, load_tokenizer
+
+# 추론 백엔드(torch / onnx)는 첫 추론(또는 워밍업) 때 로딩
+_emotion_model = LazyResource("emotion_model", load_backend)
+# 프로세스 풀 모드에서는 모델 없이 토크나이저만 필요 (긴 일기 조각 나누기)
+_emotion_tokenizer = LazyResource("emotion_tokenizer", load_tokenizer)
+
+
+def get_model():
+    return _emotion_model.get()
+
+
+def is_model_loaded() -> bool:
+    return _emotion_model.loaded
+
+
+def get_tokenizer():
+    if is_model_loaded():
+        return get_model().tokenizer
+    return _emotion_tokenizer.get()
+
+
+def count_tokens(text: str) -> int:
+    return len(get_tokenizer()(text, add_special_tokens=False)["input_ids"])
+
+
+# 한 번의 forward로 처리할 수 있는 최대 토큰 수 (특수 토큰 포함)
+# model_max_length가 없거나 의미 없는 큰 값이면 EMOTION_MODEL_MAX_TOKENS 사용
+_DEFAULT_MAX_TOKENS = int(os.getenv("EMOTION_MODEL_MAX_TOKENS", "512"))
+
+
+def model_max_tokens() -> int:
+    limit = getattr(get_tokenizer(), "model_max_length", None)
+    if not isinstance(limit, int) or limit <= 0 or limit > 100_000:
+        return _DEFAULT_MAX_TOKENS
+    return limit
+
+
+def fits_single_pass(n_tokens: int) -> bool:
+    """특수 토큰을 더해도 모델 입력 길이 이하면 조각 없이 한 번에 추론"""
+    tokenizer = get_tokenizer()
+    special = tokenizer.num_special_tokens_to_add() if hasattr(tokenizer, "num_special_tokens_to_add") else 2
+    return n_tokens + special <= model_max_tokens()
+
+
+# 허브 캐시에 받아둔 모델 커밋 해시 (모델을 로딩하지 않고 확인)
+def _cached_commit_hash():
+    try:
+        from huggingface_hub.constants import HF_HUB_CACHE
+    except ImportError:
+        return None
+    ref = os.path.join(HF_HUB_CACHE, "models--" + model_name.replace("/", "--"), "refs", "main")
+    try:
+        with open(ref) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+# 캐시 무효화 기준이 되는 모델 버전 (환경변수 > 로딩된 모델 > 허브 캐시)
+# 백엔드마다 출력이 미세하게 달라서 torch 외에는 백엔드 이름을 붙임
+def model_version() -> str:
+    version = os.getenv("EMOTION_MODEL_VERSION")
+    if not version and is_model_loaded():
+        version = get_model().commit_hash
+    version = version or _cached_commit_hash() or "unknown"
+    return version if BACKEND == "torch" else f"{version}+{BACKEND}"
 
-model_name = "M1NJ1/Multimodal_Sentiment_Analysis"
-tokenizer = AutoTokenizer.from_pretrained(model_name, trust_remote_code=True)
-model = AutoModelForSequenceClassification.from_pretrained(model_name, trust_remote_code=True)
 
 label_map = {
     0: "갈망", 1: "감사", 2: "걱정", 3: "공감", 4: "공포", 5: "괴로움",
@@ -19,19 +83,23 @@ label_map = {
     42: "좌절", 43: "흥미"
 }
 
+# 감정 이름 → 확률 벡터 인덱스
+label_index = {label: i for i, label in label_map.items()}
+
+
+# 여러 문장을 한 번에 패딩해서 모델에 통과시키고 문장별 확률 벡터 반환
+def predict_probs_batch(texts):
+    return get_model().predict_probs(texts)
 
-def predict_emotion(text: str, threshold: float = 0.3):
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    with torch.no_grad():
-        outputs = model(**inputs)
-        probs = F.softmax(outputs.logits, dim=-1)[0]  # shape: (num_labels,)
 
+# 확률 벡터 → threshold 이상인 감정 목록
+def probs_to_results(probs, threshold: float = 0.3):
     results = []
     for i, p in enumerate(probs):
-        if p.item() >= threshold:
+        if p >= threshold:
             results.append({
                 "label": label_map[i],
-                "confidence": round(p.item(), 4)
+                "confidence": round(p, 4)
             })
 
     # 내림차순 정렬
@@ -45,3 +113,8 @@ def predict_emotion(text: str, threshold: float = 0.3):
         }]
 
     return results
+
+
+def predict_emotion(text: str, threshold: float = 0.3):
+    probs = predict_probs_batch([text])[0]
+    return probs_to_results(probs, threshold)
@@ -0,0 +1,133 @@
+# app/emotion_backends.py
+# 감정 분류 추론 백엔드: PyTorch(fp32) / ONNX Runtime(int8 동적 양자화)
+# EMOTION_BACKEND 환경변수로 선택 (기본값 torch)
+
+import os
+
+MODEL_NAME = "M1NJ1/Multimodal_Sentiment_Analysis"
+BACKEND = os.getenv("EMOTION_BACKEND", "torch")
+ONNX_DIR = os.getenv("EMOTION_ONNX_DIR", os.path.join("models", "emotion_onnx"))
+ONNX_FILE = "model.int8.onnx"
+
+
+def load_tokenizer():
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(MODEL_NAME, trust_remote_code=True)
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self):
+        from transformers import AutoModelForSequenceClassification
+
+        self.tokenizer = load_tokenizer()
+        self.model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME, trust_remote_code=True)
+        self.model.eval()
+        self.commit_hash = getattr(self.model.config, "_commit_hash", None)
+
+    def predict_probs(self, texts):
+        import torch
+        import torch.nn.functional as F
+
+        inputs = self.tokenizer(texts, return_tensors="pt", truncation=True, padding=True)
+        with torch.no_grad():
+            outputs = self.model(**inputs)
+            probs = F.softmax(outputs.logits, dim=-1)  # shape: (batch, num_labels)
+        return probs.tolist()
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, onnx_dir: str = ONNX_DIR):
+        import onnxruntime as ort
+
+        path = os.path.join(onnx_dir, ONNX_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"ONNX 모델이 없습니다: {path} (python scripts/emotion_onnx.py export 로 먼저 생성하세요)"
+            )
+
+        self.tokenizer = load_tokenizer()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("EMOTION_ONNX_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+        # export 시 기록한 원본 모델 커밋 해시
+        commit_path = os.path.join(onnx_dir, "commit_hash")
+        self.commit_hash = None
+        if os.path.exists(commit_path):
+            with open(commit_path) as f:
+                self.commit_hash = f.read().strip() or None
+
+    def predict_probs(self, texts):
+        import numpy as np
+
+        inputs = self.tokenizer(texts, return_tensors="np", truncation=True, padding=True)
+        feed = {name: inputs[name].astype(np.int64) for name in self.input_names}
+        logits = self.session.run(None, feed)[0]
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return (exp / exp.sum(axis=-1, keepdims=True)).tolist()
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "onnx": OnnxBackend,
+}
+
+
+def load_backend(name: str = BACKEND):
+    if name not in BACKENDS:
+        raise ValueError(f"지원하지 않는 EMOTION_BACKEND: {name} (torch, onnx 중 선택)")
+    return BACKENDS[name]()
+
+
+def export_onnx(output_dir: str = ONNX_DIR, quantize: bool = True, opset: int = 17):
+    """torch 모델을 ONNX로 내보내고 int8 동적 양자화 → output_dir/model.int8.onnx"""
+    import torch
+
+    backend = TorchBackend()
+    os.makedirs(output_dir, exist_ok=True)
+
+    sample = backend.tokenizer(["오늘은 정말 행복한 하루였다."], return_tensors="pt")
+    input_names = list(sample.keys())
+
+    # 토크나이저 출력 순서대로 받아서 logits만 반환하는 래퍼
+    class _LogitsOnly(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *tensors):
+            return self.model(**dict(zip(input_names, tensors))).logits
+
+    fp32_path = os.path.join(output_dir, "model.fp32.onnx")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+    torch.onnx.export(
+        _LogitsOnly(backend.model),
+        tuple(sample[name] for name in input_names),
+        fp32_path,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=opset,
+    )
+
+    out_path = os.path.join(output_dir, ONNX_FILE)
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, out_path, weight_type=QuantType.QInt8)
+    else:
+        os.replace(fp32_path, out_path)
+
+    with open(os.path.join(output_dir, "commit_hash"), "w") as f:
+        f.write(backend.commit_hash or "")
+
+    return out_path
@@ -0,0 +1,325 @@
+# app/emotion_cache.py
+# 감정 추론 결과 캐시: 1차 프로세스 내 LRU(크기/TTL 제한) + 2차 SQLite 디스크 캐시(워커 간 공유)
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from app.batcher import emotion_batcher
+from app.chunking import aggregate_probs, make_chunks
+from app.concurrency import run_blocking
+from app.emotion import count_tokens, fits_single_pass, model_name, model_version, probs_to_results
+
+MEMORY_MAX_SIZE = int(os.getenv("EMOTION_CACHE_MAX_SIZE", "2048"))
+MEMORY_TTL = float(os.getenv("EMOTION_CACHE_TTL_SECONDS", "3600"))
+DISK_TTL = float(os.getenv("EMOTION_CACHE_DISK_TTL_SECONDS", str(7 * 24 * 3600)))
+DISK_PATH = os.getenv("EMOTION_CACHE_DB_PATH", os.path.join("app", "emotion_cache.db"))
+
+_whitespace = re.compile(r"\s+")
+
+
+# 공백/유니코드 정규화 → 사실상 같은 일기는 같은 키
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFC", text)
+    return _whitespace.sub(" ", text).strip()
+
+
+def make_key(text: str, name: str, version: str, threshold: float) -> str:
+    raw = "\x00".join([name, version, f"{threshold:.4f}", normalize_text(text)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# 조각 캐시는 확률 벡터를 저장하므로 threshold와 무관
+def make_chunk_key(chunk: str, name: str, version: str) -> str:
+    raw = "\x00".join([name, version, "chunk", normalize_text(chunk)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """크기와 TTL 제한이 있는 스레드 안전 LRU"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DiskCache:
+    """uvicorn 워커들이 함께 쓰는 SQLite 캐시 (프로세스 + 스레드별 커넥션)"""
+
+    def __init__(self, path: str, ttl: float, version: str, table: str = "emotion_cache"):
+        self.path = path
+        self.ttl = ttl
+        self.version = version
+        self.table = table
+        self._local = threading.local()
+        self._init_schema()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        # fork로 물려받은 커넥션(다른 pid에서 연 것)은 쓰지 않고 새로 연결
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        """현재 스레드의 커넥션 닫기 (gunicorn 마스터가 워커 fork 전에 호출)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+    def _init_schema(self):
+        conn = self._conn()
+        meta_key = f"{self.table}:model_version"
+        with conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (k TEXT PRIMARY KEY, v TEXT)")
+            row = conn.execute("SELECT v FROM cache_meta WHERE k = ?", (meta_key,)).fetchone()
+            # 모델 버전이 바뀌었으면 이전 결과 전부 폐기
+            if row is None or row[0] != self.version:
+                conn.execute(f"DELETE FROM {self.table}")
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_meta (k, v) VALUES (?, ?)",
+                    (meta_key, self.version),
+                )
+
+    def get(self, key):
+        row = self._conn().execute(
+            f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if created_at + self.ttl < time.time():
+            return None
+        return json.loads(value)
+
+    def put(self, key, value):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time()),
+            )
+
+    def prune(self):
+        conn = self._conn()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - self.ttl,))
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+
+class EmotionCache:
+    def __init__(self, memory: LRUCache, disk=None, name: str = model_name, version: str = None):
+        self.memory = memory
+        self.disk = disk
+        self.name = name
+        self.version = version or model_version()
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _count(self, field):
+        with self._lock:
+            self.counters[field] += 1
+
+    def key(self, text: str, threshold: float) -> str:
+        return make_key(text, self.name, self.version, threshold)
+
+    def chunk_key(self, chunk: str) -> str:
+        return make_chunk_key(chunk, self.name, self.version)
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except sqlite3.Error as e:
+                print("감정 캐시 조회 오류:", e)
+                value = None
+            if value is not None:
+                self._count("disk_hits")
+                self.memory.put(key, value)
+                return value
+        self._count("misses")
+        return None
+
+    def put(self, key, value):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, value)
+            except sqlite3.Error as e:
+                print("감정 캐시 저장 오류:", e)
+
+    def invalidate(self, version: str = None):
+        """모델 교체 시 호출: 버전 갱신 후 두 계층 모두 비움"""
+        if version is not None:
+            self.version = version
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.version = self.version
+            self.disk.clear()
+            self.disk._init_schema()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = sum(counters.values())
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        return {
+            **counters,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_size": len(self.memory),
+            "model_version": self.version,
+        }
+
+
+def _build_cache(table: str):
+    version = model_version()
+    disk = None
+    if DISK_PATH:
+        try:
+            disk = DiskCache(DISK_PATH, DISK_TTL, version, table)
+            disk.prune()
+        except sqlite3.Error as e:
+            print("디스크 감정 캐시 비활성화:", e)
+    return EmotionCache(LRUCache(MEMORY_MAX_SIZE, MEMORY_TTL), disk, model_name, version)
+
+
+# 전체 텍스트 → 감정 결과
+emotion_cache = _build_cache("emotion_cache")
+# 긴 일기 조각 해시 → 확률 벡터 (수정 시 바뀐 조각만 다시 추론)
+chunk_cache = _build_cache("emotion_chunks")
+
+
+def _copy(results):
+    return [dict(r) for r in results]
+
+
+def _lookup_chunks(text: str):
+    # 모델 입력 길이 안에 들어가면 조각 없이 한 번에 추론 (조각 캐시도 쓰지 않음)
+    n_tokens = count_tokens(text)
+    if fits_single_pass(n_tokens):
+        return [(text, n_tokens)], [None], [None]
+    chunks = make_chunks(text, count_tokens)
+    keys = [chunk_cache.chunk_key(chunk) for chunk, _ in chunks]
+    probs = [chunk_cache.get(key) for key in keys]
+    return chunks, keys, probs
+
+
+def _finish_chunks(chunks, keys, probs, inferred):
+    for i, p in inferred.items():
+        probs[i] = p
+        if keys[i] is not None:
+            chunk_cache.put(keys[i], p)
+    merged = aggregate_probs(probs, [n for _, n in chunks])
+    return merged, {"chunks": len(chunks), "inferred": len(inferred)}
+
+
+# 긴 일기는 조각으로 나눠 캐시에 없는 조각만 추론 → (확률 벡터, 조각 통계)
+def predict_probs_chunked(text: str):
+    chunks, keys, probs = _lookup_chunks(text)
+    futures = {i: emotion_batcher.submit(chunks[i][0]) for i, p in enumerate(probs) if p is None}
+    return _finish_chunks(chunks, keys, probs, {i: f.result() for i, f in futures.items()})
+
+
+# 토큰화와 캐시(SQLite) 조회 / 저장은 스레드풀에서 (이벤트 루프를 막지 않게)
+async def predict_probs_chunked_async(text: str):
+    chunks, keys, probs = await run_blocking("db", _lookup_chunks, text)
+    futures = {
+        i: asyncio.wrap_future(emotion_batcher.submit(chunks[i][0]))
+        for i, p in enumerate(probs) if p is None
+    }
+    inferred = dict(zip(futures, await asyncio.gather(*futures.values())))
+    if not inferred:
+        return _finish_chunks(chunks, keys, probs, inferred)
+    return await run_blocking("db", _finish_chunks, chunks, keys, probs, inferred)
+
+
+# 캐시를 거친 감정 분석 (미스일 때만 조각 단위로 추론)
+def predict_emotion_cached(text: str, threshold: float = 0.3):
+    key = emotion_cache.key(text, threshold)
+    cached = emotion_cache.get(key)
+    if cached is not None:
+        return _copy(cached)
+    probs, _ = predict_probs_chunked(text)
+    results = probs_to_results(probs, threshold)
+    emotion_cache.put(key, results)
+    return _copy(results)
+
+
+async def predict_emotion_cached_async(text: str, threshold: float = 0.3):
+    key = emotion_cache.key(text, threshold)
+    cached = await run_blocking("db", emotion_cache.get, key)
+    if cached is not None:
+        return _copy(cached)
+    probs, _ = await predict_probs_chunked_async(text)
+    results = probs_to_results(probs, threshold)
+    await run_blocking("db", emotion_cache.put, key, results)
+    return _copy(results)
+
+
+async def predict_emotion_many_cached_async(texts, threshold: float = 0.3):
+    keys = [emotion_cache.key(text, threshold) for text in texts]
+    results = await run_blocking("db", lambda: [emotion_cache.get(key) for key in keys])
+
+    # 미스난 것만 한꺼번에 배처에 넣어 같은 배치로 묶이게 함
+    missing = [i for i, cached in enumerate(results) if cached is None]
+    if missing:
+        outputs = await asyncio.gather(*(predict_probs_chunked_async(texts[i]) for i in missing))
+        for i, (probs, _) in zip(missing, outputs):
+            results[i] = probs_to_results(probs, threshold)
+        await run_blocking("db", lambda: [emotion_cache.put(keys[i], results[i]) for i in missing])
+
+    return [_copy(r) for r in results]
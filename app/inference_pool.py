@@ -0,0 +1,262 @@
+# app/inference_pool.py
+# 감정 추론 전용 워커 프로세스 풀
+# - 워커마다 torch 스레드 수를 고정해서 동시 요청 시 CPU 과다 구독 방지
+# - 배치는 부모가 쉬고 있는 워커를 골라 워커별 큐로 보내고(어느 워커가 무엇을 처리 중인지 부모가 기록) 결과는 Future로 돌려줌
+# - 죽은 워커는 다시 띄우고 처리 중이던 작업은 한 번 재시도
+
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+# 0이면 풀을 쓰지 않고 API 프로세스 안에서 추론
+POOL_WORKERS = int(os.getenv("EMOTION_POOL_WORKERS", "0"))
+TORCH_THREADS = int(os.getenv("EMOTION_POOL_TORCH_THREADS", "0"))
+MAX_RETRIES = 1
+# 준비되기 전에 연속으로 이만큼 죽으면 해당 워커는 재시작 포기
+MAX_STARTUP_FAILURES = 3
+
+
+def _worker_main(worker_id, num_threads, task_queue, result_queue):
+    # torch import 전에 스레드 수를 고정해야 OpenMP/MKL 풀에도 반영됨
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(num_threads)
+    import torch
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    from app.emotion_backends import load_backend
+
+    try:
+        backend = load_backend()
+        backend.predict_probs(["오늘 하루도 수고했어요."])  # 워밍업
+    except Exception as e:
+        result_queue.put(("failed", worker_id, None, repr(e)))
+        return
+    result_queue.put(("ready", worker_id, None, None))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, texts = task
+        try:
+            probs = backend.predict_probs(texts)
+        except Exception as e:
+            result_queue.put(("error", worker_id, task_id, repr(e)))
+        else:
+            result_queue.put(("done", worker_id, task_id, probs))
+
+
+class _Task:
+    __slots__ = ("texts", "future", "attempts")
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.future = Future()
+        self.attempts = 0
+
+
+class InferencePool:
+    def __init__(self, workers: int = POOL_WORKERS, torch_threads: int = TORCH_THREADS):
+        self.workers = workers
+        cpus = os.cpu_count() or 1
+        self.torch_threads = torch_threads or max(1, cpus // max(1, workers))
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._started = False
+        self._closing = False
+        self._ids = itertools.count()
+        self._tasks = {}       # task_id → _Task (대기 + 처리 중)
+        self._pending = deque()  # 아직 워커에 보내지 않은 task_id
+        self._busy = {}        # worker_id → 처리 중인 task_id (보낼 때 부모가 기록)
+        self._procs = {}       # worker_id → Process
+        self._queues = {}      # worker_id → 워커 전용 작업 큐 (재시작 시 새로 만듦)
+        self._ready = set()
+        self._startup_failures = {}  # worker_id → 준비 전 연속 실패 횟수
+        self.restarts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def start(self):
+        with self._lock:
+            if self._started or not self.enabled:
+                return
+            # 결과 큐는 SimpleQueue: 워커가 결과를 넣은 직후 죽어도 메시지가 유실되지 않음
+            self._result_queue = self._ctx.SimpleQueue()
+            for worker_id in range(self.workers):
+                self._spawn(worker_id)
+            self._started = True
+        threading.Thread(target=self._collect, name="inference-pool-collector", daemon=True).start()
+        threading.Thread(target=self._monitor, name="inference-pool-monitor", daemon=True).start()
+        print(f"🧵 추론 풀 시작: 워커 {self.workers}개 × torch 스레드 {self.torch_threads}개")
+
+    # _lock 안에서 호출
+    def _spawn(self, worker_id):
+        # 죽은 워커의 큐에는 가져가다 만 작업이 남을 수 있으므로 새 큐 사용
+        task_queue = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.torch_threads, task_queue, self._result_queue),
+            name=f"emotion-worker-{worker_id}",
+            daemon=True,
+        )
+        proc.start()
+        self._procs[worker_id] = proc
+        self._queues[worker_id] = task_queue
+
+    def submit(self, texts) -> Future:
+        """배치를 작업 큐에 넣고 확률 벡터 목록을 돌려줄 Future 반환"""
+        self.start()
+        task = _Task(list(texts))
+        task_id = next(self._ids)
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("추론 풀이 종료 중입니다.")
+            if not self._procs:
+                raise RuntimeError("사용 가능한 추론 워커가 없습니다.")
+            self._tasks[task_id] = task
+            self._pending.append(task_id)
+            self._dispatch()
+        return task.future
+
+    def predict_probs(self, texts):
+        return self.submit(texts).result()
+
+    # 쉬고 있는 준비된 워커마다 대기 작업 하나씩 전송 (_lock 안에서 호출)
+    def _dispatch(self):
+        for worker_id in sorted(self._ready):
+            if not self._pending:
+                return
+            if worker_id in self._busy:
+                continue
+            while self._pending:
+                task_id = self._pending.popleft()
+                task = self._tasks.get(task_id)
+                if task is None or task.future.done():
+                    continue
+                task.attempts += 1
+                self._busy[worker_id] = task_id
+                self._queues[worker_id].put((task_id, task.texts))
+                break
+
+    def _collect(self):
+        while True:
+            try:
+                kind, worker_id, task_id, payload = self._result_queue.get()
+            except (EOFError, OSError):
+                break
+            if kind == "failed":
+                print(f"🔥 추론 워커 {worker_id} 초기화 실패: {payload}")
+                continue
+            with self._lock:
+                if kind == "ready":
+                    if worker_id in self._procs:
+                        self._ready.add(worker_id)
+                        self._startup_failures[worker_id] = 0
+                    self._dispatch()
+                    continue
+                if self._busy.get(worker_id) == task_id:
+                    del self._busy[worker_id]
+                task = self._tasks.pop(task_id, None)
+                self._dispatch()
+            if task is None or task.future.done():
+                continue
+            if kind == "done":
+                task.future.set_result(payload)
+            else:
+                task.future.set_exception(RuntimeError(f"추론 실패: {payload}"))
+
+    def _monitor(self):
+        while not self._closing:
+            time.sleep(1.0)
+            failed = []
+            with self._lock:
+                for worker_id, proc in list(self._procs.items()):
+                    if proc.is_alive() or self._closing:
+                        continue
+                    failed.extend(self._retry_orphan(worker_id))
+                    if worker_id not in self._ready:
+                        self._startup_failures[worker_id] = self._startup_failures.get(worker_id, 0) + 1
+                    self._ready.discard(worker_id)
+                    dead_queue = self._queues.pop(worker_id)
+                    dead_queue.cancel_join_thread()  # 읽을 프로세스가 없으므로 남은 데이터를 기다리지 않음
+                    dead_queue.close()
+
+                    if self._startup_failures.get(worker_id, 0) >= MAX_STARTUP_FAILURES:
+                        print(f"🔥 추론 워커 {worker_id} 초기화 반복 실패 → 재시작 중단")
+                        del self._procs[worker_id]
+                        continue
+                    print(f"⚠️ 추론 워커 {worker_id} 종료 감지 (exitcode={proc.exitcode}) → 재시작")
+                    self._spawn(worker_id)
+                    self.restarts += 1
+                self._dispatch()
+                no_workers = not self._procs
+            for task in failed:
+                task.future.set_exception(RuntimeError("추론 워커가 비정상 종료되었습니다."))
+
+            # 살아 있는 워커가 하나도 없으면 대기 중인 작업을 모두 실패 처리
+            if no_workers:
+                self._fail_pending(RuntimeError("사용 가능한 추론 워커가 없습니다."))
+
+    # 죽은 워커가 처리 중이던 작업은 맨 앞에서 재시도, 이미 재시도했으면 실패할 작업으로 반환 (_lock 안에서 호출)
+    def _retry_orphan(self, worker_id):
+        task_id = self._busy.pop(worker_id, None)
+        task = self._tasks.get(task_id) if task_id is not None else None
+        if task is None:
+            return []
+        if task.attempts <= MAX_RETRIES:
+            self._pending.appendleft(task_id)
+            return []
+        del self._tasks[task_id]
+        return [task]
+
+    def shutdown(self, timeout: float = 10.0):
+        """진행 중인 작업을 마치고 워커 종료, 남은 작업은 취소"""
+        with self._lock:
+            if not self._started:
+                return
+            self._closing = True
+            queues = list(self._queues.values())
+            procs = list(self._procs.values())
+        for task_queue in queues:
+            task_queue.put(None)
+        deadline = time.monotonic() + timeout
+        for proc in procs:
+            proc.join(max(0.0, deadline - time.monotonic()))
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+        self._fail_pending(RuntimeError("추론 풀이 종료되었습니다."))
+        self._started = False
+
+    def _fail_pending(self, error):
+        with self._lock:
+            pending = list(self._tasks.values())
+            self._tasks.clear()
+            self._pending.clear()
+            self._busy.clear()
+        for task in pending:
+            if not task.future.done():
+                task.future.set_exception(error)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "torch_threads": self.torch_threads,
+                "ready_workers": len(self._ready),
+                "pending_tasks": len(self._tasks),
+                "restarts": self.restarts,
+            }
+
+
+inference_pool = InferencePool()
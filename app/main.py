@@ -1,40 +1,106 @@
 # app/main.py
 
-from fastapi import FastAPI, Depends, HTTPException, Query, Body, Path
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from app.emotion import predict_emotion
+from fastapi import FastAPI, Depends, HTTPException, Query, Body, Path, Request
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session, undefer
+from app.batcher import MAX_BATCH_SIZE, emotion_batcher
+from app.emotion import label_index, probs_to_results
+from app.diary_emotions import INDEX_MIN_SCORE, rethreshold, set_diary_emotions, unpack_probs
+from app.emotion_cache import (
+    chunk_cache, emotion_cache, predict_emotion_cached_async, predict_emotion_many_cached_async,
+    predict_probs_chunked_async,
+)
+from app.inference_pool import inference_pool
+from app.shared_model import memory_report
 from app import model, database, recommender
-from app.chatbot import router as chatbot_router
-from app.recommender import get_recommendations
+from app.chatbot import router as chatbot_router, question_prefetcher
+from app.recommender import cached_recommendations, recommend_all_types
 from app.utils import get_current_user
 from app.firebase_auth import verify_firebase_token, get_current_user_id
 from datetime import datetime, date
 from app.deps import get_db
 from dotenv import load_dotenv
 from typing import Optional, List
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from app import startup, concurrency, conversation_memory, metrics, question_prefetch, recommend_catalog
 import os
 
 env_path = os.path.join(os.path.dirname(__file__), ".env")
 load_dotenv(dotenv_path=env_path)
 
+# 모델은 요청을 막지 않도록 백그라운드에서 로딩 + 워밍업
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    inference_pool.start()
+    startup.start_background_warmup()
+    yield
+    question_prefetcher.shutdown()
+    emotion_batcher.shutdown()
+    inference_pool.shutdown()
+    concurrency.shutdown()
+
 # FastAPI 앱 객체 생성
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# 단계별 지연 시간 계측 (Server-Timing 헤더 + /metrics)
+if metrics.ENABLED:
+    app.add_middleware(metrics.TimingMiddleware)
 
 # DB 테이블 생성
-model.Base.metadata.create_all(bind=database.engine)
+with startup.timed("database"):
+    model.Base.metadata.create_all(bind=database.engine)
+    database.add_missing_columns("diaries", {"probs": "BLOB"})
+    database.add_missing_columns("conversation_logs", {"kind": "VARCHAR(16)"})
+    conversation_memory.backfill_log_kinds(database.engine)
+    database.add_missing_indexes(model.ConversationLog.__table__)
+    database.add_missing_indexes(model.PrecomputedQuestion.__table__)
 app.include_router(chatbot_router)
 app.include_router(recommender.router, prefix="/api")
 
 # 추천용 DB 경로
 RECOMMEND_DB_PATH = os.path.join("data", "emotion.db")
 
+# 추천 콘텐츠를 메모리 카탈로그로 미리 로딩
+with startup.timed("recommend_catalog"):
+    recommend_catalog.preload(RECOMMEND_DB_PATH)
+
+# 프로세스 생존 여부 (liveness)
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+# 모델 로딩 + 워밍업 완료 여부 (readiness)
+@app.get("/readyz")
+def readyz():
+    ready, detail = startup.readiness()
+    return JSONResponse(status_code=200 if ready else 503, content=detail)
+
+# 단계별 지연 시간 히스토그램 (Prometheus 텍스트 형식)
+@app.get("/metrics")
+def prometheus_metrics():
+    if not metrics.ENABLED:
+        return PlainTextResponse("# metrics disabled\n", status_code=404)
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# 워커별 / 전체 워커 메모리 사용량 (공유 모델 모드 절감 확인용)
+# pid와 메모리 정보가 노출되므로 DEBUG_ENDPOINTS=1일 때만 등록하고, 그때도 로그인한 사용자만
+if os.getenv("DEBUG_ENDPOINTS") == "1":
+    @app.get("/debug/memory")
+    def debug_memory(user_id: str = Depends(get_current_user_id)):
+        return memory_report()
+
 # Pydantic 스키마
 class TextInput(BaseModel):
     text: str
     date: str
 
+# 한 요청의 문장 수는 배처 한 번의 배치 크기(EMOTION_BATCH_MAX_SIZE)까지
+class BatchTextInput(BaseModel):
+    texts: List[str] = Field(..., max_length=MAX_BATCH_SIZE)
+    threshold: float = Field(0.3, ge=0, le=1)
+
 # 일기 목록 반환
 @app.get("/diary/list")
 def get_diaries(
@@ -46,35 +112,66 @@ def get_diaries(
 
 class DiaryUpdateRequest(BaseModel):
     text: str
-    emotion: str
+    emotion: Optional[str] = None  # 없으면 다시 분석한 감정으로 저장
+
+def _find_diary_by_date(db: Session, user_id: str, date: date):
+    # 사용자 + 날짜 기준으로 해당 일기 찾기
+    return db.query(model.Diary).filter(
+        model.Diary.user_id == user_id,
+        model.Diary.date == date
+    ).first()
+
+# 커밋 후에는 속성이 만료되므로 응답에 쓸 값은 커밋 전에 읽어서 반환 (이벤트 루프에서 지연 로딩하지 않도록)
+def _apply_diary_update(db: Session, diary, text: str, emotion: str, confidence: float, probs):
+    # 내용이 바뀌면 미리 만들어 둔 첫 질문은 무효
+    if diary.content != text:
+        question_prefetch.invalidate(db, diary.id)
+    diary.content = text
+    diary.emotion = emotion
+    diary.confidence = str(confidence)
+    set_diary_emotions(diary, probs)
+    saved = {
+        "id": diary.id,
+        "date": diary.date,
+        "content": diary.content,
+        "emotion": diary.emotion,
+        "confidence": diary.confidence,
+    }
+    db.commit()
+    return saved
 
 @app.put("/diary/by-date/{date}")
-def update_diary_by_date(
+async def update_diary_by_date(
     date: date,
     update: DiaryUpdateRequest,
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_id)
 ):
-    # 사용자 + 날짜 기준으로 해당 일기 찾기
-    diary = db.query(model.Diary).filter(
-        model.Diary.user_id == user_id,
-        model.Diary.date == date
-    ).first()
+    diary = await run_in_threadpool(_find_diary_by_date, db, user_id, date)
 
     if not diary:
         raise HTTPException(status_code=404, detail="Diary not found")
 
+    # 바뀐 조각만 다시 추론 (나머지는 조각 캐시 사용)
+    probs, chunk_stats = await predict_probs_chunked_async(update.text)
+    result = probs_to_results(probs)
+
+    # 사용자가 감정을 직접 고른 경우 그 감정의 확률을 신뢰도로 저장
+    emotion = update.emotion or result[0]["label"]
+    if emotion in label_index:
+        confidence = round(probs[label_index[emotion]], 4)
+    else:
+        confidence = result[0]["confidence"]
+
     # 내용과 감정 모두 업데이트
-    diary.content = update.text
-    diary.emotion = update.emotion
-    db.commit()
+    saved = await run_in_threadpool(_apply_diary_update, db, diary, update.text, emotion, confidence, probs)
+    # 바뀐 내용으로 첫 질문을 다시 미리 생성
+    question_prefetcher.enqueue(saved["id"], saved["content"])
 
     return {
         "message": "Diary updated",
-        "id": diary.id,
-        "date": diary.date,
-        "content": diary.content,
-        "emotion": diary.emotion
+        **saved,
+        "reanalysis": chunk_stats
     }
 
 @app.get("/diary/by-date/{date}")
@@ -102,49 +199,138 @@ def get_diary_by_date(
 
 # 기존 감정 분석만 반환하는 API
 @app.post("/analyze/emotion")
-def analyze_emotion(input: TextInput):
-    result = predict_emotion(input.text)
+async def analyze_emotion(input: TextInput):
+    result = await predict_emotion_cached_async(input.text)
     return result
 
+# 여러 문장 감정 분석 (동시 요청과 함께 배치 처리)
+@app.post("/analyze/emotion/batch")
+async def analyze_emotion_batch(input: BatchTextInput):
+    results = await predict_emotion_many_cached_async(input.texts, input.threshold)
+    return {"results": results}
+
+# 배처가 실제로 사용한 배치 크기 통계
+@app.get("/analyze/emotion/batch/stats")
+def analyze_emotion_batch_stats():
+    return emotion_batcher.stats()
+
+# 감정 추론 캐시 적중률
+@app.get("/analyze/emotion/cache/stats")
+def analyze_emotion_cache_stats():
+    return {**emotion_cache.stats(), "chunks": chunk_cache.stats()}
+
+
+# 일기 저장 (동기 DB 세션이라 스레드풀에서 실행)
+def _save_diary(db: Session, user_id: str, text: str, probs, parsed_date):
+    result = probs_to_results(probs)
+    diary = model.Diary(
+        user_id=user_id,
+        content=text,
+        emotion=result[0]["label"],
+        confidence=str(result[0]["confidence"]),
+        date=parsed_date
+    )
+    set_diary_emotions(diary, probs)
+    db.add(diary)
+    db.commit()
+    db.refresh(diary)
+
+    return {
+        "message": "저장 완료!",
+        "diary": {
+            "id": diary.id,
+            "content": diary.content,
+            "emotion": diary.emotion,
+            "confidence": diary.confidence,
+            "date": diary.date
+        }
+    }
 
 # 감정 분석 + DB 저장
 @app.post("/diary/text")
-def analyze_and_save(
+async def analyze_and_save(
         input: TextInput,
         db: Session = Depends(get_db),
         user_id: str = Depends(get_current_user_id)
 ):
+    metrics.set_pipeline("analyze_and_save")
     try:
-        result = predict_emotion(input.text)
+        # 전체 확률 벡터가 필요하므로 조각 캐시 경로로 분석
+        with metrics.span("emotion"):
+            probs, _ = await predict_probs_chunked_async(input.text)
 
         parsed_date = datetime.strptime(input.date, "%Y-%m-%d").date()
 
-        diary = model.Diary(
-            user_id=user_id,
-            content=input.text,
-            emotion=result[0]["label"],
-            confidence=str(result[0]["confidence"]),
-            date=parsed_date
-        )
-        db.add(diary)
-        db.commit()
-        db.refresh(diary)
-
-        return {
-            "message": "저장 완료!",
-            "diary": {
-                "id": diary.id,
-                "content": diary.content,
-                "emotion": diary.emotion,
-                "confidence": diary.confidence,
-                "date": diary.date
-            }
-        }
+        with metrics.span("db_commit"):
+            saved = await run_in_threadpool(_save_diary, db, user_id, input.text, probs, parsed_date)
+
+        # 채팅 화면을 열기 전에 첫 질문 + 음성을 백그라운드에서 미리 생성
+        question_prefetcher.enqueue(saved["diary"]["id"], input.text)
+        return saved
     except Exception as e:
         print("🔥 서버 오류:", e)
         raise HTTPException(status_code=500, detail="서버 내부 오류")
 
 
+# 특정 감정이 min_score 이상인 내 일기 목록 (모델 재실행 없음)
+@app.get("/diary/by-emotion")
+def get_diaries_by_emotion(
+    label: str = Query(..., description="감정 라벨 (예: 불안)"),
+    min_score: float = Query(0.3, ge=0.0, le=1.0),
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id)
+):
+    if label not in label_index:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 감정입니다: {label}")
+
+    if min_score >= INDEX_MIN_SCORE:
+        rows = db.query(model.Diary, model.DiaryEmotion.score).join(model.DiaryEmotion).filter(
+            model.Diary.user_id == user_id,
+            model.DiaryEmotion.label == label,
+            model.DiaryEmotion.score >= min_score
+        ).order_by(model.Diary.date.desc()).all()
+    else:
+        # 인덱스에 없는 낮은 확률은 저장된 확률 벡터에서 직접 확인
+        idx = label_index[label]
+        diaries = db.query(model.Diary).options(undefer(model.Diary.probs)).filter(
+            model.Diary.user_id == user_id,
+            model.Diary.probs.isnot(None)
+        ).order_by(model.Diary.date.desc()).all()
+        rows = [(d, round(unpack_probs(d.probs)[idx], 4)) for d in diaries]
+        rows = [(d, score) for d, score in rows if score >= min_score]
+
+    return [
+        {
+            "id": diary.id,
+            "date": diary.date,
+            "content": diary.content,
+            "emotion": diary.emotion,
+            "score": score
+        }
+        for diary, score in rows
+    ]
+
+# 저장된 확률 벡터에 threshold를 다시 적용한 감정 목록
+@app.get("/diary/{diary_id}/emotions")
+def get_diary_emotions(
+    diary_id: int = Path(..., description="일기 ID"),
+    threshold: float = Query(0.3, ge=0.0, le=1.0),
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id)
+):
+    diary = db.query(model.Diary).options(undefer(model.Diary.probs)).filter(
+        model.Diary.id == diary_id,
+        model.Diary.user_id == user_id
+    ).first()
+
+    if not diary:
+        raise HTTPException(status_code=404, detail="일기를 찾을 수 없습니다.")
+    if diary.probs is None:
+        raise HTTPException(status_code=409, detail="감정 확률이 저장되지 않은 일기입니다.")
+
+    return {"id": diary.id, "threshold": threshold, "emotions": rethreshold(diary.probs, threshold)}
+
+
 @app.get("/my-info")
 def my_info(user_email: str = Depends(verify_firebase_token)):
     return {"email": user_email}
@@ -164,16 +350,19 @@ class RecommendationResponse(BaseModel):
 
 @app.post("/recommend/from-emotion", response_model=RecommendationResponse)
 def recommend_from_emotion(
-    emotion: str = Query(..., description="기반 감정 (예: 행복, 슬픔 등)")
+    request: Request,
+    emotion: str = Query(..., description="기반 감정 (예: 행복, 슬픔 등)"),
+    seed: Optional[str] = Query(None, description="무작위 추천 seed (예: 사용자 ID, 같은 날에는 같은 결과)")
 ):
+    metrics.set_pipeline("get_recommendations")
     try:
-        return {
-            "emotion": emotion,
-            "books": get_recommendations("books", emotion, RECOMMEND_DB_PATH),
-            "movies": get_recommendations("movies", emotion, RECOMMEND_DB_PATH),
-            "music": get_recommendations("music", emotion, RECOMMEND_DB_PATH),
-            "quotes": get_recommendations("quotes", emotion, RECOMMEND_DB_PATH)
-        }
+        # response_model 검증 / 직렬화는 캐시에 넣기 전에 한 번만
+        return cached_recommendations(
+            request, "from-emotion", emotion, seed, RECOMMEND_DB_PATH,
+            lambda: RecommendationResponse(
+                emotion=emotion, **recommend_all_types(emotion, RECOMMEND_DB_PATH, seed)
+            ).model_dump()
+        )
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
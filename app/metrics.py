@@ -0,0 +1,150 @@
+# app/metrics.py
+# 단계별 지연 시간 계측: 요청마다 span(단계 이름, 소요 시간)을 모아 Server-Timing 헤더로 내보내고
+# (파이프라인, 단계)별 히스토그램으로 누적해 /metrics (Prometheus 텍스트 형식)에서 제공
+# METRICS_ENABLED=0이면 미들웨어를 붙이지 않고 span()은 아무 일도 하지 않음
+
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# 히스토그램 구간 (초)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current = ContextVar("request_trace", default=None)
+_null = nullcontext()
+
+
+class Trace:
+    """요청 하나의 span 목록 (스레드풀에서도 같은 객체에 기록)"""
+
+    __slots__ = ("pipeline", "spans", "started_at")
+
+    def __init__(self):
+        self.pipeline = None
+        self.spans = []
+        self.started_at = time.perf_counter()
+
+    def server_timing(self) -> str:
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.spans]
+        parts.append(f"total;dur={(time.perf_counter() - self.started_at) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, seconds: float):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(BUCKETS), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._series.items())
+        for label_values, (counts, total, count) in items:
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+stage_seconds = Histogram("pipeline_stage_seconds", "Time spent in each pipeline stage", ("pipeline", "stage"))
+request_seconds = Histogram("pipeline_request_seconds", "Total request time per pipeline", ("pipeline",))
+
+
+def set_pipeline(name: str):
+    """현재 요청을 계측 대상 파이프라인으로 표시 (히스토그램 라벨)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.pipeline = name
+
+
+@contextmanager
+def _span(trace: Trace, name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        trace.spans.append((name, seconds))
+        if trace.pipeline:
+            stage_seconds.observe((trace.pipeline, name), seconds)
+
+
+@contextmanager
+def background_trace(pipeline: str):
+    """요청 밖 백그라운드 작업 하나를 별도 Trace로 계측 (요청 Trace에 섞이지 않도록)"""
+    if not ENABLED:
+        yield None
+        return
+    trace = Trace()
+    trace.pipeline = pipeline
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        request_seconds.observe((pipeline,), time.perf_counter() - trace.started_at)
+
+
+def span(name: str):
+    """with span("stt"): ...  — 계측 중인 요청 밖이거나 비활성화면 nullcontext"""
+    trace = _current.get()
+    if trace is None:
+        return _null
+    return _span(trace, name)
+
+
+class TimingMiddleware:
+    """요청마다 Trace를 만들고 응답 헤더에 Server-Timing 추가 (순수 ASGI라 스트리밍 응답도 그대로 통과)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trace = Trace()
+        token = _current.set(trace)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and trace.spans:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if trace.pipeline:
+                request_seconds.observe((trace.pipeline,), time.perf_counter() - trace.started_at)
+
+
+def render_prometheus() -> str:
+    return "\n".join(stage_seconds.render() + request_seconds.render()) + "\n"
@@ -0,0 +1,145 @@
+# app/mode_classifier.py
+# 로컬 T/F 모드 분류기: 글자 n-gram 로지스틱 회귀 (CPU에서 수 ms 이내)
+# 확신이 낮은 입력만 GPT 분류로 넘김 (shadow 모드: 항상 GPT, 로컬 분류는 비교 기록만)
+# 가중치는 data/mode_labels.jsonl로 학습, data/mode_labels_eval.jsonl로 평가 (scripts/mode_classifier.py)
+
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+
+MODEL_PATH = os.getenv(
+    "MODE_CLASSIFIER_PATH",
+    os.path.join(os.path.dirname(__file__), "resources", "mode_classifier.json"),
+)
+# local: 로컬 분류 + 애매하면 GPT, shadow: 항상 GPT + 로컬 분류와 비교 기록, gpt: 항상 GPT
+MODE_CLASSIFIER = os.getenv("MODE_CLASSIFIER", "local")
+# 평가 세트에서 이 값 이상은 라벨과 모두 일치 (eval --sweep), 입력의 약 90%를 로컬에서 처리
+CONFIDENCE_THRESHOLD = float(os.getenv("MODE_CONFIDENCE_THRESHOLD", "0.85"))
+
+_whitespace = re.compile(r"\s+")
+
+
+def extract_features(text: str, ngram_range=(1, 4)):
+    """공백을 뺀 글자 n-gram 집합"""
+    text = _whitespace.sub("", unicodedata.normalize("NFC", text))
+    low, high = ngram_range
+    features = set()
+    for n in range(low, high + 1):
+        for i in range(len(text) - n + 1):
+            features.add(text[i:i + n])
+    return features
+
+
+class ModeClassifier:
+    def __init__(self, weights: dict, bias: float = 0.0, ngram_range=(1, 4), version: str = "unknown"):
+        self.weights = weights
+        self.bias = bias
+        self.ngram_range = tuple(ngram_range)
+        self.version = version
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["weights"], data.get("bias", 0.0), data.get("ngram_range", (1, 4)), data.get("version", "unknown"))
+
+    def save(self, path: str):
+        data = {
+            "version": self.version,
+            "ngram_range": list(self.ngram_range),
+            "bias": self.bias,
+            "weights": self.weights,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def prob_t(self, text: str) -> float:
+        """이성적 조언(T)을 원할 확률"""
+        score = self.bias + sum(self.weights.get(f, 0.0) for f in extract_features(text, self.ngram_range))
+        score = max(-30.0, min(30.0, score))
+        return 1.0 / (1.0 + math.exp(-score))
+
+    def predict(self, text: str):
+        """(모드, 확신도) — 확신도는 고른 쪽 확률"""
+        p = self.prob_t(text)
+        return ("T", p) if p >= 0.5 else ("F", 1.0 - p)
+
+
+def train(samples, epochs: int = 20, lr: float = 0.3, l2: float = 1e-4, ngram_range=(1, 4),
+          min_weight: float = 1e-3, version: str = "trained", init: ModeClassifier = None):
+    """samples: [(text, "T"/"F")] → ModeClassifier (희소 SGD 로지스틱 회귀, init이 있으면 그 가중치에서 시작)"""
+    import random
+
+    data = [(extract_features(text, ngram_range), 1.0 if mode == "T" else 0.0) for text, mode in samples]
+    weights = dict(init.weights) if init else {}
+    bias = init.bias if init else 0.0
+    rng = random.Random(0)
+    for _ in range(epochs):
+        rng.shuffle(data)
+        for features, y in data:
+            score = bias + sum(weights.get(f, 0.0) for f in features)
+            score = max(-30.0, min(30.0, score))
+            grad = 1.0 / (1.0 + math.exp(-score)) - y
+            bias -= lr * grad
+            for f in features:
+                w = weights.get(f, 0.0)
+                weights[f] = w - lr * (grad + l2 * w)
+
+    # 영향이 거의 없는 n-gram은 버려서 모델 크기 축소
+    weights = {f: round(w, 4) for f, w in weights.items() if abs(w) >= min_weight}
+    return ModeClassifier(weights, round(bias, 4), ngram_range, version)
+
+
+_classifier = None
+_lock = threading.Lock()
+stats = {"local": 0, "fallback": 0}
+# shadow 모드: GPT와 비교한 횟수 / 일치 횟수 (전체, 확신도 ≥ 임계값)
+shadow_stats = {"compared": 0, "agreed": 0, "confident": 0, "confident_agreed": 0}
+
+
+def get_classifier() -> ModeClassifier:
+    global _classifier
+    if _classifier is None:
+        with _lock:
+            if _classifier is None:
+                _classifier = ModeClassifier.load()
+    return _classifier
+
+
+def _shadow_compare(text: str, gpt_mode: str):
+    """로컬 분류를 GPT 결과와 비교만 함 (실패해도 응답에는 영향 없음)"""
+    try:
+        mode, confidence = get_classifier().predict(text)
+    except Exception as e:
+        print("모드 분류기 shadow 비교 실패:", e)
+        return
+    agreed = mode == gpt_mode
+    confident = confidence >= CONFIDENCE_THRESHOLD
+    with _lock:
+        shadow_stats["compared"] += 1
+        shadow_stats["agreed"] += agreed
+        shadow_stats["confident"] += confident
+        shadow_stats["confident_agreed"] += confident and agreed
+    if not agreed:
+        # 사용자 발화는 남기지 않음
+        print(f"🔍 모드 분류 불일치: 로컬={mode}({confidence:.2f}) GPT={gpt_mode}")
+
+
+def classify_mode(text: str, fallback):
+    """local: 로컬 분류 결과가 CONFIDENCE_THRESHOLD 이상이면 그대로, 아니면 fallback(text) (GPT) 사용
+    shadow: 항상 fallback(text), 로컬 분류는 비교 기록만"""
+    if MODE_CLASSIFIER == "shadow":
+        stats["fallback"] += 1
+        mode = fallback(text)
+        _shadow_compare(text, mode)
+        return mode
+    if MODE_CLASSIFIER == "local":
+        mode, confidence = get_classifier().predict(text)
+        if confidence >= CONFIDENCE_THRESHOLD:
+            stats["local"] += 1
+            return mode
+    stats["fallback"] += 1
+    return fallback(text)
@@ -1,9 +1,9 @@
 # app/models.py
 
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Text, Float, LargeBinary, Index
 from datetime import datetime
 from app.database import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 
 class Diary(Base):
     __tablename__ = "diaries"
@@ -13,9 +13,29 @@ class Diary(Base):
     content = Column(String)
     emotion = Column(String)
     confidence = Column(String)
+    # 44개 감정 전체 확률 (float16 바이트), 목록 조회 시에는 로딩하지 않음
+    probs = deferred(Column(LargeBinary, nullable=True))
     date = Column(Date)
     created_at = Column(DateTime, default=datetime.utcnow)
     conversations = relationship("ConversationLog", back_populates="diary", cascade="all, delete-orphan") #
+    emotions = relationship("DiaryEmotion", back_populates="diary", cascade="all, delete-orphan")
+    summary = relationship("ConversationSummary", back_populates="diary", uselist=False, cascade="all, delete-orphan")
+    first_question = relationship("PrecomputedQuestion", back_populates="diary", uselist=False, cascade="all, delete-orphan")
+
+# 일기별 감정 라벨 (threshold 이상인 라벨마다 한 행)
+class DiaryEmotion(Base):
+    __tablename__ = "diary_emotions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    diary_id = Column(Integer, ForeignKey("diaries.id"), index=True)
+    label = Column(String, nullable=False)
+    score = Column(Float, nullable=False)
+
+    diary = relationship("Diary", back_populates="emotions")
+
+    __table_args__ = (
+        Index("ix_diary_emotions_label_score", "label", "score"),
+    )
 
 #대화 내역 테이블 추가
 class ConversationLog(Base):
@@ -27,10 +47,54 @@ class ConversationLog(Base):
     response = Column(Text)
     mode = Column(String(1))  # 'T' or 'F'
     audio_url = Column(String, nullable=True)
+    # turn: 사용자 발화 → 응답, question: /generate-question 첫 질문 (user_input이 일기 전문이라 대화 문맥에서 제외)
+    kind = Column(String(16), nullable=False, default="turn")
     created_at = Column(DateTime, default=datetime.utcnow)
 
     diary = relationship("Diary", back_populates="conversations")
 
+    # 대화 기록 페이지 조회 (diary_id, created_at, id) 키셋 순서
+    # audio_url: 음성 저장소 정리 시 아직 참조되는 파일인지 확인
+    __table_args__ = (
+        Index("ix_conversation_logs_diary_created_id", "diary_id", "created_at", "id"),
+        Index("ix_conversation_logs_audio_url", "audio_url"),
+    )
+
+# 일기별 이전 대화 요약 (last_log_id까지의 대화를 요약, 이후 턴만 그대로 프롬프트에 포함)
+class ConversationSummary(Base):
+    __tablename__ = "conversation_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    diary_id = Column(Integer, ForeignKey("diaries.id"), unique=True, index=True)
+    summary = Column(Text, nullable=False)
+    last_log_id = Column(Integer, nullable=False, default=0)
+    turn_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    diary = relationship("Diary", back_populates="summary")
+
+# 일기 저장 시 미리 만들어 둔 첫 질문 + 음성 (content_hash가 현재 일기 내용과 같을 때만 유효)
+class PrecomputedQuestion(Base):
+    __tablename__ = "precomputed_questions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    diary_id = Column(Integer, ForeignKey("diaries.id"), unique=True, index=True)
+    content_hash = Column(String(64), nullable=False)
+    question = Column(Text, nullable=False)
+    audio_url = Column(String, nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    diary = relationship("Diary", back_populates="first_question")
+
+# 응답 음성 저장소(app/audio_store.py) 색인: 워커 간 공유되는 파일 목록 + 크기 + 마지막 사용 시각
+class AudioFile(Base):
+    __tablename__ = "audio_files"
+
+    name = Column(String, primary_key=True)  # <sha256>.<확장자>
+    size = Column(Integer, nullable=False)
+    tts_key = Column(String(64), nullable=True, index=True)  # TTS 캐시 키 (app/tts_cache.py)
+    last_used_at = Column(Float, nullable=False, index=True)  # time.time()
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
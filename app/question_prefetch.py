@@ -0,0 +1,181 @@
+# app/question_prefetch.py
+# 일기 저장 / 수정 시 첫 질문(GPT) + 음성(TTS)을 백그라운드에서 미리 만들어 DB에 저장
+# /generate-question은 저장된 결과를 바로 쓰거나, 진행 중인 작업이 있으면 그 결과를 기다림
+# 결과는 일기 내용 해시로 구분 → 일기를 고치면 이전 결과는 무효 (새 작업이 덮어씀)
+
+import asyncio
+import contextvars
+import hashlib
+import os
+from collections import Counter
+from datetime import datetime
+
+from app import audio_store
+from app.concurrency import run_blocking
+from app.metrics import background_trace
+from app.database import SessionLocal
+from app.model import Diary, PrecomputedQuestion
+
+PREFETCH_ENABLED = os.getenv("QUESTION_PREFETCH", "1") == "1"
+# 동시에 미리 만드는 작업 수 (대화 중인 요청과 GPT/TTS 단계 제한을 같이 씀)
+PREFETCH_WORKERS = int(os.getenv("QUESTION_PREFETCH_WORKERS", "2"))
+# 대기열이 가득 차면 새 작업은 버림 (해당 일기는 /generate-question에서 바로 생성)
+PREFETCH_QUEUE_SIZE = int(os.getenv("QUESTION_PREFETCH_QUEUE", "256"))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _load(diary_id: int, digest: str):
+    db = SessionLocal()
+    try:
+        row = db.query(PrecomputedQuestion).filter(PrecomputedQuestion.diary_id == diary_id).first()
+        if row is None or row.content_hash != digest:
+            return None
+        # 음성이 보관 한도로 삭제됐으면 다시 생성
+        if audio_store.resolve_url(row.audio_url) is None:
+            return None
+        return row.question, row.audio_url
+    finally:
+        db.close()
+
+
+def _store(diary_id: int, digest: str, question: str, audio_url: str) -> bool:
+    """일기가 그사이 삭제 / 수정됐으면 저장하지 않음"""
+    db = SessionLocal()
+    try:
+        diary = db.query(Diary).filter(Diary.id == diary_id).first()
+        if diary is None or content_hash(diary.content) != digest:
+            return False
+        row = db.query(PrecomputedQuestion).filter(PrecomputedQuestion.diary_id == diary_id).first()
+        if row is None:
+            row = PrecomputedQuestion(diary_id=diary_id)
+            db.add(row)
+        row.content_hash = digest
+        row.question = question
+        row.audio_url = audio_url
+        row.created_at = datetime.utcnow()
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def invalidate(db, diary_id: int):
+    """일기 수정 트랜잭션 안에서 호출 (commit은 호출한 쪽에서)"""
+    db.query(PrecomputedQuestion).filter(PrecomputedQuestion.diary_id == diary_id).delete()
+
+
+class QuestionPrefetcher:
+    """제한된 수의 워커 코루틴이 대기열의 (diary_id, 내용)마다 generate(내용) → (질문, audio_url)을 실행"""
+
+    def __init__(self, generate, workers=PREFETCH_WORKERS, queue_size=PREFETCH_QUEUE_SIZE, enabled=PREFETCH_ENABLED):
+        self.generate = generate
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.enabled = enabled
+        self._loop = None
+        self._queue = None
+        self._tasks = []
+        self._jobs = {}     # (diary_id, hash) → 진행 중 / 대기 중 작업의 Future
+        self._latest = {}   # diary_id → 가장 최근에 요청된 내용 해시
+        self.counts = Counter()
+
+    # 워커는 첫 enqueue 때 현재 이벤트 루프에서 시작
+    # 빈 Context로 만들어 첫 요청의 contextvars(요청 Trace 등)를 물려받지 않음
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._jobs.clear()
+        self._tasks = [loop.create_task(self._worker(), context=contextvars.Context()) for _ in range(self.workers)]
+
+    def enqueue(self, diary_id: int, content: str):
+        """이벤트 루프 안에서 호출. 같은 내용의 작업이 이미 있으면 아무 일도 하지 않음"""
+        if not self.enabled or not content:
+            return
+        self._ensure_started()
+        digest = content_hash(content)
+        self._latest[diary_id] = digest
+        key = (diary_id, digest)
+        if key in self._jobs:
+            return
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((diary_id, content, digest, future))
+        except asyncio.QueueFull:
+            self.counts["dropped"] += 1
+            return
+        self._jobs[key] = future
+        self.counts["enqueued"] += 1
+
+    async def _worker(self):
+        while True:
+            diary_id, content, digest, future = await self._queue.get()
+            key = (diary_id, digest)
+            result = None
+            try:
+                # 대기 중에 일기가 다시 수정됐으면 건너뜀
+                if self._latest.get(diary_id) != digest:
+                    self.counts["superseded"] += 1
+                    continue
+                # 같은 내용으로 다시 저장한 경우 등 이미 만들어 둔 결과가 있으면 재사용
+                result = await run_blocking("db", _load, diary_id, digest)
+                if result is not None:
+                    self.counts["reused"] += 1
+                    continue
+                # 작업마다 별도 Trace → gpt / tts 단계는 pipeline="question_prefetch"로 기록
+                with background_trace("question_prefetch"):
+                    question, audio_url = await self.generate(content)
+                result = (question, audio_url)
+                if await run_blocking("db", _store, diary_id, digest, question, audio_url):
+                    self.counts["completed"] += 1
+                else:
+                    self.counts["superseded"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counts["failed"] += 1
+                print(f"첫 질문 미리 생성 실패: diary={diary_id}", e)
+            finally:
+                if self._jobs.get(key) is future:
+                    del self._jobs[key]
+                if not future.done():
+                    future.set_result(result)
+                if self._latest.get(diary_id) == digest and key not in self._jobs:
+                    self._latest.pop(diary_id, None)
+                self._queue.task_done()
+
+    async def get(self, diary_id: int, content: str):
+        """(질문, audio_url) 또는 None (없으면 호출한 쪽에서 직접 생성)"""
+        if not self.enabled:
+            return None
+        digest = content_hash(content)
+        future = self._jobs.get((diary_id, digest))
+        if future is not None and future.get_loop() is asyncio.get_running_loop():
+            # 요청이 취소돼도 작업은 계속되도록 shield
+            result = await asyncio.shield(future)
+            if result is not None:
+                self.counts["joined"] += 1
+                return result
+        result = await run_blocking("db", _load, diary_id, digest)
+        self.counts["hits" if result is not None else "misses"] += 1
+        return result
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": len(self._jobs),
+            **{k: self.counts[k] for k in ("enqueued", "dropped", "superseded", "reused", "completed", "failed", "hits", "joined", "misses")},
+        }
+
+    def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._loop = None
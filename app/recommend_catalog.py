@@ -0,0 +1,190 @@
+# app/recommend_catalog.py
+# 추천 콘텐츠(books, movies, music, quotes)를 메모리에 올려 두고 감정 라벨 → 항목 역색인으로 조회
+# emotion.db가 바뀌면(mtime / 크기) 새로 읽어 통째로 교체 → 요청은 항상 한 시점의 카탈로그 전체를 봄
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from app import content_db
+from app.content_db import CONTENT_TYPES, RESULT_LIMIT
+from app.metrics import span
+from utils.content_sampler import sample_indices
+from utils.db_utils import has_content_emotions, split_tags
+
+# 파일 변경 확인 주기 (초), 0이면 매 요청 확인
+CHECK_INTERVAL = float(os.getenv("RECOMMEND_CATALOG_CHECK_SECONDS", "1.0"))
+
+
+class ContentTable:
+    """한 콘텐츠 종류: id 내림차순 항목 목록 + 라벨 → 위치(오름차순 = 최신순) 역색인"""
+
+    __slots__ = ("items", "index")
+
+    def __init__(self, items, labels):
+        """labels[i]: items[i]의 감정 라벨 목록"""
+        self.items = items
+        index = defaultdict(list)
+        for pos, item_labels in enumerate(labels):
+            for label in item_labels:
+                index[label].append(pos)
+        self.index = {label: tuple(positions) for label, positions in index.items()}
+
+    def positions(self, emotion: str):
+        """라벨이 정확히 같은 항목만 (부분 문자열 매칭 없음)"""
+        return self.index.get(emotion, ())
+
+    def latest(self, emotion: str, limit: int = RESULT_LIMIT):
+        return [dict(self.items[pos]) for pos in self.positions(emotion)[:limit]]
+
+    def sample(self, limit: int = RESULT_LIMIT, rng=random):
+        """서로 다른 limit개를 O(limit)로 (rng에 seed를 주면 같은 결과)"""
+        return [dict(self.items[pos]) for pos in sample_indices(len(self.items), limit, rng)]
+
+
+class Catalog:
+    __slots__ = ("tables", "version", "loaded_at")
+
+    def __init__(self, tables, version):
+        self.tables = tables
+        self.version = version
+        self.loaded_at = time.time()
+
+    def counts(self):
+        return {name: len(table.items) for name, table in self.tables.items()}
+
+
+def _file_version(db_path: str):
+    st = os.stat(db_path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _content_labels(conn, content_type, normalized):
+    """content_id → 감정 라벨 목록 (content_emotions가 없으면 emotion_tags 문자열을 나눠서 사용)"""
+    labels = defaultdict(list)
+    if normalized:
+        rows = conn.execute(
+            "SELECT content_id, emotion FROM content_emotions WHERE content_type = ?",
+            (content_type,)
+        )
+        for content_id, emotion in rows:
+            labels[content_id].append(emotion)
+    else:
+        for content_id, tags in conn.execute(f"SELECT id, emotion_tags FROM {content_type}"):
+            labels[content_id] = split_tags(tags)
+    return labels
+
+
+def load_catalog(db_path: str, version=None) -> Catalog:
+    conn = content_db.connection(db_path)
+    # 모든 테이블을 한 읽기 트랜잭션에서 → 크롤러가 쓰는 중이어도 한 시점의 내용
+    conn.execute("BEGIN")
+    try:
+        normalized = has_content_emotions(conn)
+        if not normalized:
+            print("⚠️ content_emotions 테이블 없음 → emotion_tags 문자열 사용 (scripts/migrate_content_emotions.py 실행 필요)")
+        tables = {}
+        for content_type, image_field in CONTENT_TYPES.items():
+            fields = "id, title, url, emotion_tags" + (f", {image_field}" if image_field else "")
+            rows = conn.execute(f"SELECT {fields} FROM {content_type} ORDER BY id DESC").fetchall()
+            content_labels = _content_labels(conn, content_type, normalized)
+            items, labels = [], []
+            for row in rows:
+                item = {"title": row[1], "url": row[2], "emotion_tags": row[3]}
+                if image_field:
+                    item["image"] = row[4]
+                items.append(item)
+                labels.append(content_labels.get(row[0], ()))
+            tables[content_type] = ContentTable(items, labels)
+    finally:
+        conn.rollback()
+    return Catalog(tables, version)
+
+
+class CatalogStore:
+    """db_path 하나의 카탈로그. check_interval마다 파일 버전을 보고 바뀌었으면 다시 로딩 후 교체"""
+
+    def __init__(self, db_path: str, check_interval: float = CHECK_INTERVAL):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self._catalog = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def get(self) -> Catalog:
+        catalog = self._catalog
+        if catalog is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return catalog
+        with self._lock:
+            if self._catalog is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._catalog
+            try:
+                version = _file_version(self.db_path)
+                if self._catalog is None or version != self._catalog.version:
+                    start = time.perf_counter()
+                    with span("catalog_reload"):
+                        self._catalog = load_catalog(self.db_path, version)
+                    self.reloads += 1
+                    for listener in list(_reload_listeners):
+                        listener(self.db_path, version)
+                    print(f"📚 추천 카탈로그 로딩: {self.db_path} {self._catalog.counts()} "
+                          f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+            except (OSError, sqlite3.Error) as e:
+                # 크롤러가 쓰는 도중 등 읽기 실패 시 이전 카탈로그 유지 (처음이면 오류 전달)
+                if self._catalog is None:
+                    raise
+                self.reload_errors += 1
+                print("추천 카탈로그 다시 로딩 실패:", e)
+            self._checked_at = time.monotonic()
+            return self._catalog
+
+    def stats(self):
+        catalog = self._catalog
+        return {
+            "db_path": self.db_path,
+            "loaded": catalog is not None,
+            "version": list(catalog.version) if catalog and catalog.version else None,
+            "loaded_at": catalog.loaded_at if catalog else None,
+            "counts": catalog.counts() if catalog else {},
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+        }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+# 카탈로그를 다시 읽을 때 호출: listener(db_path, version) (응답 캐시 정리 등)
+_reload_listeners = []
+
+
+def add_reload_listener(listener):
+    _reload_listeners.append(listener)
+
+
+def catalog_store(db_path: str) -> CatalogStore:
+    store = _stores.get(db_path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(db_path, CatalogStore(db_path))
+    return store
+
+
+def get_catalog(db_path: str) -> Catalog:
+    return catalog_store(db_path).get()
+
+
+def preload(db_path: str):
+    """시작 시 미리 로딩 (실패해도 서버는 뜨고 첫 요청에서 다시 시도)"""
+    try:
+        get_catalog(db_path)
+    except (OSError, sqlite3.Error) as e:
+        print("추천 카탈로그 미리 로딩 실패:", e)
+
+
+def stats():
+    return [store.stats() for store in list(_stores.values())]
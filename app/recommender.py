@@ -1,79 +1,88 @@
-from fastapi import APIRouter, Query
-import sqlite3
+from fastapi import APIRouter, Query, Request
 import os
+import random
 from typing import List, Optional
+from app.metrics import set_pipeline, span
+from app.content_db import CONTENT_TYPES, fetch_recommendations
+from app.recommend_catalog import RESULT_LIMIT, add_reload_listener, get_catalog, stats as catalog_stats
+from app.response_cache import recommend_cache
+from utils.content_sampler import daily_seed
 
-DB_PATH = os.path.join("app", "emotion.db")
+DB_PATH = os.path.join("data", "emotion.db")
+# memory: 메모리 카탈로그 (기본), db: 요청마다 emotion.db에서 한 문장으로 조회
+RECOMMEND_SOURCE = os.getenv("RECOMMEND_SOURCE", "memory")
+# 브라우저 / 프록시가 다시 확인(If-None-Match) 없이 쓸 수 있는 시간 (초)
+RECOMMEND_CLIENT_MAX_AGE = int(os.getenv("RECOMMEND_CLIENT_MAX_AGE", "60"))
 router = APIRouter()
 
-def get_recommendations(content_type, emotion, db_path):
+# 카탈로그가 바뀌면 이전 버전 응답은 바로 정리
+add_reload_listener(recommend_cache.clear)
+
+def get_recommendations(content_type, emotion, db_path, rng=random):
     """emotion.db에서 콘텐츠 종류와 감정 기반 추천 항목 반환"""
     """emotion이 있을 경우 감정 기반 추천, 없으면 인기(무작위) 추천"""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    with span(f"{content_type}_query"):
+        # DB 대신 메모리 카탈로그 (emotion.db가 바뀌면 자동으로 다시 로딩)
+        table = get_catalog(db_path).tables.get(content_type)
+        if table is None:
+            return []
+        if emotion:
+            return table.latest(emotion, RESULT_LIMIT)
+        return table.sample(RESULT_LIMIT, rng)
 
-    if content_type == "quotes":
-        select_fields = "title, url, emotion_tags"
-        image_index = None  # 이미지 없음
-    elif content_type == "books":
-        select_fields = "title, url, emotion_tags, thumbnail_url"
-        image_index = 3
-    elif content_type == "music":
-        select_fields = "title, url, emotion_tags, thumbnail_url"
-        image_index = 3
-    elif content_type == "movies":
-        select_fields = "title, url, emotion_tags, poster_url"
-        image_index = 3
-    else:
-        return []
+def recommend_all_types(emotion, db_path, seed=None):
+    """콘텐츠 4종 추천 {"books": [...], "movies": [...], "music": [...], "quotes": [...]}
+    감정이 없을 때의 무작위 추천은 seed가 같으면 하루 동안 같은 결과"""
+    seed = daily_seed(seed) if seed else None
+    if RECOMMEND_SOURCE == "db":
+        # DB 시간은 Server-Timing / 단계별 히스토그램의 recommend_db로 확인
+        with span("recommend_db"):
+            return fetch_recommendations(db_path, emotion, seed)
+    rng = random.Random(seed) if seed else random
+    return {content_type: get_recommendations(content_type, emotion, db_path, rng) for content_type in CONTENT_TYPES}
+
+def content_version(db_path):
+    """추천 결과가 달라질 수 있는 콘텐츠 버전 (응답 캐시 키)"""
+    if RECOMMEND_SOURCE == "db":
+        st = os.stat(db_path)
+        return st.st_mtime_ns, st.st_size
+    return get_catalog(db_path).version
 
+def cached_recommendations(request: Request, endpoint: str, emotion, seed, db_path, build):
+    """감정 추천은 모두에게 같고, seed 무작위 추천은 사용자별 하루 동안 같으므로 캐시 (seed 없는 무작위는 캐시 안 함)"""
     if emotion:
-        query = f"""
-                SELECT {select_fields}
-                FROM {content_type}
-                WHERE emotion_tags LIKE ?
-                ORDER BY id DESC
-                LIMIT 5;
-            """
-        cursor.execute(query, (f"%{emotion}%",))
+        key = (endpoint, emotion, None, content_version(db_path))
+        cache_control = f"public, max-age={RECOMMEND_CLIENT_MAX_AGE}"
+    elif seed:
+        key = (endpoint, "", daily_seed(seed), content_version(db_path))
+        cache_control = f"private, max-age={RECOMMEND_CLIENT_MAX_AGE}"
     else:
-        query = f"""
-            SELECT {select_fields}
-            FROM {content_type}
-            ORDER BY RANDOM()
-            LIMIT 5;
-        """
-        cursor.execute(query)
-
-    results = cursor.fetchall()
-    conn.close()
-
-    # 결과 포맷 정리
-    content_list = []
-    for row in results:
-        content = {
-            "title": row[0],
-            "url": row[1],
-            "emotion_tags": row[2],
-        }
-        if image_index is not None:
-            content["image"] = row[image_index]
-        content_list.append(content)
-
-    return content_list
+        key, cache_control = None, None
+    return recommend_cache.respond(request, key, build, cache_control)
 
 # 추천 API 엔드포인트
 @router.get("/recommend")
 def recommend_all(
-    emotion: str = Query(..., description="감정 키워드 (예: 우울, 설렘 등)")
+    request: Request,
+    emotion: str = Query(..., description="감정 키워드 (예: 우울, 설렘 등)"),
+    seed: Optional[str] = Query(None, description="무작위 추천 seed (예: 사용자 ID, 같은 날에는 같은 결과)")
 ):
+    set_pipeline("get_recommendations")
     try:
-        return {
-            "emotion": emotion or "default",
-            "books": get_recommendations("books", emotion, DB_PATH),
-            "movies": get_recommendations("movies", emotion, DB_PATH),
-            "music": get_recommendations("music", emotion, DB_PATH),
-            "quotes": get_recommendations("quotes", emotion, DB_PATH)
-        }
+        return cached_recommendations(
+            request, "recommend", emotion, seed, DB_PATH,
+            lambda: {"emotion": emotion or "default", **recommend_all_types(emotion, DB_PATH, seed)}
+        )
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+# 메모리 카탈로그 상태 (항목 수, 파일 버전, 다시 로딩 횟수)
+@router.get("/recommend/catalog/stats")
+def recommend_catalog_stats():
+    return catalog_stats()
+
+
+# 추천 응답 캐시 적중률
+@router.get("/recommend/cache/stats")
+def recommend_cache_stats():
+    return recommend_cache.stats()
@@ -0,0 +1,115 @@
+# app/response_cache.py
+# 추천 API 응답 캐시: (엔드포인트, 감정, seed, 카탈로그 버전) → 직렬화된 JSON 바이트 + ETag
+# TTL과 항목 수(LRU) 제한, If-None-Match가 맞으면 본문 없이 304
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi.responses import Response
+
+RECOMMEND_CACHE_ENABLED = os.getenv("RECOMMEND_CACHE", "1") == "1"
+RECOMMEND_CACHE_TTL = float(os.getenv("RECOMMEND_CACHE_TTL_SECONDS", "300"))
+RECOMMEND_CACHE_MAX_ENTRIES = int(os.getenv("RECOMMEND_CACHE_MAX_ENTRIES", "1024"))
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match: "a", W/"b" 또는 * 형식"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _encode(data) -> bytes:
+    # JSONResponse와 같은 직렬화
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class ResponseCache:
+    def __init__(self, ttl: float, max_entries: int, enabled: bool = True):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.enabled = enabled
+        self._entries = OrderedDict()  # key → (본문, ETag, 만료 시각)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def _lookup(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _store(self, key, body: bytes):
+        entry = (body, f'"{hashlib.sha1(body).hexdigest()}"', time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def respond(self, request, key, build, cache_control: str):
+        """key가 None이면 캐시하지 않음 (무작위 결과 등). build()는 응답 dict를 반환"""
+        if key is None or not self.enabled:
+            with self._lock:
+                self.bypassed += 1
+            return Response(content=_encode(build()), media_type="application/json",
+                            headers={"Cache-Control": "no-store"})
+
+        entry = self._lookup(key)
+        if entry is None:
+            entry = self._store(key, _encode(build()))
+        body, etag, _ = entry
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def clear(self, *_):
+        """카탈로그가 바뀌었을 때 등 (이전 버전 키는 어차피 조회되지 않으므로 메모리만 정리)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "bypassed": self.bypassed,
+                "evictions": self.evictions,
+                "bytes": sum(len(entry[0]) for entry in self._entries.values()),
+            }
+
+
+recommend_cache = ResponseCache(RECOMMEND_CACHE_TTL, RECOMMEND_CACHE_MAX_ENTRIES, RECOMMEND_CACHE_ENABLED)
@@ -0,0 +1,103 @@
+# app/shared_model.py
+# 여러 uvicorn 워커가 감정 모델 가중치 한 벌을 공유하는 모드
+# gunicorn(preload_app) 마스터에서 모델을 한 번 로딩한 뒤 fork → 워커들은 읽기 전용으로 공유
+# 워커별 / 전체 메모리 사용량(RSS, PSS)을 /proc에서 읽어 확인
+# EMOTION_POOL_WORKERS > 0이면 각 워커가 추론 프로세스를 spawn해 모델을 따로 로딩 → 공유되지 않으므로 이 모드에서는 0으로 사용
+
+import gc
+import os
+
+from app.emotion import get_model
+
+# gunicorn.conf.py가 fork 전에 마스터 pid를 넣어 둠 (없으면 gunicorn 워커가 아님)
+GUNICORN_MASTER_ENV = "GUNICORN_MASTER_PID"
+
+
+def prepare_shared_model():
+    """fork 전에 마스터에서 호출: 가중치 로딩 + 공유 메모리로 이동 + GC freeze"""
+    backend = get_model()
+
+    torch_model = getattr(backend, "model", None)
+    if torch_model is not None:
+        for param in torch_model.parameters():
+            param.requires_grad_(False)
+        # 텐서 저장소를 공유 메모리로 옮겨서 워커가 써도 복사가 생기지 않게 함
+        torch_model.share_memory()
+
+    # 지금까지 만든 객체는 GC 대상에서 빼서 워커의 GC가 페이지를 건드리지 않게 함 (CoW 방지)
+    gc.collect()
+    gc.freeze()
+    print(f"🧠 공유 모델 준비 완료 (backend={backend.name}, pid={os.getpid()})")
+
+
+def _read_smaps_rollup(pid):
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        return None
+    return fields
+
+
+def process_memory(pid=None):
+    """프로세스 메모리 (MB): rss, pss(공유 페이지를 나눠 계산), shared, private"""
+    pid = pid or os.getpid()
+    fields = _read_smaps_rollup(pid)
+    if fields is None:
+        return None
+    mb = lambda kb: round(kb / 1024, 1)
+    return {
+        "pid": pid,
+        "rss_mb": mb(fields.get("Rss", 0)),
+        "pss_mb": mb(fields.get("Pss", 0)),
+        "shared_mb": mb(fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)),
+        "private_mb": mb(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)),
+    }
+
+
+def _gunicorn_master():
+    """현재 프로세스가 gunicorn 워커면 마스터 pid, 아니면 None"""
+    master = os.getenv(GUNICORN_MASTER_ENV)
+    if master and master.isdigit() and int(master) == os.getppid():
+        return int(master)
+    return None
+
+
+def _sibling_pids():
+    # gunicorn 워커일 때만 같은 부모(마스터)를 가진 프로세스 = 워커들 (그냥 uvicorn이면 자기 자신만)
+    ppid = _gunicorn_master()
+    if ppid is None:
+        return [os.getpid()]
+    pids = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm에 공백이 있을 수 있어서 마지막 ')' 뒤에서 파싱
+        fields = stat[stat.rfind(")") + 2:].split()
+        if int(fields[1]) == ppid:
+            pids.append(int(name))
+    return sorted(pids)
+
+
+def memory_report():
+    """현재 워커 + 전체 워커(+마스터) 메모리. 전체 실사용량은 PSS 합계로 판단"""
+    workers = [m for m in (process_memory(pid) for pid in _sibling_pids()) if m]
+    master_pid = _gunicorn_master()
+    master = process_memory(master_pid) if master_pid else None
+    procs = workers + ([master] if master else [])
+    return {
+        "worker": process_memory(),
+        "workers": workers,
+        "master": master,
+        "total_rss_mb": round(sum(p["rss_mb"] for p in procs), 1),
+        "total_pss_mb": round(sum(p["pss_mb"] for p in procs), 1),
+    }
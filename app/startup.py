@@ -0,0 +1,110 @@
+# app/startup.py
+# 무거운 리소스(모델, 외부 SDK 클라이언트)는 첫 사용 또는 워밍업 때 로딩하고
+# 컴포넌트별 로딩 시간을 기록
+
+import threading
+import time
+from contextlib import contextmanager
+
+# 컴포넌트 이름 → 로딩에 걸린 시간(초)
+component_timings = {}
+
+# 준비 상태 (/readyz)
+state = {
+    "warmed_up": False,
+    "warmup_error": None,
+}
+
+
+@contextmanager
+def timed(component: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        component_timings[component] = elapsed
+        print(f"⏱️ {component}: {elapsed * 1000:.1f} ms")
+
+
+class LazyResource:
+    """loader를 처음 get() 할 때 한 번만 실행 (스레드 안전)"""
+
+    def __init__(self, name: str, loader):
+        self.name = name
+        self.loader = loader
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def set(self, value):
+        """loader 대신 값을 직접 지정 (테스트 / 가짜 서비스용)"""
+        with self._lock:
+            self._value = value
+            self._loaded = True
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                with timed(self.name):
+                    self._value = self.loader()
+                self._loaded = True
+        return self._value
+
+
+def log_breakdown():
+    total = sum(component_timings.values())
+    lines = [f"  - {name}: {sec * 1000:.1f} ms" for name, sec in component_timings.items()]
+    print("🚀 시작 시간 구성 (총 {:.1f} ms)\n{}".format(total * 1000, "\n".join(lines)))
+
+
+def warmup():
+    """모델 로딩 + 더미 추론 1회 (프로세스 풀 모드면 워커에서 실행)"""
+    from app.emotion import predict_probs_batch
+    from app.inference_pool import inference_pool
+
+    try:
+        with timed("emotion_warmup"):
+            if inference_pool.enabled:
+                inference_pool.predict_probs(["오늘 하루도 수고했어요."])
+            else:
+                predict_probs_batch(["오늘 하루도 수고했어요."])
+        state["warmed_up"] = True
+    except Exception as e:
+        state["warmup_error"] = str(e)
+        print("🔥 워밍업 실패:", e)
+    finally:
+        log_breakdown()
+
+
+def start_background_warmup():
+    thread = threading.Thread(target=warmup, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def readiness():
+    from app.emotion import is_model_loaded
+    from app.inference_pool import inference_pool
+
+    if inference_pool.enabled:
+        model_loaded = inference_pool.stats()["ready_workers"] > 0
+    else:
+        model_loaded = is_model_loaded()
+    ready = model_loaded and state["warmed_up"]
+    detail = {
+        "ready": ready,
+        "model_loaded": model_loaded,
+        "warmed_up": state["warmed_up"],
+        "warmup_error": state["warmup_error"],
+        "timings_ms": {name: round(sec * 1000, 1) for name, sec in component_timings.items()},
+    }
+    if inference_pool.enabled:
+        detail["pool"] = inference_pool.stats()
+    return ready, detail
@@ -0,0 +1,136 @@
+# app/tts_cache.py
+# TTS 음성 캐시: SSML + 목소리 + 모드 해시 → mp3 바이트
+# 1차 프로세스 내 LRU(바이트 크기 제한) + 2차 응답 음성 저장소(키 → 저장소 파일, 워커 간 공유)
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from app import audio_store
+
+MEMORY_MAX_BYTES = int(float(os.getenv("TTS_CACHE_MEMORY_MB", "32")) * 1024 * 1024)
+# 0이면 2차(저장소) 캐시를 쓰지 않음
+STORE_ENABLED = os.getenv("TTS_CACHE_STORE", "1") != "0"
+
+
+def make_key(ssml: str, voice: dict, mode: str) -> str:
+    raw = json.dumps({"ssml": ssml, "voice": voice, "mode": mode}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ByteLRU:
+    """전체 바이트 크기 제한이 있는 스레드 안전 LRU"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._data[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class StoreTier:
+    """2차 캐시: 응답 음성 저장소(app/audio_store.py)에 TTS 키와 함께 저장 → 워커 간 공유, 같은 mp3를 두 번 저장하지 않음
+    삭제 순서와 한도는 저장소 보관 한도(AUDIO_STORE_MAX_MB / AUDIO_STORE_MAX_AGE_DAYS)를 따름"""
+
+    def get(self, key):
+        return audio_store.get_by_tts_key(key)
+
+    def put(self, key, value: bytes):
+        audio_store.put(value, "mp3", tts_key=key)
+
+
+class TTSCache:
+    def __init__(self, memory: ByteLRU, store: StoreTier = None):
+        self.memory = memory
+        self.store = store
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "store_hits": 0, "misses": 0, "bytes_served": 0, "bytes_synthesized": 0}
+
+    def _count(self, field, nbytes=0, bytes_field="bytes_served"):
+        with self._lock:
+            self.counters[field] += 1
+            self.counters[bytes_field] += nbytes
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits", len(value))
+            return value
+        if self.store is not None:
+            try:
+                value = self.store.get(key)
+            except Exception as e:
+                print("TTS 캐시 조회 오류:", e)
+                value = None
+            if value is not None:
+                self._count("store_hits", len(value))
+                self.memory.put(key, value)
+                return value
+        self._count("misses")
+        return None
+
+    def put(self, key, value: bytes):
+        with self._lock:
+            self.counters["bytes_synthesized"] += len(value)
+        self.memory.put(key, value)
+        if self.store is not None:
+            try:
+                self.store.put(key, value)
+            except Exception as e:
+                print("TTS 캐시 저장 오류:", e)
+
+    def get_or_create(self, key, synthesize):
+        value = self.get(key)
+        if value is None:
+            value = synthesize()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        # 저장소 파일은 대화 기록이 참조할 수 있으므로 메모리만 비움
+        self.memory.clear()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters["memory_hits"] + counters["store_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["store_hits"]
+        return {
+            **counters,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.size,
+        }
+
+
+tts_cache = TTSCache(ByteLRU(MEMORY_MAX_BYTES), StoreTier() if STORE_ENABLED else None)
@@ -0,0 +1,110 @@
+# app/voice_stream.py
+# 스트리밍 응답: GPT 토큰을 문장 단위로 끊고, 문장마다 바로 TTS 해서 SSE로 내보냄
+
+import asyncio
+import json
+import os
+import re
+import time
+from collections import deque
+
+# 너무 짧은 문장("네.")은 다음 문장과 합쳐서 TTS 호출 수를 줄임
+MIN_SENTENCE_CHARS = int(os.getenv("STREAM_MIN_SENTENCE_CHARS", "8"))
+
+# 문장 끝: . ! ? … ~ 뒤에 공백/줄바꿈
+_sentence_end = re.compile(r"[.!?…~。]+[\"')\]]*\s+|\n+")
+
+_END = object()
+
+
+class SentenceSplitter:
+    """토큰을 받아 완성된 문장만 돌려줌 (남은 부분은 flush에서)"""
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, token: str):
+        self._buffer += token
+        sentences = []
+        start = 0
+        for match in _sentence_end.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _produce_sentences(token_iter, loop, queue: asyncio.Queue):
+    """스레드에서 실행: 블로킹 토큰 스트림 → 문장 → 이벤트 루프 큐"""
+    splitter = SentenceSplitter()
+    try:
+        for token in token_iter:
+            for sentence in splitter.feed(token):
+                loop.call_soon_threadsafe(queue.put_nowait, sentence)
+        for sentence in splitter.flush():
+            loop.call_soon_threadsafe(queue.put_nowait, sentence)
+    except Exception as e:
+        loop.call_soon_threadsafe(queue.put_nowait, e)
+    finally:
+        loop.call_soon_threadsafe(queue.put_nowait, _END)
+
+
+async def stream_sentences_with_audio(token_iter, synthesize, run_stage, started_at: float = None):
+    """
+    ("text", {...}) / ("audio", {...}) 를 순서대로 내보내는 async generator
+    - 문장이 완성되는 즉시 text 이벤트, TTS는 문장별로 병렬 실행하되 audio 이벤트는 문장 순서대로
+    - token_iter: 블로킹 토큰 iterator, synthesize(sentence) -> base64 문자열
+    - run_stage(stage, fn, *args): 스레드풀 실행기 (app.concurrency.run_blocking)
+    """
+    started_at = started_at or time.perf_counter()
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    # 태스크 참조를 유지해야 중간에 GC되지 않음
+    producer = asyncio.ensure_future(run_stage("gpt", _produce_sentences, token_iter, loop, queue))
+
+    def elapsed_ms():
+        return round((time.perf_counter() - started_at) * 1000, 1)
+
+    pending = deque()
+    next_item = asyncio.ensure_future(queue.get())
+    index = 0
+    try:
+        while next_item is not None or pending:
+            waits = {next_item} if next_item is not None else set()
+            if pending:
+                waits.add(pending[0][1])
+            done, _ = await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+
+            # 앞 문장의 음성이 준비됐으면 먼저 내보냄 (순서 유지)
+            while pending and pending[0][1].done():
+                i, task = pending.popleft()
+                yield "audio", {"index": i, "audio_base64": task.result(), "t_ms": elapsed_ms()}
+
+            if next_item is not None and next_item in done:
+                item = next_item.result()
+                if item is _END:
+                    next_item = None
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield "text", {"index": index, "text": item, "t_ms": elapsed_ms()}
+                    pending.append((index, asyncio.ensure_future(run_stage("tts", synthesize, item))))
+                    index += 1
+                    next_item = asyncio.ensure_future(queue.get())
+    finally:
+        if next_item is not None:
+            next_item.cancel()
+        # 클라이언트가 끊겨도 GPT 스트림은 스레드에서 끝까지 소비되고 조용히 종료됨
+        for _, task in pending:
+            task.cancel()
@@ -0,0 +1,41 @@
+# gunicorn.conf.py
+# 멀티 워커 공유 모델 모드
+#   gunicorn app.main:app -c gunicorn.conf.py
+# 마스터에서 모델을 한 번 로딩하고 fork 하므로 워커 수만큼 가중치가 복제되지 않음
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def when_ready(server):
+    # 워커 fork 직전 마스터에서 실행
+    from app.shared_model import GUNICORN_MASTER_ENV, prepare_shared_model
+    # 워커가 물려받음 → /debug/memory가 gunicorn 워커만 골라 봄
+    os.environ[GUNICORN_MASTER_ENV] = str(os.getpid())
+    prepare_shared_model()
+
+    # 앱 로딩 중 마스터에서 연 SQLite 연결은 fork 전에 닫음 (워커는 각자 처음 쓸 때 새로 연결)
+    from app import content_db, database
+    from app.emotion_cache import chunk_cache, emotion_cache
+    for cache in (emotion_cache, chunk_cache):
+        if cache.disk is not None:
+            cache.disk.close()
+    content_db.close()
+    database.engine.dispose()
+
+
+def post_fork(server, worker):
+    # 마스터의 커넥션 풀을 물려받았으면 닫지 않고 버림 (마스터 쪽 연결에 영향 없도록)
+    from app import database
+    database.engine.dispose(close=False)
+
+    # fork 후 torch 스레드 수를 실제 워커 수(-w / WEB_CONCURRENCY)에 맞게 나눔
+    threads = int(os.getenv("EMOTION_WORKER_TORCH_THREADS", "0")) or max(1, (os.cpu_count() or 1) // server.cfg.workers)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
@@ -1,6 +1,8 @@
 import sqlite3
 import random
 
+from utils.content_sampler import content_sampler
+
 # 주요 감정별 추천 콘텐츠 감정군 (라벨맵 내 긍정 감정만 엄선)
 emotion_groups = {
     "기쁨": ["기쁨", "신남", "희열", "쾌감", "설렘", "편안", "후련함", "감사", "사랑", "공감", "기대"],
@@ -17,11 +19,15 @@ DB_PATH = "data/emotion.db"
 def get_connection():
     return sqlite3.connect(DB_PATH)
 
-def recommend_content(user_emotion):
+def recommend_content(user_emotion, seed=None):
+    """감정군 태그가 달린 콘텐츠를 테이블마다 하나씩 무작위 추천 (seed가 같으면 같은 결과, 예: daily_seed(user_id))"""
     if user_emotion not in emotion_groups:
         return {"error": f"지원하지 않는 감정입니다: {user_emotion}"}
 
-    target_emotions = emotion_groups[user_emotion]
+    target_emotions = tuple(emotion_groups[user_emotion])
+    # 감정군별 id 배열에서 O(1)로 뽑고 해당 행만 조회 (ORDER BY RANDOM() 전체 정렬 없음)
+    sampler = content_sampler(DB_PATH)
+    rng = random.Random(seed) if seed is not None else random
 
     conn = get_connection()
     cur = conn.cursor()
@@ -38,17 +44,14 @@ def recommend_content(user_emotion):
 
     # 테이블별 추천 쿼리
     for table, img_field in table_image_field.items():
-        # 감정태그 조건문 만들기 (LIKE 문 여러개 OR 결합)
-        like_clauses = " OR ".join(
-            [f"emotion_tags LIKE '%{emotion}%'" for emotion in target_emotions]
+        ids = sampler.sample(table, 1, emotions=target_emotions, rng=rng)
+        if not ids:
+            results[table] = None
+            continue
+        cur.execute(
+            f"SELECT title, url {', ' + img_field if img_field else ''} FROM {table} WHERE id = ?",
+            (ids[0],)
         )
-        query = f"""
-            SELECT title, url {', ' + img_field if img_field else ''} FROM {table}
-            WHERE {like_clauses}
-            ORDER BY RANDOM()
-            LIMIT 1
-        """
-        cur.execute(query)
         row = cur.fetchone()
         if row:
             content = {
@@ -0,0 +1,45 @@
+# ✅ scripts/backfill_diary_emotions.py
+# 확률 벡터가 없는 기존 일기를 한 번만 분석해서 diaries.probs / diary_emotions 채우기
+#   python scripts/backfill_diary_emotions.py [--batch-size 32]
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+
+from app import database, model
+from app.diary_emotions import set_diary_emotions
+from app.emotion_cache import predict_probs_chunked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기존 일기 감정 확률 백필")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    model.Base.metadata.create_all(bind=database.engine)
+    database.add_missing_columns("diaries", {"probs": "BLOB"})
+
+    db = database.SessionLocal()
+    done = 0
+    try:
+        while True:
+            diaries = db.query(model.Diary).filter(
+                model.Diary.probs.is_(None),
+                model.Diary.content.isnot(None)
+            ).limit(args.batch_size).all()
+            if not diaries:
+                break
+            for diary in diaries:
+                probs, _ = predict_probs_chunked(diary.content)
+                set_diary_emotions(diary, probs)
+            db.commit()
+            done += len(diaries)
+            print(f"✅ {done}개 처리")
+    finally:
+        db.close()
+
+    print(f"\n✅ 총 백필된 일기 수: {done}")
+
+
+if __name__ == "__main__":
+    main()
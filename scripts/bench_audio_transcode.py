@@ -0,0 +1,64 @@
+# ✅ scripts/bench_audio_transcode.py
+# 음성 한 턴의 m4a → flac 변환 지연시간 비교
+#   legacy : 임시 m4a 저장 → pydub로 flac 파일 저장 → 다시 읽기 (이전 방식)
+#   memory : ffmpeg stdin/stdout 파이프 (app.audio.transcode_to_flac)
+#   python scripts/bench_audio_transcode.py sample.m4a [--runs 20]
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import statistics
+import tempfile
+import time
+
+from app.audio import transcode_to_flac
+
+
+def legacy_transcode(audio_bytes: bytes) -> bytes:
+    from pydub import AudioSegment
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".m4a") as tmp:
+        tmp.write(audio_bytes)
+        m4a_path = tmp.name
+    flac_path = m4a_path.replace(".m4a", ".flac")
+    try:
+        sound = AudioSegment.from_file(m4a_path, format="m4a")
+        sound = sound.set_channels(2)
+        sound.export(flac_path, format="flac")
+        with open(flac_path, "rb") as f:
+            return f.read()
+    finally:
+        # 벤치마크에서는 디스크가 차지 않도록 정리
+        for path in (m4a_path, flac_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def measure(fn, audio_bytes, runs):
+    fn(audio_bytes)  # 워밍업
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = fn(audio_bytes)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="m4a → flac 변환 지연시간 비교")
+    parser.add_argument("audio", help="m4a 파일")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.audio, "rb") as f:
+        audio_bytes = f.read()
+
+    print(f"{'방식':<8} {'p50(ms)':>9} {'p95(ms)':>9} {'flac 크기':>10}")
+    for name, fn in (("legacy", legacy_transcode), ("memory", transcode_to_flac)):
+        p50, p95, size = measure(fn, audio_bytes, args.runs)
+        print(f"{name:<8} {p50:>9.1f} {p95:>9.1f} {size:>10}")
+
+
+if __name__ == "__main__":
+    main()
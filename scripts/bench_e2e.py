@@ -0,0 +1,178 @@
+# ✅ scripts/bench_e2e.py
+# 주요 API 종단 간 벤치마크: 엔드포인트별 처리량(req/s), p50/p95/p99 지연시간, 오류 수
+#   python scripts/bench_e2e.py                                     # 가짜 외부 서비스(scripts/fakes.py) + 임시 DB로 앱을 직접 구동
+#   FAKE_OPENAI_FAILURE_RATE=0.05 python scripts/bench_e2e.py       # 실패 주입
+#   python scripts/bench_e2e.py --url http://localhost:8000          # python scripts/fakes.py serve 로 띄운 서버 대상
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import asyncio
+import base64
+import random
+import subprocess
+import time
+
+import httpx
+
+import fakes
+
+ENDPOINTS = ("upload-base64", "generate-question", "diary-text", "recommend")
+AUTH = {"Authorization": "Bearer fake:bench-user"}
+
+DIARIES = [
+    "오늘은 회사에서 발표가 있었는데 생각보다 잘 끝나서 기분이 좋았다. 저녁에는 친구와 맛있는 것을 먹었다.",
+    "아침부터 비가 와서 우울했다. 해야 할 일은 많은데 손에 잡히지 않아 불안하다.",
+    "시험이 얼마 남지 않아 걱정이다. 그래도 오늘은 계획한 공부를 다 해서 조금은 뿌듯하다.",
+    "오랜만에 가족들과 여행을 다녀왔다. 바다를 보니 마음이 편안해졌다.",
+]
+EMOTIONS = ["기쁨", "슬픔", "불안", "분노", None]
+
+
+def synthetic_audio() -> bytes:
+    """무음 0.5초 + 톤 2초 + 무음 0.5초 m4a (실제 ffmpeg 전처리 경로를 태우기 위함)"""
+    cmd = [
+        os.getenv("FFMPEG_BIN", "ffmpeg"), "-hide_banner", "-loglevel", "error", "-nostdin",
+        "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo:d=0.5",
+        "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100:duration=2",
+        "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo:d=0.5",
+        "-filter_complex", "[1]aformat=channel_layouts=stereo[t];[0][t][2]concat=n=3:v=0:a=1",
+        "-c:a", "aac", "-movflags", "frag_keyframe+empty_moov", "-f", "ipod", "pipe:1",
+    ]
+    return subprocess.run(cmd, capture_output=True, check=True).stdout
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class Workload:
+    def __init__(self, client, diary_ids, audio_b64):
+        self.client = client
+        self.diary_ids = diary_ids
+        self.audio_b64 = audio_b64
+        self.rng = random.Random(0)
+
+    def request(self, name):
+        if name == "upload-base64":
+            return self.client.post("/upload-base64", json={
+                "audio_base64": self.audio_b64, "diary_id": self.rng.choice(self.diary_ids),
+            })
+        if name == "generate-question":
+            return self.client.post("/generate-question", json={
+                "diary_id": self.rng.choice(self.diary_ids), "response_format": "url",
+            })
+        if name == "diary-text":
+            return self.client.post("/diary/text", headers=AUTH, json={
+                "text": self.rng.choice(DIARIES), "date": "2025-01-01",
+            })
+        emotion = self.rng.choice(EMOTIONS)
+        return self.client.get("/api/recommend", params={"emotion": emotion or ""})
+
+
+async def run_endpoint(workload, name, concurrency, total):
+    latencies, errors = [], 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                res = await workload.request(name)
+                ok = res.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+    }
+
+
+async def make_diaries(client, count):
+    ids = []
+    for text in DIARIES[:count]:
+        res = await client.post("/diary/text", headers=AUTH, json={"text": text, "date": "2025-01-01"})
+        res.raise_for_status()
+        ids.append(res.json()["diary"]["id"])
+    return ids
+
+
+async def main_async(args):
+    cleanup = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=120)
+        lifespan = None
+    else:
+        # 벤치마크 일기 / 대화 기록이 실제 app/diary.db에 쌓이지 않도록 임시 저장소 사용
+        _, cleanup = fakes.isolate_storage("bench_e2e_")
+        from app.main import app
+        fakes.install()
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+        lifespan = app.router.lifespan_context(app)
+
+    if args.audio:
+        with open(args.audio, "rb") as f:
+            audio = f.read()
+    else:
+        audio = synthetic_audio()
+
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            diary_ids = await make_diaries(client, args.diaries)
+            workload = Workload(client, diary_ids, base64.b64encode(audio).decode())
+
+            print(f"동시 요청 {args.concurrency}, 엔드포인트당 {args.requests}건")
+            print(f"{'endpoint':<18} {'ok':>5} {'err':>5} {'req/s':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}")
+            for name in args.endpoints:
+                # 워밍업 (모델 로딩, 캐시 등)
+                for _ in range(args.warmup):
+                    await workload.request(name)
+                r = await run_endpoint(workload, name, args.concurrency, args.requests)
+                print(f"{name:<18} {r['ok']:>5} {r['errors']:>5} {r['rps']:>8.2f} "
+                      f"{r['p50']:>9.0f} {r['p95']:>9.0f} {r['p99']:>9.0f}")
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    if not args.url:
+        print("가짜 서비스 호출:", fakes.stats())
+        cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주요 API 종단 간 지연시간 / 처리량 벤치마크")
+    parser.add_argument("--url", help="대상 서버 (없으면 가짜 외부 서비스로 앱을 직접 구동)")
+    parser.add_argument("--audio", help="/upload-base64에 보낼 m4a (없으면 ffmpeg로 합성)")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=80, help="엔드포인트당 요청 수")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--diaries", type=int, default=len(DIARIES), help="대화에 쓸 일기 수")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# ✅ scripts/bench_recommend.py
+# 추천 요청(콘텐츠 4종) 한 번의 지연시간 비교
+#   legacy  : 콘텐츠마다 sqlite3.connect + LIKE '%감정%' 전체 스캔 (이전 방식)
+#   pooled  : 스레드별 읽기 전용 연결 재사용 + 4종을 UNION ALL 한 문장으로 (app.content_db, RECOMMEND_SOURCE=db)
+#   catalog : 메모리 카탈로그 + 감정 역색인 (app.recommend_catalog)
+#   python scripts/bench_recommend.py                  # data/emotion.db
+#   python scripts/bench_recommend.py --scale 20000    # 임시 복사본에 콘텐츠별 가짜 항목 20000개 추가
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from app.content_db import fetch_recommendations
+from app.recommend_catalog import CONTENT_TYPES, RESULT_LIMIT, catalog_store
+from utils.db_utils import ensure_content_schema, set_content_emotions
+from utils.emotion_labels import label_map
+
+EMOTIONS = ["우울", "설렘", "감사", "외로움", "희망", "기쁨", ""]
+
+
+def legacy_request(emotion, db_path):
+    return {content_type: legacy_recommendations(content_type, emotion, db_path) for content_type in CONTENT_TYPES}
+
+
+def pooled_request(emotion, db_path):
+    return fetch_recommendations(db_path, emotion)
+
+
+def catalog_request(emotion, db_path):
+    catalog = catalog_store(db_path).get()
+    return {
+        content_type: table.latest(emotion, RESULT_LIMIT) if emotion else table.sample(RESULT_LIMIT)
+        for content_type, table in catalog.tables.items()
+    }
+
+
+def legacy_recommendations(content_type, emotion, db_path):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    image_field = CONTENT_TYPES[content_type]
+    select_fields = "title, url, emotion_tags" + (f", {image_field}" if image_field else "")
+    if emotion:
+        cursor.execute(
+            f"SELECT {select_fields} FROM {content_type} WHERE emotion_tags LIKE ? ORDER BY id DESC LIMIT {RESULT_LIMIT}",
+            (f"%{emotion}%",),
+        )
+    else:
+        cursor.execute(f"SELECT {select_fields} FROM {content_type} ORDER BY RANDOM() LIMIT {RESULT_LIMIT}")
+    results = cursor.fetchall()
+    conn.close()
+    content_list = []
+    for row in results:
+        content = {"title": row[0], "url": row[1], "emotion_tags": row[2]}
+        if image_field:
+            content["image"] = row[3]
+        content_list.append(content)
+    return content_list
+
+
+def scaled_copy(db_path, rows):
+    """원본을 임시 파일로 복사한 뒤 콘텐츠별로 가짜 항목 추가"""
+    tmp_dir = tempfile.mkdtemp(prefix="bench_recommend_")
+    path = os.path.join(tmp_dir, "emotion.db")
+    shutil.copy(db_path, path)
+    labels = list(label_map.values())
+    rng = random.Random(0)
+    conn = sqlite3.connect(path)
+    ensure_content_schema(conn)
+    cur = conn.cursor()
+    for content_type in CONTENT_TYPES:
+        for i in range(rows):
+            tags = rng.sample(labels, 3)
+            cur.execute(
+                f"INSERT INTO {content_type} (title, url, emotion_tags) VALUES (?, ?, ?)",
+                (f"{content_type} {i}", f"https://example.com/{content_type}/{i}", ",".join(tags)),
+            )
+            set_content_emotions(cur, content_type, cur.lastrowid, tags)
+    conn.commit()
+    conn.close()
+    return path, tmp_dir
+
+
+def measure(fn, db_path, runs):
+    latencies = []
+    for i in range(runs):
+        emotion = EMOTIONS[i % len(EMOTIONS)]
+        start = time.perf_counter()
+        fn(emotion, db_path)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추천 요청 지연시간 비교 (SQLite LIKE vs 연결 재사용 한 문장 vs 메모리 카탈로그)")
+    parser.add_argument("--db", default=os.path.join("data", "emotion.db"))
+    parser.add_argument("--scale", type=int, default=0, help="콘텐츠별로 추가할 가짜 항목 수")
+    parser.add_argument("--runs", type=int, default=500)
+    args = parser.parse_args()
+
+    db_path, tmp_dir = (scaled_copy(args.db, args.scale) if args.scale else (args.db, None))
+    try:
+        start = time.perf_counter()
+        counts = catalog_store(db_path).get().counts()
+        print(f"카탈로그 로딩 {(time.perf_counter() - start) * 1000:.1f} ms, 항목 수 {counts}")
+
+        print(f"{'방식':<8} {'p50(ms)':>9} {'p95(ms)':>9}")
+        for name, fn in (("legacy", legacy_request), ("pooled", pooled_request), ("catalog", catalog_request)):
+            fn(EMOTIONS[0], db_path)  # 워밍업
+            p50, p95 = measure(fn, db_path, args.runs)
+            print(f"{name:<8} {p50:>9.3f} {p95:>9.3f}")
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
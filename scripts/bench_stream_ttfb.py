@@ -0,0 +1,164 @@
+# ✅ scripts/bench_stream_ttfb.py
+# /upload-base64 (한 번에 응답) vs /upload-base64/stream (SSE) 첫 바이트 / 첫 음성까지 시간 비교
+#   python scripts/bench_stream_ttfb.py --fake                     # 로컬 가짜 GPT(토큰 지연)/TTS로 앱을 직접 구동
+#   python scripts/bench_stream_ttfb.py --url http://localhost:8000 --audio sample.m4a --diary-id 1
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import asyncio
+import base64
+import json
+import statistics
+import time
+
+FAKE_RESPONSE = "많이 힘드셨겠어요. 오늘 하루를 버텨낸 것만으로도 정말 대단해요. 잠깐이라도 편하게 쉬어 보면 어떨까요?"
+
+
+def install_fakes(args):
+    """STT/GPT/TTS/DB를 time.sleep 기반 가짜로 교체 (GPT는 토큰 단위 지연)"""
+    from app import chatbot
+    from app.audio import PreparedAudio
+    from app.conversation_memory import ConversationContext
+
+    def sleep(ms):
+        time.sleep(ms / 1000)
+
+    tokens = [FAKE_RESPONSE[i:i + 2] for i in range(0, len(FAKE_RESPONSE), 2)]
+
+    def fake_stream(messages):
+        sleep(args.first_token_ms)
+        for token in tokens:
+            sleep(args.token_ms)
+            yield token
+
+    def fake_response(history, text):
+        sleep(args.mode_ms)
+        for _ in fake_stream(None):
+            pass
+        return "F", FAKE_RESPONSE
+
+    def fake_tts(text, mode="F"):
+        sleep(args.tts_ms + args.tts_ms_per_char * len(text))
+        return text.encode()
+
+    chatbot.prepare_for_stt = lambda audio_bytes: PreparedAudio(b"OggS", "OGG_OPUS", 16000, 1)
+    chatbot.transcribe_audio = lambda prepared: (sleep(args.stt_ms), "오늘 너무 힘들었어")[1]
+    chatbot.load_context = lambda db, diary_id, history: ConversationContext(turns=history or [], source="client")
+    chatbot.detect_mode = lambda text: (sleep(args.mode_ms), "F")[1]
+    chatbot.get_mode_and_response = fake_response
+    chatbot.stream_gpt_response = fake_stream
+    chatbot.synthesize_speech = fake_tts
+    chatbot.synthesize_speech_base64 = lambda text, mode="F": base64.b64encode(fake_tts(text, mode)).decode()
+    chatbot.save_chat_log_db = lambda **kwargs: None
+
+
+async def asgi_request(app, path, payload):
+    """ASGI 앱을 직접 호출하며 응답 바디 조각이 도착한 시각을 기록 (서버/네트워크 없이)"""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 0), "server": ("test", 80),
+    }
+    sent = False
+    chunks = []
+    start = time.perf_counter()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks.append((time.perf_counter() - start, message["body"]))
+
+    await app(scope, receive, send)
+    return chunks
+
+
+async def http_request(client, path, payload):
+    chunks = []
+    start = time.perf_counter()
+    async with client.stream("POST", path, json=payload, timeout=120) as res:
+        res.raise_for_status()
+        async for chunk in res.aiter_bytes():
+            chunks.append((time.perf_counter() - start, chunk))
+    return chunks
+
+
+def summarize(chunks, streaming):
+    """(첫 바이트, 첫 음성, 전체) 초"""
+    first_byte = chunks[0][0]
+    total = chunks[-1][0]
+    if not streaming:
+        return first_byte, total, total
+    buffer, first_audio = "", None
+    for t, chunk in chunks:
+        buffer += chunk.decode()
+        if first_audio is None and "event: audio" in buffer:
+            first_audio = t
+        if "event: error" in buffer:
+            raise RuntimeError(buffer[buffer.index("event: error"):])
+    return first_byte, first_audio, total
+
+
+async def main_async(args):
+    payload = {
+        "diary_id": args.diary_id,
+        "history": [{"user_input": "안녕", "response": "안녕하세요", "mode": "F"}],
+    }
+    if args.fake:
+        install_fakes(args)
+        from fastapi import FastAPI
+        from app.chatbot import router
+
+        app = FastAPI()
+        app.include_router(router)
+        payload["audio_base64"] = "ZmFrZQ=="
+
+        async def request(path):
+            return await asgi_request(app, path, payload)
+    else:
+        import httpx
+
+        with open(args.audio, "rb") as f:
+            payload["audio_base64"] = base64.b64encode(f.read()).decode()
+        client = httpx.AsyncClient(base_url=args.url)
+
+        async def request(path):
+            return await http_request(client, path, payload)
+
+    print(f"{'endpoint':<22} {'첫 바이트 p50(ms)':>18} {'첫 음성 p50(ms)':>16} {'전체 p50(ms)':>13}")
+    for path, streaming in (("/upload-base64", False), ("/upload-base64/stream", True)):
+        rows = [summarize(await request(path), streaming) for _ in range(args.runs)]
+        p50 = [statistics.median(col) * 1000 for col in zip(*rows)]
+        print(f"{path:<22} {p50[0]:>18.0f} {p50[1]:>16.0f} {p50[2]:>13.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="음성 응답 첫 바이트 / 첫 음성 시간 비교")
+    parser.add_argument("--fake", action="store_true", help="외부 API 없이 가짜 단계로 앱을 직접 구동")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--audio", help="전송할 m4a 파일 (--fake가 아닐 때)")
+    parser.add_argument("--diary-id", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--stt-ms", type=float, default=300)
+    parser.add_argument("--mode-ms", type=float, default=5)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=25)
+    parser.add_argument("--tts-ms", type=float, default=150)
+    parser.add_argument("--tts-ms-per-char", type=float, default=4)
+    args = parser.parse_args()
+
+    if not args.fake and not args.audio:
+        parser.error("--fake 또는 --audio 중 하나는 필요합니다.")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# ✅ scripts/check_audio_preprocess.py
+# STT 전처리 결과 확인: 모노 / 16kHz / 앞뒤 무음 제거 / 전송 크기 감소
+#   python scripts/check_audio_preprocess.py recordings/*.m4a   # 실제 녹음 파일들
+#   python scripts/check_audio_preprocess.py --synthetic        # 무음 1초 + 톤 2초 + 무음 1초 합성 파일
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import subprocess
+
+from app import audio
+from app.audio import prepare_for_stt, transcode_to_flac
+
+
+def synthetic_clip() -> bytes:
+    """앞뒤 1초 무음, 가운데 2초 440Hz 톤인 44.1kHz 스테레오 m4a"""
+    cmd = [
+        audio.FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-nostdin",
+        "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo:d=1",
+        "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100:duration=2",
+        "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo:d=1",
+        "-filter_complex", "[1]aformat=channel_layouts=stereo[t];[0][t][2]concat=n=3:v=0:a=1",
+        "-c:a", "aac", "-movflags", "frag_keyframe+empty_moov", "-f", "ipod", "pipe:1",
+    ]
+    return subprocess.run(cmd, capture_output=True, check=True).stdout
+
+
+def check(name, audio_bytes, expect_duration=None):
+    prepared = prepare_for_stt(audio_bytes)
+    legacy = transcode_to_flac(audio_bytes)
+    stats = prepared.stats
+    problems = []
+    if prepared.channels != audio.STT_CHANNELS:
+        problems.append(f"채널 {prepared.channels}")
+    if prepared.sample_rate != audio.STT_SAMPLE_RATE:
+        problems.append(f"샘플레이트 {prepared.sample_rate}")
+    if len(prepared.content) >= len(legacy):
+        problems.append("이전 FLAC보다 크거나 같음")
+    if expect_duration and not expect_duration[0] <= stats["duration_out"] <= expect_duration[1]:
+        problems.append(f"무음 제거 후 길이 {stats['duration_out']}s (기대 {expect_duration[0]}~{expect_duration[1]}s)")
+
+    print(f"{name}: {prepared.encoding} {len(prepared.content)} bytes (이전 FLAC {len(legacy)} bytes, "
+          f"{len(prepared.content) / len(legacy):.1%}), "
+          f"{stats['duration_in']}s → {stats['duration_out']}s "
+          f"{'✅' if not problems else '❌ ' + ', '.join(problems)}")
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--synthetic", action="store_true")
+    args = parser.parse_args()
+    if not args.files and not args.synthetic:
+        parser.error("파일 경로 또는 --synthetic 이 필요합니다.")
+
+    ok = True
+    if args.synthetic:
+        # 톤 2초 + 양쪽 여유(STT_SILENCE_PAD_SECONDS) 정도만 남아야 함
+        pad = audio.STT_SILENCE_PAD_SECONDS if audio.STT_TRIM_SILENCE else 1.0
+        ok &= check("synthetic", synthetic_clip(), (2.0 - 0.1, 2.0 + 2 * pad + 0.1))
+    for path in args.files:
+        with open(path, "rb") as f:
+            ok &= check(os.path.basename(path), f.read())
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
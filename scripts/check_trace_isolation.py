@@ -0,0 +1,102 @@
+# ✅ scripts/check_trace_isolation.py
+# 요청별 Trace(Server-Timing) 분리 확인: 일기 저장 후 백그라운드 첫 질문 미리 생성(app/question_prefetch.py)의
+# gpt / tts 단계가 요청 Trace에 섞이지 않고 pipeline="question_prefetch"로만 기록되는지
+#   python scripts/check_trace_isolation.py     # 가짜 외부 서비스(scripts/fakes.py) + 임시 DB로 앱을 직접 구동
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import asyncio
+
+import httpx
+
+import fakes
+
+AUTH = {"Authorization": "Bearer fake:trace-check"}
+DIARIES = [
+    "오늘은 회사에서 발표가 있었는데 생각보다 잘 끝나서 기분이 좋았다.",
+    "아침부터 비가 와서 우울했다. 해야 할 일은 많은데 손에 잡히지 않아 불안하다.",
+    "시험이 얼마 남지 않아 걱정이다. 그래도 계획한 공부를 다 해서 조금은 뿌듯하다.",
+    "오랜만에 가족들과 여행을 다녀왔다. 바다를 보니 마음이 편안해졌다.",
+    "친구와 다퉈서 하루 종일 마음이 무거웠다.",
+    "새로 시작한 운동이 조금씩 익숙해져서 뿌듯하다.",
+]
+
+
+async def wait_prefetch(prefetcher, timeout=60.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        stats = prefetcher.stats()
+        if stats["queued"] == 0 and stats["in_flight"] == 0:
+            return stats
+        await asyncio.sleep(0.05)
+    raise TimeoutError("첫 질문 미리 생성이 끝나지 않음")
+
+
+async def main_async(args):
+    _, cleanup = fakes.isolate_storage("check_trace_")
+    from app import metrics
+    from app.chatbot import question_prefetcher
+    from app.main import app
+    fakes.install()
+
+    # 만들어지는 Trace를 모두 모아 둠 (요청 Trace는 pipeline="analyze_and_save"로 구분)
+    traces = []
+
+    class RecordingTrace(metrics.Trace):
+        __slots__ = ()
+
+        def __init__(self):
+            super().__init__()
+            traces.append(self)
+
+    metrics.Trace = RecordingTrace
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check", timeout=120)
+    lifespan = app.router.lifespan_context(app)
+    problems = []
+    async with client:
+        await lifespan.__aenter__()
+        try:
+            # 응답 직후 각 요청 Trace의 span 목록
+            at_response = []
+            for i in range(args.diaries):
+                res = await client.post("/diary/text", headers=AUTH, json={
+                    "text": DIARIES[i % len(DIARIES)] + f" ({i})", "date": f"2025-01-{i + 1:02d}",
+                })
+                res.raise_for_status()
+                trace = next(t for t in reversed(traces) if t.pipeline == "analyze_and_save")
+                at_response.append((trace, list(trace.spans)))
+            stats = await wait_prefetch(question_prefetcher)
+            metrics_text = (await client.get("/metrics")).text
+        finally:
+            await lifespan.__aexit__(None, None, None)
+            cleanup()
+
+    for i, (trace, spans) in enumerate(at_response):
+        extra = trace.spans[len(spans):]
+        if extra:
+            problems.append(f"요청 {i + 1}의 Trace에 응답 후 span {len(extra)}개 추가: {[name for name, _ in extra]}")
+    if stats["completed"] < 1:
+        problems.append(f"미리 생성 완료 0건 ({stats})")
+    if 'pipeline_stage_seconds_count{pipeline="question_prefetch",stage="gpt"}' not in metrics_text:
+        problems.append('/metrics에 pipeline="question_prefetch" gpt 단계 없음')
+    for stage in ("gpt", "tts"):
+        if f'pipeline_stage_seconds_count{{pipeline="analyze_and_save",stage="{stage}"}}' in metrics_text:
+            problems.append(f'/metrics의 pipeline="analyze_and_save"에 {stage} 단계가 섞임')
+
+    print(f"일기 저장 {args.diaries}건, 미리 생성 {stats['completed']}건 완료")
+    print("✅ 요청 Trace 분리됨" if not problems else "❌ " + "\n❌ ".join(problems))
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="요청별 Trace와 백그라운드 작업 Trace 분리 확인")
+    parser.add_argument("--diaries", type=int, default=6, help="저장할 일기 수")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main_async(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# ✅ scripts/emotion_onnx.py
+# ONNX 감정 분류 백엔드 도구
+#   python scripts/emotion_onnx.py export            # torch → ONNX(int8) 변환 (1회)
+#   python scripts/emotion_onnx.py check             # 고정 샘플에서 torch 대비 오차 검증
+#   python scripts/emotion_onnx.py bench             # 백엔드별 p50/p99 지연시간 + 메모리 비교
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import multiprocessing
+import statistics
+import time
+
+from app.emotion_backends import ONNX_DIR, export_onnx, load_backend
+
+# 검증/벤치마크용 고정 샘플
+SAMPLES = [
+    "오늘은 정말 행복한 하루였다. 친구들과 맛있는 저녁을 먹었다.",
+    "시험을 망쳐서 너무 속상하고 우울하다.",
+    "내일 발표가 있는데 잘할 수 있을지 걱정된다.",
+    "오랜만에 가족들과 여행을 가서 마음이 편안했다.",
+    "팀장님이 내 말을 무시해서 화가 났다.",
+    "혼자 있는 시간이 길어지니 외롭다는 생각이 든다.",
+    "합격 소식을 듣고 너무 기뻐서 소리를 질렀다.",
+    "갑자기 연락이 끊긴 친구 때문에 서운하다.",
+    "새로운 프로젝트를 시작하게 되어 설렌다.",
+    "아무것도 하기 싫고 그냥 누워만 있었다.",
+    "길에서 넘어져서 창피했다.",
+    "엄마가 보고 싶어서 눈물이 났다.",
+]
+
+
+def _rss_mb():
+    # 현재 프로세스 RSS (Linux)
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def cmd_export(args):
+    path = export_onnx(args.output, quantize=not args.no_quantize)
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    print(f"✅ ONNX 모델 저장: {path} ({size_mb:.1f} MB)")
+
+
+def cmd_check(args):
+    torch_probs = load_backend("torch").predict_probs(SAMPLES)
+    onnx_probs = load_backend("onnx").predict_probs(SAMPLES)
+
+    label_mismatch = 0
+    max_prob_dev = 0.0
+    max_conf_dev = 0.0
+    for text, t, o in zip(SAMPLES, torch_probs, onnx_probs):
+        t_top = max(range(len(t)), key=t.__getitem__)
+        o_top = max(range(len(o)), key=o.__getitem__)
+        if t_top != o_top:
+            label_mismatch += 1
+            print(f"❌ 라벨 불일치: {text} (torch={t_top}, onnx={o_top})")
+        max_prob_dev = max(max_prob_dev, max(abs(a - b) for a, b in zip(t, o)))
+        max_conf_dev = max(max_conf_dev, abs(t[t_top] - o[t_top]))
+
+    print(f"라벨 불일치: {label_mismatch}/{len(SAMPLES)} (허용 {args.max_label_mismatch})")
+    print(f"최대 확률 오차: {max_prob_dev:.4f} (허용 {args.max_prob_dev})")
+    print(f"최대 top-1 신뢰도 오차: {max_conf_dev:.4f}")
+
+    ok = label_mismatch <= args.max_label_mismatch and max_prob_dev <= args.max_prob_dev
+    print("✅ 통과" if ok else "❌ 실패")
+    sys.exit(0 if ok else 1)
+
+
+def _bench_worker(name, runs, batch_size, queue):
+    # 백엔드마다 별도 프로세스에서 측정해야 메모리 비교가 정확함
+    rss_before = _rss_mb()
+    backend = load_backend(name)
+    rss_loaded = _rss_mb()
+
+    texts = (SAMPLES * (batch_size // len(SAMPLES) + 1))[:batch_size]
+    for _ in range(3):
+        backend.predict_probs(texts)  # 워밍업
+
+    latencies = []
+    for i in range(runs):
+        batch = texts if batch_size > 1 else [SAMPLES[i % len(SAMPLES)]]
+        start = time.perf_counter()
+        backend.predict_probs(batch)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    queue.put({
+        "backend": name,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "model_rss_mb": rss_loaded - rss_before,
+        "peak_rss_mb": _rss_mb(),
+    })
+
+
+def cmd_bench(args):
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for name in args.backends:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_bench_worker, args=(name, args.runs, args.batch_size, queue))
+        proc.start()
+        results.append(queue.get())
+        proc.join()
+
+    print(f"\n📊 배치 크기 {args.batch_size}, {args.runs}회")
+    print(f"{'backend':<8} {'p50(ms)':>9} {'p99(ms)':>9} {'모델 RSS(MB)':>13} {'전체 RSS(MB)':>13}")
+    for r in results:
+        print(f"{r['backend']:<8} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['model_rss_mb']:>13.1f} {r['peak_rss_mb']:>13.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX 감정 분류 백엔드 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("export", help="torch 모델을 ONNX(int8)로 변환")
+    p.add_argument("--output", default=ONNX_DIR)
+    p.add_argument("--no-quantize", action="store_true", help="양자화 없이 fp32로 저장")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("check", help="고정 샘플에서 torch 대비 오차 검증")
+    p.add_argument("--max-label-mismatch", type=int, default=0)
+    p.add_argument("--max-prob-dev", type=float, default=0.05)
+    p.set_defaults(func=cmd_check)
+
+    p = sub.add_parser("bench", help="백엔드별 지연시간/메모리 비교")
+    p.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    p.add_argument("--runs", type=int, default=200)
+    p.add_argument("--batch-size", type=int, default=1)
+    p.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
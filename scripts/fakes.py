@@ -0,0 +1,226 @@
+# ✅ scripts/fakes.py
+# 외부 유료 API(OpenAI, Google STT/TTS, Firebase) 대신 쓰는 로컬 가짜 클라이언트
+# SDK와 같은 인터페이스로 지연 시간만 흉내 내고, 설정한 비율로 실패를 주입 → 부하 테스트 / 성능 회귀 측정용
+# 가짜 Firebase는 아무 'fake:<uid>' 토큰이나 통과시키므로 앱 패키지에는 넣지 않고 벤치마크 / 테스트에서만 install()
+#   python scripts/fakes.py serve --port 8000    # 가짜 서비스 + 임시 DB로 서버 실행 (bench_e2e.py --url 대상)
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import hashlib
+import random
+import shutil
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+JITTER = float(os.getenv("FAKE_JITTER", "0.2"))
+_rng = random.Random(int(os.getenv("FAKE_SEED", "42")))
+_rng_lock = threading.Lock()
+
+
+class FakeServiceError(RuntimeError):
+    pass
+
+
+class FakeService:
+    """지연 시간(ms, ±JITTER) + 실패 비율. FAKE_<NAME>_LATENCY_MS / FAKE_<NAME>_FAILURE_RATE 로 설정"""
+
+    def __init__(self, name: str, latency_ms: float, failure_rate: float = 0.0):
+        prefix = f"FAKE_{name.upper()}"
+        self.name = name
+        self.latency_ms = float(os.getenv(f"{prefix}_LATENCY_MS", str(latency_ms)))
+        self.failure_rate = float(os.getenv(f"{prefix}_FAILURE_RATE", str(failure_rate)))
+        self.calls = 0
+        self.failures = 0
+
+    def call(self, latency_ms: float = None):
+        with _rng_lock:
+            jitter = _rng.uniform(1 - JITTER, 1 + JITTER)
+            fail = _rng.random() < self.failure_rate
+            self.calls += 1
+            self.failures += fail
+        time.sleep(max(0.0, (self.latency_ms if latency_ms is None else latency_ms) * jitter) / 1000)
+        if fail:
+            raise FakeServiceError(f"{self.name}: 주입된 실패")
+
+
+openai_service = FakeService("openai", 600)
+stt_service = FakeService("stt", 300)
+tts_service = FakeService("tts", 250)
+firebase_service = FakeService("firebase", 1)
+# 스트리밍 응답의 토큰 간격 (첫 토큰까지는 FAKE_OPENAI_LATENCY_MS)
+TOKEN_MS = float(os.getenv("FAKE_OPENAI_TOKEN_MS", "25"))
+
+REPLIES = [
+    "많이 힘드셨겠어요. 오늘 하루를 버텨낸 것만으로도 정말 대단해요.",
+    "그런 일이 있었군요. 지금 가장 마음에 걸리는 게 무엇인지 조금 더 이야기해 줄 수 있을까요?",
+    "우선 할 일을 작게 나눠 보면 어떨까요? 하나씩 끝내다 보면 부담이 줄어들 거예요.",
+]
+TRANSCRIPTS = [
+    "오늘 회사에서 너무 힘들었어",
+    "시험 준비를 어떻게 해야 할지 모르겠어",
+    "친구랑 다퉈서 마음이 안 좋아",
+]
+
+
+def _pick(options, seed: str):
+    return options[int(hashlib.md5(seed.encode("utf-8")).hexdigest(), 16) % len(options)]
+
+
+# ---------------------------------------------------------------- OpenAI
+def _reply_for(messages) -> str:
+    system = messages[0]["content"] if messages else ""
+    last = messages[-1]["content"] if messages else ""
+    if "모드 분류기" in system:
+        return _pick(["T", "F"], last)
+    if "요약하는 도우미" in system:
+        return "사용자는 최근 일상에서 스트레스를 받고 있으며, 챗봇은 공감과 작은 실천을 권했다."
+    if "첫 질문" in system:
+        return "오늘 일기를 읽어 보니 마음이 복잡했을 것 같아요. 어떤 순간이 가장 기억에 남았나요?"
+    return _pick(REPLIES, last)
+
+
+def _completion(content: str, messages):
+    prompt_tokens = sum(len(m["content"]) for m in messages)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(content)),
+    )
+
+
+def _stream(content: str):
+    openai_service.call()
+    for i in range(0, len(content), 2):
+        time.sleep(TOKEN_MS / 1000)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + 2]))])
+
+
+class _Completions:
+    def create(self, model=None, messages=None, stream=False, **kwargs):
+        content = _reply_for(messages or [])
+        if stream:
+            return _stream(content)
+        openai_service.call()
+        return _completion(content, messages or [])
+
+
+class FakeOpenAI:
+    def __init__(self, *args, **kwargs):
+        self.chat = SimpleNamespace(completions=_Completions())
+
+
+fake_openai_module = SimpleNamespace(OpenAI=FakeOpenAI, api_key=None)
+
+
+# ---------------------------------------------------------------- Google STT / TTS
+class _Message(SimpleNamespace):
+    """RecognitionConfig 등 proto 메시지 대용 (키워드 인자 + 속성 대입)"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+
+class FakeSpeechClient:
+    def __init__(self, credentials=None):
+        pass
+
+    def recognize(self, config=None, audio=None):
+        stt_service.call()
+        content = getattr(audio, "content", b"") or b""
+        transcript = _pick(TRANSCRIPTS, hashlib.md5(content).hexdigest())
+        return SimpleNamespace(results=[SimpleNamespace(alternatives=[SimpleNamespace(transcript=transcript)])])
+
+
+class FakeTextToSpeechClient:
+    def __init__(self, credentials=None):
+        pass
+
+    def synthesize_speech(self, input=None, voice=None, audio_config=None):
+        ssml = getattr(input, "ssml", "") or ""
+        # 문장 길이에 비례해 지연 / 크기 증가 (mp3 약 24kbps 기준 글자당 ~0.15초)
+        tts_service.call(tts_service.latency_ms + 2 * len(ssml))
+        digest = hashlib.sha256(ssml.encode("utf-8")).digest()
+        return SimpleNamespace(audio_content=b"ID3" + digest * max(1, len(ssml) * 14 // len(digest)))
+
+
+fake_speech_module = SimpleNamespace(
+    SpeechClient=FakeSpeechClient,
+    RecognitionAudio=_Message,
+    RecognitionConfig=type("RecognitionConfig", (_Message,), {
+        "AudioEncoding": SimpleNamespace(FLAC="FLAC", OGG_OPUS="OGG_OPUS", LINEAR16="LINEAR16"),
+    }),
+)
+fake_texttospeech_module = SimpleNamespace(
+    TextToSpeechClient=FakeTextToSpeechClient,
+    SynthesisInput=_Message,
+    VoiceSelectionParams=_Message,
+    AudioConfig=_Message,
+    SsmlVoiceGender=SimpleNamespace(FEMALE="FEMALE", MALE="MALE", NEUTRAL="NEUTRAL"),
+    AudioEncoding=SimpleNamespace(MP3="MP3", OGG_OPUS="OGG_OPUS", LINEAR16="LINEAR16"),
+)
+
+
+# ---------------------------------------------------------------- Firebase
+class FakeFirebaseAuth:
+    """'fake:<uid>' 형식 토큰만 통과"""
+
+    @staticmethod
+    def verify_id_token(id_token: str) -> dict:
+        firebase_service.call()
+        if not id_token.startswith("fake:") or len(id_token) <= len("fake:"):
+            raise ValueError("invalid fake token")
+        return {"uid": id_token[len("fake:"):]}
+
+
+def stats():
+    return {
+        s.name: {"calls": s.calls, "failures": s.failures, "latency_ms": s.latency_ms, "failure_rate": s.failure_rate}
+        for s in (openai_service, stt_service, tts_service, firebase_service)
+    }
+
+
+def isolate_storage(prefix: str = "fake_services_"):
+    """앱을 import하기 전에 호출: 일기 DB / 감정 캐시 / 음성 저장소(TTS 캐시 포함)를 임시 디렉터리로 → (디렉터리, 정리 함수)"""
+    tmp_dir = tempfile.mkdtemp(prefix=prefix)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'diary.db')}"
+    os.environ["EMOTION_CACHE_DB_PATH"] = os.path.join(tmp_dir, "emotion_cache.db")
+    os.environ["AUDIO_STORE_DIR"] = os.path.join(tmp_dir, "audio_store")
+    return tmp_dir, lambda: shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def install():
+    """앱의 외부 SDK 지연 로딩 지점을 가짜로 교체"""
+    from app import chatbot, firebase_auth
+
+    chatbot._openai.set(fake_openai_module)
+    chatbot._google_cloud.set((fake_speech_module, fake_texttospeech_module, None))
+    chatbot._google_credentials.set(None)
+    chatbot._speech_client.set(FakeSpeechClient())
+    chatbot._tts_client.set(FakeTextToSpeechClient())
+    firebase_auth._firebase_auth.set(FakeFirebaseAuth)
+    print("⚠️ 외부 서비스 가짜 모드: OpenAI / Google STT·TTS / Firebase 호출이 로컬 가짜로 대체됨")
+
+
+def main():
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="가짜 외부 서비스 + 임시 저장소로 서버 실행 (부하 테스트용, 운영 금지)")
+    parser.add_argument("command", choices=["serve"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    _, cleanup = isolate_storage()
+    try:
+        from app.main import app
+        install()
+        uvicorn.run(app, host=args.host, port=args.port)
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
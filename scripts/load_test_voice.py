@@ -0,0 +1,96 @@
+# ✅ scripts/load_test_voice.py
+# /upload-base64 동시 대화 부하 테스트: 동시 대화 수를 늘리며 처리량(turns/s) 측정
+#   python scripts/load_test_voice.py --fake                       # 외부 API 대신 지연만 흉내 낸 가짜 단계로 앱을 직접 구동
+#   python scripts/load_test_voice.py --url http://localhost:8000 --audio sample.m4a --diary-id 1
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import asyncio
+import base64
+import statistics
+import time
+
+import httpx
+
+
+def install_fakes(latency):
+    """ffmpeg/STT/GPT/TTS/DB를 time.sleep 기반 가짜로 교체 (블로킹 특성은 그대로 유지)"""
+    from app import chatbot
+    from app.audio import PreparedAudio
+
+    def sleep(stage):
+        time.sleep(latency[stage] / 1000)
+
+    chatbot.prepare_for_stt = lambda audio_bytes: (sleep("ffmpeg"), PreparedAudio(b"OggS", "OGG_OPUS", 16000, 1))[1]
+    chatbot.transcribe_audio = lambda prepared: (sleep("stt"), "오늘 너무 힘들었어")[1]
+    chatbot.get_mode_and_response = lambda history, text: (sleep("gpt"), ("F", "많이 힘드셨겠어요."))[1]
+    chatbot.synthesize_speech = lambda text, mode="F": (sleep("tts"), b"fake mp3")[1]
+    chatbot.save_chat_log_db = lambda **kwargs: sleep("db")
+
+
+async def run_level(client, payload, concurrency, turns_per_conversation):
+    latencies = []
+
+    async def conversation():
+        for _ in range(turns_per_conversation):
+            start = time.perf_counter()
+            res = await client.post("/upload-base64", json=payload, timeout=120)
+            res.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(conversation() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, statistics.median(latencies) * 1000
+
+
+async def main_async(args):
+    if args.fake:
+        install_fakes({
+            "ffmpeg": args.ffmpeg_ms, "stt": args.stt_ms, "gpt": args.gpt_ms,
+            "tts": args.tts_ms, "db": args.db_ms,
+        })
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+        audio_b64 = "ZmFrZQ=="
+    else:
+        client = httpx.AsyncClient(base_url=args.url)
+        with open(args.audio, "rb") as f:
+            audio_b64 = base64.b64encode(f.read()).decode()
+
+    payload = {
+        "audio_base64": audio_b64,
+        "diary_id": args.diary_id,
+        "history": [{"user_input": "안녕", "response": "안녕하세요", "mode": "F"}],
+    }
+
+    print(f"{'동시 대화':>8} {'처리량(turn/s)':>15} {'p50(ms)':>9}")
+    async with client:
+        for level in args.levels:
+            throughput, p50 = await run_level(client, payload, level, args.turns)
+            print(f"{level:>8} {throughput:>15.2f} {p50:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/upload-base64 동시 대화 부하 테스트")
+    parser.add_argument("--fake", action="store_true", help="외부 API 없이 가짜 단계로 앱을 직접 구동")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--audio", help="전송할 m4a 파일 (--fake가 아닐 때)")
+    parser.add_argument("--diary-id", type=int, default=1)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--turns", type=int, default=3, help="대화당 턴 수")
+    parser.add_argument("--ffmpeg-ms", type=float, default=50)
+    parser.add_argument("--stt-ms", type=float, default=300)
+    parser.add_argument("--gpt-ms", type=float, default=600)
+    parser.add_argument("--tts-ms", type=float, default=300)
+    parser.add_argument("--db-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    if not args.fake and not args.audio:
+        parser.error("--fake 또는 --audio 중 하나는 필요합니다.")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# ✅ scripts/migrate_content_emotions.py
+# emotion.db 콘텐츠(books, movies, music, quotes)의 쉼표 문자열 emotion_tags를
+# content_emotions(content_type, content_id, emotion, weight) 테이블로 정규화 (여러 번 실행해도 같은 결과)
+#   python scripts/migrate_content_emotions.py [--db data/emotion.db]
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import sqlite3
+
+from utils.db_utils import CONTENT_TABLES, ensure_content_schema, set_content_emotions, split_tags
+
+
+def merge_duplicate_titles(cur, table):
+    """같은 제목(자연 키)이 여러 행이면 가장 오래된 행만 남기고 태그는 합침"""
+    cur.execute(f"SELECT title FROM {table} GROUP BY title HAVING COUNT(*) > 1")
+    merged = 0
+    for (title,) in cur.fetchall():
+        cur.execute(f"SELECT id, emotion_tags FROM {table} WHERE title = ? ORDER BY id", (title,))
+        rows = cur.fetchall()
+        keep_id = rows[0][0]
+        tags = split_tags(",".join(tags or "" for _, tags in rows))
+        cur.execute(f"UPDATE {table} SET emotion_tags = ? WHERE id = ?", (",".join(tags), keep_id))
+        for content_id, _ in rows[1:]:
+            cur.execute(f"DELETE FROM {table} WHERE id = ?", (content_id,))
+            cur.execute(
+                "DELETE FROM content_emotions WHERE content_type = ? AND content_id = ?",
+                (table, content_id)
+            )
+            merged += 1
+    return merged
+
+
+def migrate_table(cur, table):
+    merged = merge_duplicate_titles(cur, table)
+    cur.execute("DELETE FROM content_emotions WHERE content_type = ?", (table,))
+    cur.execute(f"SELECT id, emotion_tags FROM {table}")
+    rows = cur.fetchall()
+    for content_id, tags in rows:
+        set_content_emotions(cur, table, content_id, tags)
+    cur.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{table}_title ON {table} (title)")
+    cur.execute("SELECT COUNT(*) FROM content_emotions WHERE content_type = ?", (table,))
+    return len(rows), cur.fetchone()[0], merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="콘텐츠 감정 태그 정규화 마이그레이션")
+    parser.add_argument("--db", default=os.path.join("data", "emotion.db"))
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"DB 파일이 없습니다: {args.db}")
+
+    conn = sqlite3.connect(args.db)
+    try:
+        ensure_content_schema(conn)
+        cur = conn.cursor()
+        # 테이블 전체를 한 트랜잭션으로 (중간에 실패하면 원래대로)
+        cur.execute("BEGIN")
+        for table in CONTENT_TABLES:
+            items, tags, merged = migrate_table(cur, table)
+            print(f"✅ {table}: 항목 {items}개, 감정 태그 {tags}개" + (f", 중복 제목 {merged}개 병합" if merged else ""))
+        conn.commit()
+        conn.execute("ANALYZE")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
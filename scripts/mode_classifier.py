@@ -0,0 +1,125 @@
+# ✅ scripts/mode_classifier.py
+# 로컬 T/F 모드 분류기 학습 / 평가
+# 라벨은 GPT 분류 결과 (conversation_logs.mode 또는 {"text", "mode"} JSONL)
+#   python scripts/mode_classifier.py train [--data labels.jsonl] [--output app/resources/mode_classifier.json]
+#   python scripts/mode_classifier.py eval  [--data labels.jsonl] [--threshold 0.75] [--relabel]
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import json
+import random
+import time
+
+from app.mode_classifier import MODEL_PATH, CONFIDENCE_THRESHOLD, ModeClassifier, train
+
+
+def load_samples(path=None):
+    """[(text, mode)] — 파일이 없으면 DB의 대화 기록 사용 (첫 질문 행은 제외)"""
+    if path:
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        return [(r["text"], r["mode"]) for r in rows if r.get("mode") in ("T", "F")]
+
+    from app.database import SessionLocal
+    from app.model import ConversationLog, Diary
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(ConversationLog.user_input, ConversationLog.mode)
+            .join(Diary, Diary.id == ConversationLog.diary_id)
+            .filter(ConversationLog.user_input != Diary.content)  # /generate-question 행(일기 본문) 제외
+            .all()
+        )
+    finally:
+        db.close()
+    return [(text, mode) for text, mode in rows if text and mode in ("T", "F")]
+
+
+def cmd_train(args):
+    samples = load_samples(args.data)
+    if not samples:
+        print("❌ 학습 데이터가 없습니다.")
+        sys.exit(1)
+
+    random.Random(0).shuffle(samples)
+    split = int(len(samples) * (1 - args.holdout))
+    train_set, test_set = samples[:split], samples[split:]
+
+    init = None if args.from_scratch else ModeClassifier.load(MODEL_PATH)
+    clf = train(train_set, epochs=args.epochs, version=time.strftime("trained-%Y%m%d"), init=init)
+    if test_set:
+        correct = sum(clf.predict(text)[0] == mode for text, mode in test_set)
+        print(f"홀드아웃 정확도: {correct / len(test_set):.3f} ({len(test_set)}개)")
+
+    clf.save(args.output)
+    print(f"✅ 저장: {args.output} (n-gram {len(clf.weights)}개, 학습 {len(train_set)}개)")
+
+
+def cmd_eval(args):
+    samples = load_samples(args.data)
+    if args.relabel:
+        # 저장된 라벨 대신 지금 GPT로 다시 라벨링
+        from app.chatbot import detect_mode_gpt
+        samples = [(text, detect_mode_gpt(text)) for text, _ in samples]
+    if not samples:
+        print("❌ 평가 데이터가 없습니다.")
+        sys.exit(1)
+
+    clf = ModeClassifier.load(args.model)
+    agree = 0
+    confident = 0
+    confident_agree = 0
+    start = time.perf_counter()
+    for text, gpt_mode in samples:
+        mode, confidence = clf.predict(text)
+        agree += mode == gpt_mode
+        if confidence >= args.threshold:
+            confident += 1
+            confident_agree += mode == gpt_mode
+    per_item_ms = (time.perf_counter() - start) / len(samples) * 1000
+
+    print(f"📊 평가 샘플 {len(samples)}개 (모델 {clf.version})")
+    print(f"전체 GPT 일치율: {agree / len(samples):.3f}")
+    print(f"로컬 처리 비율 (확신도 ≥ {args.threshold}): {confident / len(samples):.3f}")
+    if confident:
+        print(f"로컬 처리분 GPT 일치율: {confident_agree / confident:.3f}")
+    print(f"평균 분류 시간: {per_item_ms:.3f} ms")
+
+    if args.sweep:
+        # 임계값별 로컬 처리 비율 / 로컬 처리분 일치율 → MODE_CONFIDENCE_THRESHOLD 정할 때 참고
+        predictions = [(clf.predict(text), gpt_mode) for text, gpt_mode in samples]
+        print(f"{'임계값':>6} {'로컬 비율':>9} {'로컬 일치율':>11}")
+        for threshold in (0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95):
+            local = [(mode, gpt_mode) for (mode, confidence), gpt_mode in predictions if confidence >= threshold]
+            agree_local = sum(mode == gpt_mode for mode, gpt_mode in local) / len(local) if local else 0.0
+            print(f"{threshold:>6.2f} {len(local) / len(samples):>9.3f} {agree_local:>11.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 T/F 모드 분류기 학습 / 평가")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("train", help="GPT 라벨로 분류기 학습")
+    p.add_argument("--data", help='{"text", "mode"} JSONL (기본값: DB 대화 기록)')
+    p.add_argument("--output", default=MODEL_PATH)
+    p.add_argument("--epochs", type=int, default=20)
+    p.add_argument("--holdout", type=float, default=0.2)
+    p.add_argument("--from-scratch", action="store_true", help="기본 사전 가중치 없이 처음부터 학습")
+    p.set_defaults(func=cmd_train)
+
+    p = sub.add_parser("eval", help="GPT 라벨과의 일치율 평가")
+    p.add_argument("--data", help='{"text", "mode"} JSONL (기본값: DB 대화 기록)')
+    p.add_argument("--model", default=MODEL_PATH)
+    p.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    p.add_argument("--relabel", action="store_true", help="GPT를 호출해서 라벨을 새로 생성")
+    p.add_argument("--sweep", action="store_true", help="임계값별 로컬 처리 비율 / 일치율 표 출력")
+    p.set_defaults(func=cmd_eval)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# tests/conftest.py
+# app 모듈은 import 시점에 DB / 캐시 경로를 읽으므로, 먼저 임시 디렉터리로 돌려 놓음 (실제 app/diary.db 등은 건드리지 않음)
+#   python -m pytest -q
+
+import os
+import shutil
+import sys
+import tempfile
+
+_tmp_dir = tempfile.mkdtemp(prefix="app_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'diary.db')}"
+os.environ["EMOTION_CACHE_DB_PATH"] = os.path.join(_tmp_dir, "emotion_cache.db")
+os.environ["AUDIO_STORE_DIR"] = os.path.join(_tmp_dir, "audio_store")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _cleanup_tmp_dir():
+    yield
+    shutil.rmtree(_tmp_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    """테이블을 만든 임시 DB 세션 (테스트가 끝나면 모든 행 삭제)"""
+    from app import database, model
+
+    model.Base.metadata.create_all(bind=database.engine)
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with database.engine.begin() as conn:
+            for table in reversed(model.Base.metadata.sorted_tables):
+                conn.execute(table.delete())
@@ -0,0 +1,116 @@
+# tests/test_audio_store.py
+# 응답 음성 저장소 보관 한도: 참조되지 않는 오래된 파일부터 삭제, 대화 기록이 가리키는 파일은 유지
+
+import os
+import time
+
+import pytest
+
+from app import audio_store
+from app.model import AudioFile, ConversationLog, PrecomputedQuestion
+
+
+@pytest.fixture
+def store(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_store, "AUDIO_STORE_DIR", str(tmp_path / "audio"))
+    monkeypatch.setattr(audio_store, "MAX_BYTES", 0)
+    monkeypatch.setattr(audio_store, "MAX_AGE_SECONDS", 0)
+    monkeypatch.setattr(audio_store, "SWEEP_SECONDS", 3600)
+    monkeypatch.setattr(audio_store, "_swept_at", time.monotonic())  # put에서 자동 정리하지 않음
+    return db
+
+
+def _put(data, **kwargs):
+    name = audio_store.put(data, "mp3", **kwargs)
+    time.sleep(0.01)  # last_used_at 순서 고정
+    return name
+
+
+def _exists(name):
+    return audio_store.resolve(name) is not None
+
+
+def test_put_is_content_addressed(store):
+    first = _put(b"same audio")
+    second = _put(b"same audio")
+    assert first == second
+    path, digest, media_type = audio_store.resolve(first)
+    assert open(path, "rb").read() == b"same audio"
+    assert first == f"{digest}.mp3" and media_type == "audio/mpeg"
+    assert store.query(AudioFile).count() == 1
+
+
+def test_resolve_rejects_bad_names(store):
+    assert audio_store.resolve("../../etc/passwd") is None
+    assert audio_store.resolve("0" * 64 + ".exe") is None
+    assert audio_store.resolve_url("https://example.com/a.mp3") is None
+
+
+def test_size_limit_evicts_oldest_unreferenced(store, monkeypatch):
+    a, b, c = _put(b"a" * 100), _put(b"b" * 100), _put(b"c" * 100)
+    monkeypatch.setattr(audio_store, "MAX_BYTES", 250)
+    assert audio_store.enforce() == 1
+    assert not _exists(a) and _exists(b) and _exists(c)
+    assert audio_store.stats()["bytes"] == 200
+
+
+def test_referenced_files_are_never_evicted(store, monkeypatch):
+    a, b, c = _put(b"a" * 100), _put(b"b" * 100), _put(b"c" * 100)
+    store.add(ConversationLog(diary_id=1, user_input="u", response="r", mode="F", audio_url=audio_store.url_for(a)))
+    store.add(PrecomputedQuestion(diary_id=1, content_hash="h", question="q", audio_url=audio_store.url_for(b)))
+    store.commit()
+
+    monkeypatch.setattr(audio_store, "MAX_BYTES", 100)
+    audio_store.enforce()
+    assert _exists(a) and _exists(b) and not _exists(c)
+    assert audio_store.stats()["referenced_files"] == 2
+
+
+def test_age_limit_evicts_expired_unreferenced(store, monkeypatch):
+    referenced, unreferenced = _put(b"referenced"), _put(b"unreferenced")
+    store.add(ConversationLog(diary_id=1, user_input="u", response="r", mode="F",
+                              audio_url=audio_store.url_for(referenced)))
+    store.commit()
+    store.query(AudioFile).update({AudioFile.last_used_at: time.time() - 100})
+    store.commit()
+    recent = _put(b"recent")
+
+    monkeypatch.setattr(audio_store, "MAX_AGE_SECONDS", 50)
+    audio_store.enforce()
+    assert _exists(referenced)        # 기간이 지났지만 대화 기록이 참조
+    assert not _exists(unreferenced)  # 기간이 지났고 참조 없음
+    assert _exists(recent)            # 방금 저장
+
+
+def test_put_again_refreshes_last_use(store, monkeypatch):
+    a, b = _put(b"a" * 100), _put(b"b" * 100)
+    _put(b"a" * 100)  # a를 다시 저장 → 가장 최근
+    monkeypatch.setattr(audio_store, "MAX_BYTES", 100)
+    audio_store.enforce()
+    assert _exists(a) and not _exists(b)
+
+
+def test_tts_key_lookup(store, monkeypatch):
+    name = _put(b"voice", tts_key="k1")
+    assert audio_store.get_by_tts_key("k1") == b"voice"
+    assert audio_store.get_by_tts_key("missing") is None
+    # 키 없이 다시 저장해도 기존 키는 유지
+    audio_store.put(b"voice", "mp3")
+    assert audio_store.get_by_tts_key("k1") == b"voice"
+
+    monkeypatch.setattr(audio_store, "MAX_BYTES", 1)
+    audio_store.enforce()
+    assert not _exists(name)
+    assert audio_store.get_by_tts_key("k1") is None
+
+
+def test_existing_files_are_indexed_on_first_sweep(store, monkeypatch):
+    name = _put(b"legacy" * 10)
+    store.query(AudioFile).delete()
+    store.commit()
+    assert os.path.exists(audio_store.resolve(name)[0])
+
+    monkeypatch.setattr(audio_store, "MAX_BYTES", 1000)
+    audio_store.enforce()
+    assert audio_store.stats()["files"] == 1
+    assert store.query(AudioFile).one().size == 60
@@ -0,0 +1,113 @@
+# tests/test_caches.py
+# 감정 추론 캐시(LRU + SQLite) / TTS 캐시(바이트 LRU + 음성 저장소 계층) 제거 순서
+
+import time
+
+from app.emotion_cache import DiskCache, LRUCache
+from app.tts_cache import ByteLRU, TTSCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # a가 가장 최근
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_expires_entries_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = LRUCache(max_size=10, ttl=5)
+    cache.put("a", 1)
+    now[0] += 4
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_with_zero_size_stores_nothing():
+    cache = LRUCache(max_size=0, ttl=60)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+
+def test_disk_cache_round_trip_and_ttl(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "cache.db"), ttl=10, version="v1")
+    cache.put("k", [{"label": "기쁨", "confidence": 0.9}])
+    assert cache.get("k") == [{"label": "기쁨", "confidence": 0.9}]
+
+    later = time.time() + 11
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get("k") is None
+    cache.prune()
+    assert cache._conn().execute("SELECT COUNT(*) FROM emotion_cache").fetchone()[0] == 0
+
+
+def test_disk_cache_drops_rows_when_model_version_changes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    DiskCache(path, ttl=60, version="v1").put("k", [0.1, 0.9])
+    assert DiskCache(path, ttl=60, version="v1").get("k") == [0.1, 0.9]
+    assert DiskCache(path, ttl=60, version="v2").get("k") is None
+
+
+def test_disk_cache_tables_are_independent(tmp_path):
+    path = str(tmp_path / "cache.db")
+    results = DiskCache(path, ttl=60, version="v1", table="emotion_cache")
+    chunks = DiskCache(path, ttl=60, version="v1", table="emotion_chunks")
+    results.put("k", "result")
+    assert chunks.get("k") is None
+
+
+def test_byte_lru_evicts_by_total_size():
+    cache = ByteLRU(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")
+    cache.put("c", b"1234")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234"
+    assert cache.size == 8
+
+
+def test_byte_lru_skips_values_larger_than_limit():
+    cache = ByteLRU(max_bytes=4)
+    cache.put("a", b"12")
+    cache.put("big", b"12345")
+    assert cache.get("big") is None
+    assert cache.get("a") == b"12"
+
+
+class _Store:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def put(self, key, value):
+        self.data[key] = value
+
+
+def test_tts_cache_falls_back_to_store_after_memory_eviction():
+    store = _Store()
+    cache = TTSCache(ByteLRU(max_bytes=4), store)
+    calls = []
+
+    def synthesize(value):
+        calls.append(value)
+        return value
+
+    assert cache.get_or_create("a", lambda: synthesize(b"aaaa")) == b"aaaa"
+    assert cache.get_or_create("b", lambda: synthesize(b"bbbb")) == b"bbbb"  # 메모리에서 a 밀려남
+    assert cache.get_or_create("a", lambda: synthesize(b"xxxx")) == b"aaaa"
+    assert calls == [b"aaaa", b"bbbb"]
+
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["store_hits"], stats["misses"]) == (0, 1, 2)
+    assert stats["bytes_synthesized"] == 8
@@ -0,0 +1,75 @@
+# tests/test_chat_history.py
+# /chat-history 키셋 커서: 같은 created_at이 여러 개여도 빠짐 / 중복 없이 이어지는지
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.chatbot import decode_cursor, encode_cursor, fetch_chat_page
+from app.model import ConversationLog
+
+START = datetime(2025, 1, 1, 9, 0, 0)
+
+
+@pytest.fixture
+def logs(db):
+    # 두 턴씩 같은 created_at → id로만 순서가 갈림
+    for i in range(9):
+        db.add(ConversationLog(
+            diary_id=1, user_input=f"u{i}", response=f"r{i}", mode="F",
+            created_at=START + timedelta(seconds=i // 2),
+        ))
+    db.add(ConversationLog(diary_id=2, user_input="other", response="r", mode="F", created_at=START))
+    db.commit()
+    return db
+
+
+def _inputs(page):
+    return [log["user_input"] for log in page["logs"]]
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 3, 4, 5, 6, 7, 890123)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_without_limit_returns_whole_history(logs):
+    page = fetch_chat_page(logs, 1)
+    assert _inputs(page) == [f"u{i}" for i in range(9)]
+    assert page["has_more"] is False
+
+
+def test_before_cursor_walks_back_without_gaps(logs):
+    page = fetch_chat_page(logs, 1, limit=2)
+    seen = _inputs(page)
+    while page["has_more"]:
+        page = fetch_chat_page(logs, 1, limit=2, before=page["before"])
+        seen = _inputs(page) + seen
+    assert seen == [f"u{i}" for i in range(9)]
+
+
+def test_after_cursor_walks_forward_without_gaps(logs):
+    first = fetch_chat_page(logs, 1, limit=3, after=encode_cursor(START - timedelta(seconds=1), 0))
+    seen = _inputs(first)
+    page = first
+    while page["has_more"]:
+        page = fetch_chat_page(logs, 1, limit=3, after=page["after"])
+        seen += _inputs(page)
+    assert seen == [f"u{i}" for i in range(9)]
+
+
+def test_after_last_page_returns_new_rows_only(logs):
+    page = fetch_chat_page(logs, 1, limit=20)
+    logs.add(ConversationLog(diary_id=1, user_input="new", response="r", mode="F",
+                             created_at=START + timedelta(seconds=4)))
+    logs.commit()
+    newer = fetch_chat_page(logs, 1, limit=20, after=page["after"])
+    assert _inputs(newer) == ["new"]
+    # 새 기록이 없으면 커서는 그대로
+    empty = fetch_chat_page(logs, 1, limit=20, after=newer["after"])
+    assert empty["logs"] == [] and empty["after"] == newer["after"]
@@ -0,0 +1,82 @@
+# tests/test_chunking.py
+# 긴 일기 조각 나누기 / 조각 확률 합치기
+
+import pytest
+
+from app.chunking import aggregate_probs, make_chunks, split_sentences
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def _diary(n):
+    return " ".join(f"오늘은 {i}번째 일을 했고 기분이 조금 나아졌다." for i in range(n))
+
+
+def test_split_sentences_on_punctuation_and_newlines():
+    text = "첫 문장이다. 두 번째 문장일까? 세 번째!\n네 번째 줄"
+    assert split_sentences(text) == ["첫 문장이다.", "두 번째 문장일까?", "세 번째!", "네 번째 줄"]
+
+
+def test_short_text_is_one_chunk():
+    text = "오늘은 조금 피곤했다. 그래도 괜찮았다."
+    assert make_chunks(text, count_words, max_tokens=64, min_tokens=32) == [(text, 5)]
+
+
+def test_empty_text_is_one_chunk():
+    assert make_chunks("", count_words) == [("", 0)]
+
+
+def test_chunks_respect_max_tokens():
+    chunks = make_chunks(_diary(40), count_words, max_tokens=30, min_tokens=10, overlap=1)
+    assert len(chunks) > 1
+    for chunk, n in chunks:
+        assert n == count_words(chunk)
+        assert n <= 30
+
+
+def test_chunks_cover_every_sentence_in_order():
+    text = _diary(40)
+    chunks = make_chunks(text, count_words, max_tokens=30, min_tokens=10, overlap=1)
+    seen = []
+    for chunk, _ in chunks:
+        for sentence in split_sentences(chunk):
+            if not seen or seen[-1] != sentence:
+                seen.append(sentence)
+    assert seen == split_sentences(text)
+
+
+def test_consecutive_chunks_overlap_by_one_sentence():
+    chunks = make_chunks(_diary(40), count_words, max_tokens=30, min_tokens=10, overlap=1)
+    for (prev, _), (cur, _) in zip(chunks, chunks[1:]):
+        assert split_sentences(prev)[-1] == split_sentences(cur)[0]
+
+
+def test_editing_one_sentence_keeps_distant_chunks():
+    text = _diary(60)
+    edited = text.replace("오늘은 3번째 일을 했고", "오늘은 3번째 일을 겨우 했고")
+    before = {c for c, _ in make_chunks(text, count_words, max_tokens=30, min_tokens=10)}
+    after = {c for c, _ in make_chunks(edited, count_words, max_tokens=30, min_tokens=10)}
+    # 문장 해시 경계 덕분에 앞부분 조각만 바뀌고 나머지는 그대로
+    assert len(before & after) >= len(before) // 2
+
+
+def test_sentence_longer_than_limit_is_split_by_words():
+    text = " ".join(["단어"] * 50)
+    chunks = make_chunks(text, count_words, max_tokens=20, min_tokens=5, overlap=0)
+    assert [n for _, n in chunks] == [20, 20, 10]
+
+
+def test_aggregate_probs_weights_by_tokens():
+    merged = aggregate_probs([[1.0, 0.0], [0.0, 1.0]], [3, 1])
+    assert merged == pytest.approx([0.75, 0.25])
+
+
+def test_aggregate_probs_zero_weights_falls_back_to_mean():
+    merged = aggregate_probs([[0.2, 0.8], [0.6, 0.4]], [0, 0])
+    assert merged == pytest.approx([0.4, 0.6])
+
+
+def test_aggregate_probs_single_chunk_is_unchanged():
+    assert aggregate_probs([[0.1, 0.9]], [7]) == pytest.approx([0.1, 0.9])
@@ -0,0 +1,129 @@
+# ✅ utils/content_sampler.py
+# ORDER BY RANDOM() 대신 쓰는 무작위 추천용 id 배열
+# 테이블별 / (테이블, 감정)별 id 배열을 메모리에 두고 k개를 O(k)로 뽑음 (seed를 주면 같은 결과)
+# emotion.db가 바뀌면(mtime / 크기, 같은 프로세스의 save_to_db는 즉시) 배열을 다시 읽음
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from array import array
+from datetime import date
+
+from utils.db_utils import CONTENT_TABLES, has_content_emotions, split_tags
+
+CHECK_INTERVAL = float(os.getenv("CONTENT_SAMPLER_CHECK_SECONDS", "1.0"))
+
+
+def daily_seed(key, day: date = None) -> str:
+    """사용자 등 key와 날짜로 만든 seed → 같은 사용자는 하루 동안 같은 추천"""
+    return f"{key}:{(day or date.today()).isoformat()}"
+
+
+def sample_indices(n: int, k: int, rng=random):
+    """0..n-1 중 서로 다른 k개 (range에 대한 random.sample은 n과 무관하게 O(k))"""
+    return rng.sample(range(n), min(k, n))
+
+
+class _Snapshot:
+    __slots__ = ("version", "table_ids", "emotion_ids", "_unions")
+
+    def __init__(self, version, table_ids, emotion_ids):
+        self.version = version
+        self.table_ids = table_ids        # 테이블 → array('q') id 목록
+        self.emotion_ids = emotion_ids    # (테이블, 감정) → array('q')
+        self._unions = {}                 # (테이블, 감정 tuple) → 합집합 id (처음 요청 때 한 번 계산)
+
+    def ids(self, table, emotions=None):
+        if not emotions:
+            return self.table_ids.get(table, ())
+        if len(emotions) == 1:
+            return self.emotion_ids.get((table, emotions[0]), ())
+        key = (table, tuple(emotions))
+        found = self._unions.get(key)
+        if found is None:
+            merged = set()
+            for emotion in emotions:
+                merged.update(self.emotion_ids.get((table, emotion), ()))
+            found = self._unions[key] = array("q", sorted(merged))
+        return found
+
+
+def _load(db_path: str, version) -> _Snapshot:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        table_ids, emotion_ids = {}, {}
+        for table in CONTENT_TABLES:
+            table_ids[table] = array("q", (row[0] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id")))
+        if has_content_emotions(conn):
+            rows = conn.execute("SELECT content_type, emotion, content_id FROM content_emotions ORDER BY 1, 2, 3")
+            for table, emotion, content_id in rows:
+                emotion_ids.setdefault((table, emotion), array("q")).append(content_id)
+        else:
+            for table in CONTENT_TABLES:
+                for content_id, tags in conn.execute(f"SELECT id, emotion_tags FROM {table} ORDER BY id"):
+                    for emotion in split_tags(tags):
+                        emotion_ids.setdefault((table, emotion), array("q")).append(content_id)
+    finally:
+        conn.close()
+    return _Snapshot(version, table_ids, emotion_ids)
+
+
+class ContentSampler:
+    def __init__(self, db_path: str, check_interval: float = CHECK_INTERVAL):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def invalidate(self):
+        """콘텐츠를 추가한 직후 호출 → 다음 조회 때 파일 버전을 바로 확인"""
+        self._stale = True
+
+    def _expired(self):
+        return self._stale or time.monotonic() - self._checked_at >= self.check_interval
+
+    def snapshot(self) -> _Snapshot:
+        snap = self._snapshot
+        if snap is not None and not self._expired():
+            return snap
+        with self._lock:
+            if self._snapshot is None or self._expired():
+                self._stale = False
+                st = os.stat(self.db_path)
+                version = (st.st_mtime_ns, st.st_size)
+                if self._snapshot is None or self._snapshot.version != version:
+                    self._snapshot = _load(self.db_path, version)
+                    self.reloads += 1
+                self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def sample(self, table: str, k: int, emotions=None, seed=None, rng=None):
+        """table(감정이 있으면 그 감정 중 하나라도 달린 항목)에서 서로 다른 id k개"""
+        ids = self.snapshot().ids(table, emotions)
+        if rng is None:
+            rng = random.Random(seed) if seed is not None else random
+        return [ids[i] for i in sample_indices(len(ids), k, rng)]
+
+
+_samplers = {}
+_samplers_lock = threading.Lock()
+
+
+def content_sampler(db_path: str) -> ContentSampler:
+    key = os.path.abspath(db_path)
+    sampler = _samplers.get(key)
+    if sampler is None:
+        with _samplers_lock:
+            sampler = _samplers.setdefault(key, ContentSampler(db_path))
+    return sampler
+
+
+def invalidate(db_path: str):
+    sampler = _samplers.get(os.path.abspath(db_path))
+    if sampler is not None:
+        sampler.invalidate()
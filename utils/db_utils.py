@@ -1,116 +1,159 @@
-# ✅ utils/db_utils.py
-
-import sqlite3
-import os
-import json
-
-def get_connection():
-    return sqlite3.connect("data/emotion.db")
-
-# DB 저장 함수
-def save_to_db(table, items):
-    conn = get_connection()
-    cur = conn.cursor()
-    saved_count = 0
-    for item in items:
-        cur.execute(f"SELECT id FROM {table} WHERE title = ?", (item['title'],))
-        if cur.fetchone():
-            print(f"🔁 이미 존재함: {item['title']}")
-            continue
-        # 컬럼 유무에 따라 삽입 쿼리 다르게
-        if 'thumbnail_url' in item:
-            cur.execute(
-                f"INSERT INTO {table} (title, url, emotion_tags, thumbnail_url) VALUES (?, ?, ?, ?)",
-                (item['title'], item['url'], ','.join(item['emotion_tags']), item['thumbnail_url'])
-            )
-        elif 'poster_url' in item:
-            cur.execute(
-                f"INSERT INTO {table} (title, url, emotion_tags, poster_url) VALUES (?, ?, ?, ?)",
-                (item['title'], item['url'], ','.join(item['emotion_tags']), item['poster_url'])
-            )
-        else:
-            cur.execute(
-                f"INSERT INTO {table} (title, url, emotion_tags) VALUES (?, ?, ?)",
-                (item['title'], item['url'], ','.join(item['emotion_tags']))
-            )
-
-        print(f"✅ 저장 완료: {item['title']}")
-        saved_count += 1
-
-    conn.commit()
-    conn.close()
-    print(f"\n✅ 총 저장된 항목 수: {saved_count}")
-
-# 모든 콘텐츠 로드 (optional)
-def load_all_content():
-    conn = get_connection()
-    cur = conn.cursor()
-    all_items = []
-
-    for table in ["books", "movies", "music", "quotes"]:
-        if table == "movies":
-            cur.execute(f"SELECT title, url, emotion_tags, poster_url FROM {table}")
-            rows = cur.fetchall()
-            for title, url, tags, poster in rows:
-                all_items.append({
-                    "title": title,
-                    "url": url,
-                    "emotion_tags": tags.split(","),
-                    "poster_url": poster
-                })
-
-        elif table == "music":
-            cur.execute(f"SELECT title, url, emotion_tags, thumbnail_url FROM {table}")
-            rows = cur.fetchall()
-            for title, url, tags, thumb in rows:
-                all_items.append({
-                    "title": title,
-                    "url": url,
-                    "emotion_tags": tags.split(","),
-                    "thumbnail_url": thumb
-                })
-
-        elif table == "books":
-            cur.execute(f"SELECT title, url, emotion_tags, thumbnail_url FROM {table}")
-            rows = cur.fetchall()
-            for title, url, tags, thumb in rows:
-                all_items.append({
-                    "title": title,
-                    "url": url,
-                    "emotion_tags": tags.split(","),
-                    "thumbnail_url": thumb
-                })
-
-        else:  # quotes (썸네일 없음)
-            cur.execute(f"SELECT title, url, emotion_tags FROM {table}")
-            rows = cur.fetchall()
-            for title, url, tags in rows:
-                all_items.append({
-                    "title": title,
-                    "url": url,
-                    "emotion_tags": tags.split(",")
-                })
-
-    conn.close()
-    return all_items
-
-def save_to_json(file_path, items):
-    """
-    데이터를 JSON 파일로 저장합니다.
-
-    Parameters
-    ----------
-    file_path : str
-        저장할 JSON 파일 경로
-    items : list or dict
-        저장할 데이터 (보통 list[dict] 형태)
-    """
-    # 디렉토리가 없다면 생성
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-    # JSON 저장
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(items, f, ensure_ascii=False, indent=4)
-
-    print(f"✅ JSON 저장 완료: {file_path}")
-
+# ✅ utils/db_utils.py
+
+import sqlite3
+import os
+import json
+
+CONTENT_TABLES = ["books", "movies", "music", "quotes"]
+
+DB_PATH = "data/emotion.db"
+
+def get_connection():
+    return sqlite3.connect(DB_PATH)
+
+# 콘텐츠 ↔ 감정 태그 정규화 테이블 (emotion_tags 문자열은 응답 호환용으로 그대로 유지)
+# weight: 태그 순서(모델 확률 순) 기준, 첫 태그 1.0 → 1/2 → 1/3 ...
+CONTENT_EMOTIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_emotions (
+    content_type TEXT NOT NULL,
+    content_id INTEGER NOT NULL,
+    emotion TEXT NOT NULL,
+    weight REAL NOT NULL DEFAULT 1.0,
+    PRIMARY KEY (content_type, content_id, emotion)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_content_emotions_lookup
+    ON content_emotions (content_type, emotion, content_id);
+"""
+
+def ensure_content_schema(conn):
+    conn.executescript(CONTENT_EMOTIONS_SCHEMA)
+
+def has_content_emotions(conn):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'content_emotions'"
+    ).fetchone()
+    return row is not None
+
+def split_tags(tags):
+    """'우울,외로움' 또는 ['우울', '외로움'] → 중복 / 공백 제거한 라벨 목록 (순서 유지)"""
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    labels = []
+    for tag in tags or []:
+        tag = tag.strip()
+        if tag and tag not in labels:
+            labels.append(tag)
+    return labels
+
+def set_content_emotions(cur, table, content_id, tags):
+    cur.execute(
+        "DELETE FROM content_emotions WHERE content_type = ? AND content_id = ?",
+        (table, content_id)
+    )
+    cur.executemany(
+        "INSERT INTO content_emotions (content_type, content_id, emotion, weight) VALUES (?, ?, ?, ?)",
+        [(table, content_id, label, round(1.0 / (rank + 1), 4)) for rank, label in enumerate(split_tags(tags))]
+    )
+
+# DB 저장 함수
+def save_to_db(table, items):
+    conn = get_connection()
+    ensure_content_schema(conn)
+    cur = conn.cursor()
+    saved_count = 0
+    for item in items:
+        cur.execute(f"SELECT id FROM {table} WHERE title = ?", (item['title'],))
+        if cur.fetchone():
+            print(f"🔁 이미 존재함: {item['title']}")
+            continue
+        # 컬럼 유무에 따라 삽입 쿼리 다르게
+        if 'thumbnail_url' in item:
+            cur.execute(
+                f"INSERT INTO {table} (title, url, emotion_tags, thumbnail_url) VALUES (?, ?, ?, ?)",
+                (item['title'], item['url'], ','.join(item['emotion_tags']), item['thumbnail_url'])
+            )
+        elif 'poster_url' in item:
+            cur.execute(
+                f"INSERT INTO {table} (title, url, emotion_tags, poster_url) VALUES (?, ?, ?, ?)",
+                (item['title'], item['url'], ','.join(item['emotion_tags']), item['poster_url'])
+            )
+        else:
+            cur.execute(
+                f"INSERT INTO {table} (title, url, emotion_tags) VALUES (?, ?, ?)",
+                (item['title'], item['url'], ','.join(item['emotion_tags']))
+            )
+        set_content_emotions(cur, table, cur.lastrowid, item['emotion_tags'])
+
+        print(f"✅ 저장 완료: {item['title']}")
+        saved_count += 1
+
+    conn.commit()
+    conn.close()
+    # 같은 프로세스의 무작위 추천 id 배열 즉시 갱신 (다른 프로세스는 파일 변경으로 감지)
+    from utils.content_sampler import invalidate
+    invalidate(DB_PATH)
+    print(f"\n✅ 총 저장된 항목 수: {saved_count}")
+
+# 테이블별 이미지 컬럼 (quotes는 없음)
+IMAGE_FIELDS = {"books": "thumbnail_url", "movies": "poster_url", "music": "thumbnail_url", "quotes": None}
+
+# 모든 콘텐츠 로드 (optional)
+def load_all_content():
+    conn = get_connection()
+    cur = conn.cursor()
+    normalized = has_content_emotions(conn)
+    all_items = []
+
+    for table in CONTENT_TABLES:
+        image_field = IMAGE_FIELDS[table]
+        image_select = f", c.{image_field}" if image_field else ""
+        if normalized:
+            # 감정 태그는 content_emotions 조인 (PK 인덱스), 항목당 여러 행 → 아래에서 묶음
+            cur.execute(f"""
+                SELECT c.id, c.title, c.url{image_select}, ce.emotion
+                FROM {table} c
+                LEFT JOIN content_emotions ce ON ce.content_type = ? AND ce.content_id = c.id
+                ORDER BY c.id, ce.weight DESC
+            """, (table,))
+        else:
+            # 마이그레이션 전 DB: 쉼표로 이어 붙인 emotion_tags 그대로 사용
+            cur.execute(f"SELECT c.id, c.title, c.url{image_select}, c.emotion_tags FROM {table} c ORDER BY c.id")
+
+        items = {}
+        for row in cur.fetchall():
+            content_id, title, url = row[0], row[1], row[2]
+            item = items.get(content_id)
+            if item is None:
+                item = items[content_id] = {"title": title, "url": url, "emotion_tags": []}
+                if image_field:
+                    item[image_field] = row[3]
+            if normalized:
+                if row[-1] is not None:
+                    item["emotion_tags"].append(row[-1])
+            else:
+                item["emotion_tags"] = split_tags(row[-1])
+        all_items.extend(items.values())
+
+    conn.close()
+    return all_items
+
+def save_to_json(file_path, items):
+    """
+    데이터를 JSON 파일로 저장합니다.
+
+    Parameters
+    ----------
+    file_path : str
+        저장할 JSON 파일 경로
+    items : list or dict
+        저장할 데이터 (보통 list[dict] 형태)
+    """
+    # 디렉토리가 없다면 생성
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    # JSON 저장
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(items, f, ensure_ascii=False, indent=4)
+
+    print(f"✅ JSON 저장 완료: {file_path}")
+